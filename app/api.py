@@ -1,20 +1,27 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import os
 import logging
-from langchain_openai import ChatOpenAI
 from app.config.config import get_config
-from loaders.git_loader import git_loader
-from splitters.text_splitter import get_python_splitter, get_markdown_splitter
-from qdrant.qdrant import get_client
-from embeddings.points import PointsCreator
-from qdrant.qdrant_store import QdrantStore
-from qdrant_client import models as qdrant_models
-from encoders.encoder import get_code_encoder, get_text_encoder
-from utils.answer_questions import answer_question
-from retrievers import RetrieverFactory, QueryClassifier, Reranker
-from chains import QAChainBuilder
+from app.encoders.pool import shutdown_encoding_pool
+from app.qdrant.qdrant import get_async_client, get_client
+from app.qdrant.tenancy import normalize_repo_id
+from app.ingestion import (
+    JobManager,
+    JobQueueFull,
+    ingest_repository,
+    ingest_repository_distributed,
+)
+from app.services import QueryService
+from app.telemetry import set_ingestion_jobs
+from app.telemetry.metrics import REQUEST_SECONDS, REQUESTS
 
 load_dotenv()
 
@@ -25,117 +32,230 @@ logger = logging.getLogger(__name__)
 qdrant_client = get_client(config=get_config())
 OpenAI_KEY = os.getenv("OPENAI_KEY")
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load models and build chains once per process
+    async_qdrant_client = get_async_client(config=get_config())
+    query_service = QueryService(
+        qdrant_client,
+        openai_api_key=OpenAI_KEY,
+        async_qdrant_client=async_qdrant_client,
+    )
+    app.state.query_service = query_service.start()
+    # Ingestion runs on its own bounded pool, keeping API workers free for queries
+    app.state.job_manager = JobManager()
+    yield
+    app.state.job_manager.shutdown()
+    shutdown_encoding_pool()
+    await query_service.aclose()
+    await async_qdrant_client.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Streamed responses are timed until their first byte
+        elapsed = time.perf_counter() - start
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        REQUESTS.labels(endpoint, request.method, str(status)).inc()
+        REQUEST_SECONDS.labels(endpoint, request.method).observe(elapsed)
+        logger.info(f"{request.method} {endpoint} {status} {elapsed * 1000:.1f}ms")
 
 
 class UrlModel(BaseModel):
     url: str
+    repo: str | None = None
+    full_reindex: bool = False
+    # Shard the repository across ingestion worker processes
+    distributed: bool = False
 
 
 class QueryModel(BaseModel):
     query: str
+    # Defaults to the only indexed repository
+    repo: str | None = None
+
+
+class BatchQueryModel(BaseModel):
+    queries: list[str]
+    repo: str | None = None
+
+
+async def _resolve_repo(repo, request):
+    """
+    Get the repository a question is about: the given one, or the only
+    indexed repository when none is given.
+
+    :param str repo: Repository URL or identifier from the request
+    :param Request request: Incoming request
+    :return str: Repository identifier
+    :raises HTTPException: 422 if no repository is given and not exactly one is indexed
+    """
+    if repo:
+        return normalize_repo_id(repo)
+    state_store = request.app.state.query_service.state_store
+    repos = await asyncio.to_thread(state_store.list_repos)
+    if len(repos) == 1:
+        return repos[0]
+    detail = (
+        "No repository is indexed yet"
+        if not repos
+        else f"repo is required, {len(repos)} repositories are indexed"
+    )
+    raise HTTPException(status_code=422, detail=detail)
 
 
-@app.post("/create_knowledge_base/")
-def create_knowledge_base(url_model: UrlModel):
+@app.post("/create_knowledge_base/", status_code=202)
+def create_knowledge_base(url_model: UrlModel, request: Request):
     url = url_model.url
     if not url:
         raise HTTPException(status_code=400, detail="URL is required")
+    repo_id = normalize_repo_id(url_model.repo or url)
+
+    def refresh_query_service(job):
+        logger.info(f"Refreshing query service for {repo_id}")
+        request.app.state.query_service.refresh(repo_id)
 
     try:
-        logger.info(f"Loading documents from repository: {url}")
-        # Load documents from the repository
-        python_documents, md_documents = git_loader(repo_url=url, branch="main")
-
-        logger.info("Splitting documents into chunks")
-        # Split documents into chunks
-        python_splitter = get_python_splitter()
-        md_splitter = get_markdown_splitter()
-        python_chunks = python_splitter.split_documents(python_documents)
-        md_chunks = md_splitter.split_documents(md_documents)
-
-        logger.info("Creating points for the vector store")
-        # Create points for the vector store
-        points_creator = PointsCreator(qdrant_models)
-        code_points = points_creator.create_code_points(python_chunks)
-        md_points = points_creator.create_text_points(md_chunks)
-
-        logger.info("Creating collections in the vector store")
-        # Create collections in the vector store
-        vectorstore = QdrantStore(qdrant_client, qdrant_models)
-        vectorstore.create_collection_from_encoder(
-            collection_name="md_collection",
-            encoder=get_text_encoder(),
-            distance="COSINE",
+        target = (
+            ingest_repository_distributed
+            if url_model.distributed
+            else ingest_repository
         )
-        vectorstore.create_collection_from_encoder(
-            collection_name="code_collection",
-            encoder=get_code_encoder(),
-            distance="COSINE",
+        job = request.app.state.job_manager.submit(
+            target,
+            description=url,
+            on_success=refresh_query_service,
+            qdrant_client=qdrant_client,
+            repo_url=url,
+            branch="main",
+            full_reindex=url_model.full_reindex,
+            repo_id=repo_id,
         )
+        return {"job_id": job.id, "status": job.status, "repo": repo_id}
+    except JobQueueFull as e:
+        logger.warning(f"Rejected ingestion of {url}: {e}")
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error submitting knowledge base job: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, request: Request):
+    job = request.app.state.job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
 
-        logger.info("Uploading points to the vector store")
-        # Upload points to the vector store
-        vectorstore.upload_points(collection_name="md_collection", points=md_points)
-        vectorstore.upload_points(collection_name="code_collection", points=code_points)
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str, request: Request):
+    job = request.app.state.job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
-        return {"message": "Knowledge base created successfully"}
+
+@app.post("/refresh/")
+def refresh(request: Request):
+    try:
+        logger.info("Refreshing query service")
+        request.app.state.query_service.refresh()
+        return {"message": "Query service refreshed successfully"}
     except Exception as e:
-        logger.error(f"Error creating knowledge base: {e}")
+        logger.error(f"Error refreshing query service: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+@app.get("/metrics")
+def metrics(request: Request):
+    set_ingestion_jobs(request.app.state.job_manager.status_counts())
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/answer_cache/stats")
+def answer_cache_stats(request: Request):
+    return request.app.state.query_service.answer_cache.stats()
+
+
 @app.post("/get_answer/")
-def get_answer(query_model: QueryModel):
+async def get_answer(query_model: QueryModel, request: Request):
     query = query_model.query
     if not query:
         raise HTTPException(status_code=400, detail="Query is required")
+    repo_id = await _resolve_repo(query_model.repo, request)
 
     try:
-        logger.info(f"Processing query: {query}")
-        llm = ChatOpenAI(
-            model="gpt-4o", openai_api_key=OpenAI_KEY, temperature=0, max_retries=2
-        )
+        logger.info(f"Processing query for {repo_id}: {query}")
+        answer = await request.app.state.query_service.aanswer(query, repo_id)
+        return {"answer": answer}
+    except Exception as e:
+        logger.error(f"Error getting answer: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
 
-        # Create retriever factory
-        factory = RetrieverFactory(qdrant_client)
-        # Create retrievers
-        md_retriever = factory.get_retriever(
-            collection_name="md_collection", embedding_model_name="all-MiniLM-L6-v2"
-        )
 
-        code_retriever = factory.get_retriever(
-            collection_name="code_collection",
-            embedding_model_name="microsoft/codebert-base",
+@app.post("/get_answers/")
+async def get_answers(batch_model: BatchQueryModel, request: Request):
+    if not batch_model.queries:
+        raise HTTPException(status_code=400, detail="Queries are required")
+    query_service = request.app.state.query_service
+    max_queries = query_service.config["batch"]["max_queries"]
+    if len(batch_model.queries) > max_queries:
+        raise HTTPException(
+            status_code=413, detail=f"At most {max_queries} queries per request"
         )
+    repo_id = await _resolve_repo(batch_model.repo, request)
 
-        classifier = QueryClassifier(llm)
+    try:
+        logger.info(f"Processing {len(batch_model.queries)} queries for {repo_id}")
+        results = await query_service.aanswer_batch(batch_model.queries, repo_id)
+        return {"results": results}
+    except Exception as e:
+        logger.error(f"Error getting answers: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
 
-        # Create reranker
-        reranker = Reranker(
-            model_name="BAAI/bge-reranker-base", max_length=512, top_k=3
-        )
 
-        # Create QA chain builder
-        chain_builder = QAChainBuilder(llm)
+def _sse_event(data, event=None):
+    """Format a Server-Sent Event with a JSON payload."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
 
-        ensemble_retriever = factory.create_ensemble_retriever(
-            retrievers=[md_retriever, code_retriever],
-            weights=[0.5, 0.5],  # Equal weights initially
-        )
 
-        dynamic_chain = chain_builder.build_with_dynamic_weights(
-            retrievers=[md_retriever, code_retriever],
-            classifier=classifier,
-            reranker=reranker,
-        )
+@app.post("/get_answer/stream")
+async def stream_answer(query_model: QueryModel, request: Request):
+    query = query_model.query
+    if not query:
+        raise HTTPException(status_code=400, detail="Query is required")
+    repo_id = await _resolve_repo(query_model.repo, request)
+    query_service = request.app.state.query_service
 
-        static_chain = chain_builder.build_with_ensemble(
-            ensemble_retriever=ensemble_retriever, reranker=reranker
-        )
+    async def events():
+        logger.info(f"Streaming answer for {repo_id}: {query}")
+        try:
+            async for token in query_service.astream_answer(query, repo_id):
+                if await request.is_disconnected():
+                    logger.info("Client disconnected, stopping the answer stream")
+                    return
+                yield _sse_event({"token": token})
+            yield _sse_event({}, event="done")
+        except Exception as e:
+            logger.error(f"Error streaming answer: {e}")
+            yield _sse_event({"detail": "Internal Server Error"}, event="error")
 
-        answer = answer_question(query, dynamic_chain=dynamic_chain)
-        return {"answer": answer}
-    except Exception as e:
-        logger.error(f"Error getting answer: {e}")
-        raise HTTPException(status_code=500, detail="Internal Server Error")
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,3 +1,5 @@
+import asyncio
+
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import (
@@ -7,6 +9,17 @@ from langchain_core.runnables import (
 )
 
 
+async def _aretrieve(retriever, query):
+    """
+    Retrieve documents asynchronously, falling back to a worker thread for
+    vector stores without an async client (e.g. local Qdrant).
+    """
+    try:
+        return await retriever.ainvoke(query)
+    except NotImplementedError:
+        return await asyncio.to_thread(retriever.invoke, query)
+
+
 class QAChainBuilder:
     """Builder class for creating QA chains with retrieval and reranking."""
 
@@ -34,6 +47,15 @@ class QAChainBuilder:
         self.prompt_template = template
         return self
 
+    def build_generation(self):
+        """
+        Build the generation step, answering from an already retrieved context.
+
+        :return: Runnable taking {"context": str, "question": str} and returning the answer
+        """
+        prompt = ChatPromptTemplate.from_template(self.prompt_template)
+        return prompt | self.llm | StrOutputParser()
+
     def build_with_ensemble(self, ensemble_retriever, reranker=None):
         """
         Build a QA chain with ensemble retrieval and reranking.
@@ -42,8 +64,6 @@ class QAChainBuilder:
         :return: Runnable chain
         """
 
-        prompt = ChatPromptTemplate.from_template(self.prompt_template)
-
         retrieval_step = RunnableParallel(
             {"context": ensemble_retriever, "question": RunnablePassthrough()}
         )
@@ -53,7 +73,7 @@ class QAChainBuilder:
             retrieval_step = retrieval_step | RunnableLambda(reranker.format_for_prompt)
 
         # Build the full chain
-        chain = retrieval_step | prompt | self.llm | StrOutputParser()
+        chain = retrieval_step | self.build_generation()
 
         return chain
 
@@ -69,8 +89,6 @@ class QAChainBuilder:
 
         from langchain.retrievers import EnsembleRetriever
 
-        prompt = ChatPromptTemplate.from_template(self.prompt_template)
-
         def get_dynamic_ensemble(query):
             weights = classifier.get_retriever_weights(query)
             return EnsembleRetriever(retrievers=retrievers, weights=weights)
@@ -81,11 +99,23 @@ class QAChainBuilder:
             results = dynamic_retriever.invoke(query)
             return {"context": results, "question": query}
 
-        retrieval_step = RunnableLambda(retrieve_with_dynamic_weights)
+        # Async: classify and search both collections concurrently, weight at fusion
+        async def aretrieve_with_dynamic_weights(query):
+            weights, *doc_lists = await asyncio.gather(
+                classifier.aget_retriever_weights(query),
+                *(_aretrieve(retriever, query) for retriever in retrievers),
+            )
+            ensemble = EnsembleRetriever(retrievers=retrievers, weights=weights)
+            results = ensemble.weighted_reciprocal_rank(doc_lists)
+            return {"context": results, "question": query}
+
+        retrieval_step = RunnableLambda(
+            retrieve_with_dynamic_weights, afunc=aretrieve_with_dynamic_weights
+        )
 
         if reranker:
             retrieval_step = retrieval_step | RunnableLambda(reranker.format_for_prompt)
 
-        chain = retrieval_step | prompt | self.llm | StrOutputParser()
+        chain = retrieval_step | self.build_generation()
 
         return chain
@@ -4,12 +4,30 @@ import os
 
 load_dotenv()
 
+# Caches, git mirrors and state databases written at runtime, by default in the
+# project's data/ directory whatever the working directory
+DATA_DIR = os.getenv(
+    "DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data"),
+)
+
+
+def data_path(*parts):
+    """
+    Get a path in the data directory.
+
+    :param str parts: Path components relative to DATA_DIR
+    :return str: Absolute path
+    """
+    return os.path.abspath(os.path.join(DATA_DIR, *parts))
+
 
 class Config(BaseModel):
     qdrant_url: str
     qdrant_api_key: str | None
     qdrant_port: int
     qdrant_grpc_port: int
+    qdrant_prefer_grpc: bool
     openai_api_key: str | None
 
 
@@ -20,5 +38,6 @@ def get_config() -> Config:
         qdrant_api_key=str(os.getenv("QDRANT_KEY")),
         qdrant_port=int(os.getenv("QDRANT_PORT", 6333)),
         qdrant_grpc_port=int(os.getenv("QDRANT_GRPC_PORT", 6334)),
+        qdrant_prefer_grpc=os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true",
         openai_api_key=os.getenv("OPENAI_KEY"),
     )
@@ -0,0 +1,68 @@
+def token_lengths(encoder, texts):
+    """
+    Get the number of tokens each text is encoded with, after truncation.
+
+    :param SentenceTransformer encoder: The encoder
+    :param list texts: Texts to measure
+    :return list: Token count per text
+    """
+    max_length = getattr(encoder, "max_seq_length", None) or 512
+    tokenizer = getattr(encoder, "tokenizer", None)
+    if tokenizer is None:
+        # Roughly four characters per token, plus the special tokens
+        return [min(max_length, len(text) // 4 + 2) for text in texts]
+    input_ids = tokenizer(
+        texts,
+        add_special_tokens=True,
+        truncation=True,
+        max_length=max_length,
+        return_attention_mask=False,
+        return_token_type_ids=False,
+    )["input_ids"]
+    return [len(ids) for ids in input_ids]
+
+
+def length_bucketed_batches(lengths, max_tokens, max_batch_size):
+    """
+    Group texts of similar length into batches within a token budget. A batch
+    is padded to its longest text, so its cost is that length times its size;
+    texts are taken shortest first and a batch is closed when the next text
+    would push the cost over ``max_tokens``. A text over the budget on its own
+    forms a batch by itself.
+
+    :param list lengths: Token count per text
+    :param int max_tokens: Maximum padded tokens per batch
+    :param int max_batch_size: Maximum texts per batch
+    :return list: Batches as lists of text indices
+    """
+    batches, current = [], []
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        if current and (
+            len(current) >= max_batch_size
+            or (len(current) + 1) * lengths[i] > max_tokens
+        ):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def fixed_batches(count, batch_size):
+    """
+    Split texts into consecutive batches of a fixed size.
+
+    :param int count: Number of texts
+    :param int batch_size: Texts per batch
+    :return list: Batches as lists of text indices
+    """
+    return [
+        list(range(start, min(start + batch_size, count)))
+        for start in range(0, count, batch_size)
+    ]
+
+
+def padded_tokens(lengths, batches):
+    """Total tokens encoded for batches, each padded to its longest text."""
+    return sum(max(lengths[i] for i in batch) * len(batch) for batch in batches)
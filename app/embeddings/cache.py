@@ -0,0 +1,273 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from loguru import logger
+
+from app.embeddings.config import get_embedding_cache_config
+from app.encoders.backends import resolve_revision
+from app.encoders.encoder import EncoderFactory
+
+_SQLITE_MAX_VARIABLES = 500
+
+
+class EmbeddingCache:
+    """
+    Persistent cache of chunk embeddings for one model revision.
+
+    Vectors live in a memory-mapped float32 file, one row per slot, and an SQLite
+    index maps chunk content hashes to slots. When the cache is full, the least
+    recently used slots are reused.
+    """
+
+    def __init__(self, model_name, revision="main", path=None, max_entries=None):
+        """
+        Initialize the cache.
+
+        :param str model_name: Name of the model the vectors were produced by
+        :param str revision: Model revision
+        :param str path: Root directory of the cache (defaults to EMBEDDING_CACHE_CONFIG)
+        :param int max_entries: Maximum number of cached vectors
+        """
+        config = get_embedding_cache_config()
+        self.model_name = model_name
+        self.revision = revision
+        self.max_entries = max_entries or config["max_entries"]
+
+        namespace = hashlib.sha1(f"{model_name}@{revision}".encode("utf-8"))
+        self.directory = os.path.join(path or config["path"], namespace.hexdigest())
+        os.makedirs(self.directory, exist_ok=True)
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self.index_path = os.path.join(self.directory, "index.db")
+
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._dim = None
+
+        with self._connect() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    chunk_hash TEXT PRIMARY KEY,
+                    slot INTEGER NOT NULL UNIQUE,
+                    last_used REAL NOT NULL
+                )
+                """
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            connection.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)",
+                ("model", f"{model_name}@{revision}"),
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+
+    @staticmethod
+    def _chunks(items, size=_SQLITE_MAX_VARIABLES):
+        for i in range(0, len(items), size):
+            yield items[i : i + size]
+
+    def _get_dim(self, connection):
+        if self._dim is None:
+            row = connection.execute(
+                "SELECT value FROM meta WHERE key = 'dim'"
+            ).fetchone()
+            self._dim = int(row[0]) if row else None
+        return self._dim
+
+    def _map(self, rows):
+        """Memory-map at least ``rows`` slots, growing the vector file if needed."""
+        if self._vectors is not None and self._vectors.shape[0] >= rows:
+            return self._vectors
+
+        row_size = self._dim * np.dtype(np.float32).itemsize
+        file_rows = 0
+        if os.path.exists(self.vectors_path):
+            file_rows = os.path.getsize(self.vectors_path) // row_size
+        if file_rows < rows:
+            # Grow geometrically to keep remaps rare
+            file_rows = min(max(rows, file_rows * 2, 1024), self.max_entries)
+            file_rows = max(file_rows, rows)
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(file_rows * row_size)
+
+        self._vectors = np.memmap(
+            self.vectors_path, dtype=np.float32, mode="r+", shape=(file_rows, self._dim)
+        )
+        return self._vectors
+
+    def get_many(self, chunk_hashes):
+        """
+        Look up cached vectors.
+
+        :param list chunk_hashes: Chunk content hashes
+        :return dict: Mapping of found hashes to vectors
+        """
+        if not chunk_hashes:
+            return {}
+
+        with self._lock, self._connect() as connection:
+            # Slots are reused on eviction: keep writers out until the vectors are copied
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                found = self._get_many(connection, chunk_hashes)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        return found
+
+    def _get_many(self, connection, chunk_hashes):
+        if self._get_dim(connection) is None:
+            return {}
+
+        slots = {}
+        unique_hashes = list(set(chunk_hashes))
+        for chunk in self._chunks(unique_hashes):
+            placeholders = ",".join("?" * len(chunk))
+            rows = connection.execute(
+                f"SELECT chunk_hash, slot FROM entries WHERE chunk_hash IN ({placeholders})",
+                chunk,
+            ).fetchall()
+            slots.update(rows)
+        if not slots:
+            return {}
+
+        vectors = self._map(max(slots.values()) + 1)
+        found = {
+            chunk_hash: np.array(vectors[slot]) for chunk_hash, slot in slots.items()
+        }
+
+        now = time.time()
+        for chunk in self._chunks(list(slots)):
+            placeholders = ",".join("?" * len(chunk))
+            connection.execute(
+                f"UPDATE entries SET last_used = ? WHERE chunk_hash IN ({placeholders})",
+                [now, *chunk],
+            )
+        return found
+
+    def put_many(self, items):
+        """
+        Store vectors, evicting the least recently used entries when full.
+
+        :param dict items: Mapping of chunk content hashes to vectors
+        """
+        if not items:
+            return
+
+        with self._lock, self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._put_many(connection, items)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+
+    def _put_many(self, connection, items):
+        dim = len(next(iter(items.values())))
+        if self._get_dim(connection) is None:
+            connection.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('dim', ?)", (dim,)
+            )
+            self._dim = None
+            self._get_dim(connection)
+        if dim != self._dim:
+            raise ValueError(
+                f"Vector dimension {dim} does not match cached dimension {self._dim}"
+            )
+
+        known = set()
+        hashes = list(items)
+        for chunk in self._chunks(hashes):
+            placeholders = ",".join("?" * len(chunk))
+            rows = connection.execute(
+                f"SELECT chunk_hash FROM entries WHERE chunk_hash IN ({placeholders})",
+                chunk,
+            ).fetchall()
+            known.update(row[0] for row in rows)
+        new_hashes = [chunk_hash for chunk_hash in hashes if chunk_hash not in known]
+        new_hashes = new_hashes[: self.max_entries]
+        if not new_hashes:
+            return
+
+        count, max_slot = connection.execute(
+            "SELECT COUNT(*), COALESCE(MAX(slot), -1) FROM entries"
+        ).fetchone()
+        free = max(0, self.max_entries - count)
+        slots = list(range(max_slot + 1, max_slot + 1 + min(free, len(new_hashes))))
+
+        evict = len(new_hashes) - len(slots)
+        if evict:
+            victims = connection.execute(
+                "SELECT chunk_hash, slot FROM entries ORDER BY last_used LIMIT ?",
+                (evict,),
+            ).fetchall()
+            for chunk in self._chunks([victim[0] for victim in victims]):
+                placeholders = ",".join("?" * len(chunk))
+                connection.execute(
+                    f"DELETE FROM entries WHERE chunk_hash IN ({placeholders})", chunk
+                )
+            slots.extend(victim[1] for victim in victims)
+            logger.debug(f"Evicted {len(victims)} cached embeddings")
+
+        vectors = self._map(max(slots) + 1)
+        for chunk_hash, slot in zip(new_hashes, slots):
+            vectors[slot] = np.asarray(items[chunk_hash], dtype=np.float32)
+        # Vectors must be on disk before the index points at them
+        vectors.flush()
+
+        now = time.time()
+        connection.executemany(
+            "INSERT INTO entries (chunk_hash, slot, last_used) VALUES (?, ?, ?)",
+            [(chunk_hash, slot, now) for chunk_hash, slot in zip(new_hashes, slots)],
+        )
+
+    def __len__(self):
+        with self._connect() as connection:
+            return connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(encoder):
+    """
+    Get the persistent embedding cache for an encoder from the encoder registry.
+
+    :param SentenceTransformer encoder: Encoder instance
+    :return EmbeddingCache | None: The cache, or None if caching is disabled or the
+        encoder's model is unknown
+    """
+    config = get_embedding_cache_config()
+    if not config["enabled"]:
+        return None
+
+    encoder_config = EncoderFactory.describe(encoder)
+    if not encoder_config:
+        return None
+
+    model_name = encoder_config["model_name"]
+    requested = encoder_config.get("revision")
+    backend = encoder_config.get("backend", "torch")
+    key = (model_name, requested, backend)
+    with _caches_lock:
+        if key not in _caches:
+            cache_dir = encoder_config.get("kwargs", {}).get("cache_folder")
+            revision = resolve_revision(model_name, requested, cache_dir)
+            if backend != "torch":
+                # Backends produce slightly different vectors, keep them apart
+                revision = f"{revision}+{backend}"
+            _caches[key] = EmbeddingCache(model_name, revision)
+        return _caches[key]
@@ -0,0 +1,38 @@
+import os
+
+from app.config.config import data_path
+
+EMBEDDING_CACHE_CONFIG = {
+    "enabled": os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true",
+    "path": os.getenv("EMBEDDING_CACHE_PATH", data_path("embeddings", "cache")),
+    # Maximum number of cached vectors per model before LRU eviction
+    "max_entries": int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 500_000)),
+}
+
+EMBEDDING_BATCH_CONFIG = {
+    # Batch texts of similar token length under a token budget instead of in order
+    "length_bucketing": os.getenv("EMBEDDING_LENGTH_BUCKETING", "true").lower()
+    == "true",
+    # Padded tokens per encoder batch (texts in the batch * longest text)
+    "max_tokens": int(os.getenv("EMBEDDING_MAX_BATCH_TOKENS", 16384)),
+    # Larger batches of short texts span a wider range of lengths, adding padding
+    "max_batch_size": int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", 64)),
+    # Texts bucketed together; also the granularity of progress reporting
+    "window": int(os.getenv("EMBEDDING_BUCKET_WINDOW", 1024)),
+}
+
+
+def get_embedding_cache_config():
+    """
+    Get configuration for the persistent embedding cache.
+    :return: dict: Configuration settings for the embedding cache
+    """
+    return dict(EMBEDDING_CACHE_CONFIG)
+
+
+def get_embedding_batch_config():
+    """
+    Get configuration for batching texts to encode.
+    :return: dict: Configuration settings for embedding batches
+    """
+    return dict(EMBEDDING_BATCH_CONFIG)
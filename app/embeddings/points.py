@@ -1,25 +1,224 @@
+import hashlib
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+from loguru import logger
 from tqdm import tqdm
-from app.encoders.encoder import get_code_encoder, get_text_encoder
+from app.embeddings.batching import (
+    fixed_batches,
+    length_bucketed_batches,
+    token_lengths,
+)
+from app.embeddings.cache import get_embedding_cache
+from app.embeddings.config import get_embedding_batch_config
+from app.encoders.encoder import EncoderFactory, get_code_encoder, get_text_encoder
+from app.encoders.pool import get_encoding_pool
+from app.qdrant.config import Config
+from app.telemetry import record_cache_lookups, span
+
+POINT_ID_NAMESPACE = uuid.UUID("6f1c4a52-6a43-4d43-9a47-2f6c1f3de6b1")
+
+
+def content_hash(content):
+    """
+    Hash chunk content.
+
+    :param str content: Chunk content
+    :return str: Hex digest of the content
+    """
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def make_point_id(repo, path, content):
+    """
+    Build a deterministic point ID from a chunk's repository, path and content.
+
+    :param str repo: Repository identifier
+    :param str path: File path within the repository
+    :param str content: Chunk content
+    :return str: UUID string usable as a Qdrant point ID
+    """
+    return str(
+        uuid.uuid5(POINT_ID_NAMESPACE, f"{repo}\0{path}\0{content_hash(content)}")
+    )
 
 
 class PointsCreator:
     """Class for creating vector database points from documents."""
 
-    def __init__(self, models, code_encoder=None, text_encoder=None):
+    def __init__(
+        self,
+        models,
+        code_encoder=None,
+        text_encoder=None,
+        use_embedding_cache=True,
+        sparse_encoder=None,
+        encoding_pool=None,
+        batch_config=None,
+    ):
 
         """
         Initialize the points creator.
         :param models: Module containing the PointStruct class
         :param code_encoder: Optional pre-initialized code encoder
         :param text_encoder: Optional pre-initialized text encoder
+        :param bool use_embedding_cache: Whether to reuse vectors from the persistent embedding cache
+        :param SparseEncoder sparse_encoder: Adds a named BM25 sparse vector to each point if given
+        :param EncodingPool encoding_pool: Worker processes encoding large batches
+            (defaults to the shared pool, if ENCODER_POOL_PROCESSES is set)
+        :param dict batch_config: Encoder batching settings (defaults to EMBEDDING_BATCH_CONFIG)
         """
 
         self.models = models
         self.code_encoder = code_encoder or get_code_encoder()
         self.text_encoder = text_encoder or get_text_encoder()
+        self.use_embedding_cache = use_embedding_cache
+        self.cache_stats = {"hits": 0, "misses": 0}
+        self.sparse_encoder = sparse_encoder
+        self.sparse_vector_name = Config.get("hybrid.sparse_vector_name")
+        self.encoding_pool = encoding_pool or get_encoding_pool()
+        self.batch_config = batch_config or get_embedding_batch_config()
+
+    def _batches(self, encoder, texts, batch_size):
+        """
+        Group texts into encoder batches: by token length under the token budget
+        when length bucketing is enabled, otherwise in order by ``batch_size``.
+
+        :return list: Batches as lists of text indices
+        """
+        if not self.batch_config["length_bucketing"]:
+            return fixed_batches(len(texts), batch_size)
+        return length_bucketed_batches(
+            token_lengths(encoder, texts),
+            self.batch_config["max_tokens"],
+            self.batch_config["max_batch_size"],
+        )
+
+    def _run_encoder(self, encoder, texts, batch_size=32):
+        """
+        Encode texts batch by batch, in the encoding pool when there is one and
+        there are enough texts, otherwise in this process. Encoders not created by
+        the EncoderFactory cannot be loaded by the pool's workers and always run
+        here.
+
+        :param SentenceTransformer encoder: The encoder to use
+        :param list texts: Texts to encode
+        :param int batch_size: Batch size when length bucketing is disabled
+        :return list: One vector per text, in input order
+        """
+        batches = self._batches(encoder, texts, batch_size)
+        batch_texts = [[texts[i] for i in batch] for batch in batches]
+
+        pool = self.encoding_pool
+        config = None
+        if pool is not None and len(texts) >= pool.min_batch:
+            config = EncoderFactory.describe(encoder)
+        encoded = None
+        if config is not None:
+            try:
+                encoded = pool.encode_batches(config, batch_texts)
+            except BrokenProcessPool:
+                # The next PointsCreator gets a restarted pool
+                logger.warning("Encoding pool worker died, encoding in-process")
+                self.encoding_pool = None
+        if encoded is None:
+            # Each batch is encoded as a whole, padded to its own longest text
+            encoded = [
+                encoder.encode(group, batch_size=len(group)) for group in batch_texts
+            ]
+
+        vectors = [None] * len(texts)
+        for batch, batch_vectors in zip(batches, encoded):
+            for i, vector in zip(batch, batch_vectors):
+                vectors[i] = vector
+        return vectors
+
+    def _encode(self, encoder, texts, batch_size=32):
+        """
+        Encode each distinct text once, reusing vectors from the persistent
+        embedding cache when it is enabled.
+
+        :param SentenceTransformer encoder: The encoder to use
+        :param list texts: Texts to encode
+        :param int batch_size: Batch size when length bucketing is disabled
+        :return list: One vector per text
+        """
+        hashes = [content_hash(text) for text in texts]
+        # Identical texts, e.g. copies of a file at several paths, are encoded once
+        first_index = {}
+        for i, chunk_hash in enumerate(hashes):
+            first_index.setdefault(chunk_hash, i)
+
+        cache = get_embedding_cache(encoder) if self.use_embedding_cache else None
+        vectors = cache.get_many(list(first_index)) if cache is not None else {}
+        missing = [
+            i for chunk_hash, i in first_index.items() if chunk_hash not in vectors
+        ]
+        if cache is not None:
+            # Duplicates within the batch are not cache lookups
+            hits = len(first_index) - len(missing)
+            self.cache_stats["hits"] += hits
+            self.cache_stats["misses"] += len(missing)
+            record_cache_lookups("embedding", hits, len(missing))
+        if missing:
+            with span("encode", items=len(missing)):
+                encoded = self._run_encoder(
+                    encoder, [texts[i] for i in missing], batch_size
+                )
+            new_vectors = {hashes[i]: vector for i, vector in zip(missing, encoded)}
+            if cache is not None:
+                cache.put_many(new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors[chunk_hash] for chunk_hash in hashes]
+
+    def _vectors(self, encoder, texts, batch_size=32):
+        """
+        Build the point vectors of texts: the dense embedding, plus the sparse
+        vector under its name when a sparse encoder is set.
+
+        :param SentenceTransformer encoder: The dense encoder
+        :param list texts: Texts to encode
+        :param int batch_size: Batch size when length bucketing is disabled
+        :return list: One vector (or named vectors dict) per text
+        """
+        dense = self._encode(encoder, texts, batch_size)
+        if self.sparse_encoder is None:
+            return dense
+
+        sparse = self.sparse_encoder.encode(texts)
+        return [
+            {
+                "": vector,
+                self.sparse_vector_name: self.models.SparseVector(
+                    indices=indices, values=values
+                ),
+            }
+            for vector, (indices, values) in zip(dense, sparse)
+        ]
+
+    @staticmethod
+    def point_id(doc, default):
+        """
+        Get the ID for a document's point. Documents carrying repository and path
+        metadata get a content-derived ID, others use the given default.
+
+        :param Document doc: Document to identify
+        :param int default: ID used when the document has no repository metadata
+        :return: Point ID
+        """
+        repo = doc.metadata.get("repo")
+        path = doc.metadata.get("path")
+        if repo is None or path is None:
+            return default
+        return make_point_id(repo, path, doc.page_content)
 
     def create_code_points(
-        self, documents, start_id=0, batch_size=32, show_progress=True
+        self,
+        documents,
+        start_id=0,
+        batch_size=32,
+        show_progress=True,
+        progress_callback=None,
     ):
 
         """
@@ -27,94 +226,91 @@ class PointsCreator:
 
         :param list documents: List of documents to encode
         :param int start_id: Starting ID for the points
-        :param int batch_size: Batch size for encoding
+        :param int batch_size: Batch size for encoding when length bucketing is disabled
         :param bool show_progress: Whether to show a progress bar. Default is True.
+        :param callable progress_callback: Called with the number of documents encoded per batch
         :return list: List of point structures ready for database insertion
         """
 
         return self._create_points(
-            documents, self.code_encoder, "code", start_id, batch_size, show_progress
+            documents,
+            self.code_encoder,
+            "code",
+            start_id,
+            batch_size,
+            show_progress,
+            progress_callback,
         )
 
     def create_text_points(
-        self, documents, start_id=0, batch_size=32, show_progress=True
+        self,
+        documents,
+        start_id=0,
+        batch_size=32,
+        show_progress=True,
+        progress_callback=None,
     ):
         """
         Create points for text documents.
 
         :param list documents: List of documents to encode
         :param int start_id: Starting ID for the points
-        :param int batch_size: Batch size for encoding
+        :param int batch_size: Batch size for encoding when length bucketing is disabled
         :param bool show_progress: Whether to show a progress bar. Default is True.
+        :param callable progress_callback: Called with the number of documents encoded per batch
         :return list: List of point structures ready for database insertion
         """
 
         return self._create_points(
-            documents, self.text_encoder, "text", start_id, batch_size, show_progress
+            documents,
+            self.text_encoder,
+            "text",
+            start_id,
+            batch_size,
+            show_progress,
+            progress_callback,
         )
 
     def _create_points(
-        self, documents, encoder, doc_type, start_id, batch_size, show_progress
+        self,
+        documents,
+        encoder,
+        doc_type,
+        start_id,
+        batch_size,
+        show_progress,
+        progress_callback=None,
     ):
         """
         Create points for documents.
         :param list documents: List of documents to encode
         :param SentenceTransformer encoder: The encoder to use
         :param str doc_type: Document type identifier
-        :param int start_id: Starting ID for the points
-        :param int batch_size: Batch size for encoding
+        :param int start_id: Starting ID for points of documents without repository metadata
+        :param int batch_size: Batch size for encoding when length bucketing is disabled
         :param bool show_progress: Whether to show a progress bar. Default is True.
+        :param callable progress_callback: Called with the number of documents encoded per batch
         :return list: List of points structures ready for database insertion
         """
 
+        # With length bucketing, texts are regrouped by length within each window
+        step = (
+            self.batch_config["window"]
+            if self.batch_config["length_bucketing"]
+            else batch_size
+        )
+        progress_bar = tqdm(total=len(documents)) if show_progress else None
+
         points = []
-        iterator = enumerate(documents)
-
-        if show_progress:
-            total = len(documents) if hasattr(documents, "__len__") else None
-            iterator = tqdm(iterator, total=total)
-
-        # Process documents in batches
-        current_batch = []
-        current_indices = []
-
-        for idx, doc in iterator:
-            current_batch.append(doc.page_content)
-            current_indices.append(idx)
-
-            # Process batch when it reaches the desired size
-            if len(current_batch) >= batch_size:
-                batch_vectors = encoder.encode(current_batch)
-
-                for i, vector in enumerate(batch_vectors):
-                    doc_idx = current_indices[i]
-                    doc = documents[doc_idx]
-
-                    point = self.models.PointStruct(
-                        id=start_id + doc_idx,
-                        vector=vector,
-                        payload={
-                            "metadata": doc.metadata,
-                            "type": doc_type,
-                            "page_content": doc.page_content,
-                        },
-                    )
-                    points.append(point)
-
-                # Reset batch
-                current_batch = []
-                current_indices = []
-
-        # Process any remaining documents
-        if current_batch:
-            batch_vectors = encoder.encode(current_batch)
-
-            for i, vector in enumerate(batch_vectors):
-                doc_idx = current_indices[i]
-                doc = documents[doc_idx]
+        for begin in range(0, len(documents), step):
+            window = documents[begin : begin + step]
+            vectors = self._vectors(
+                encoder, [doc.page_content for doc in window], batch_size
+            )
 
+            for offset, (doc, vector) in enumerate(zip(window, vectors)):
                 point = self.models.PointStruct(
-                    id=start_id + doc_idx,
+                    id=self.point_id(doc, start_id + begin + offset),
                     vector=vector,
                     payload={
                         "metadata": doc.metadata,
@@ -124,4 +320,11 @@ class PointsCreator:
                 )
                 points.append(point)
 
+            if progress_bar is not None:
+                progress_bar.update(len(window))
+            if progress_callback:
+                progress_callback(len(window))
+
+        if progress_bar is not None:
+            progress_bar.close()
         return points
@@ -3,9 +3,19 @@ from .encoder import (
     get_code_encoder,
     get_text_encoder,
 )
+from .embeddings import EncoderEmbeddings
+from .pool import EncodingPool, get_encoding_pool, shutdown_encoding_pool
+from .registry import EncoderRegistry
+from .sparse import SparseEncoder
 
 __all__ = [
     "EncoderFactory",
+    "EncoderEmbeddings",
+    "EncoderRegistry",
+    "EncodingPool",
+    "SparseEncoder",
     "get_code_encoder",
+    "get_encoding_pool",
     "get_text_encoder",
+    "shutdown_encoding_pool",
 ]
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import torch
+from huggingface_hub import snapshot_download
+from loguru import logger
+from sentence_transformers import SentenceTransformer
+
+from app.encoders.config import ENCODER_BACKEND_CONFIG
+
+ENCODER_BACKENDS = ("torch", "onnx", "int8")
+
+# Probe texts used to compare a backend's embeddings with the torch model's
+PROBE_TEXTS = [
+    "How do I install and run this project?",
+    "Configuration is loaded from environment variables at startup.",
+    "def add(a, b):\n    return a + b",
+    "class Cache:\n    def get(self, key):\n        return self._items.get(key)",
+    "for path in paths:\n    with open(path) as f:\n        yield f.read()",
+    "# Usage\n\nRun `docker build -t app .` and start the container.",
+]
+
+
+def resolve_revision(model_name, revision=None, cache_dir=None):
+    """
+    Get the commit of the model snapshot SentenceTransformer loads.
+
+    :param str model_name: Name of the model on the Hub, or a local directory
+    :param str revision: Requested branch, tag or commit (None for the default branch)
+    :param str cache_dir: Hub cache directory (defaults to the Hugging Face cache)
+    :return str: Commit hash of the cached snapshot, or the requested revision
+        ('local' if none) for local models and snapshots not downloaded yet
+    """
+    if os.path.isdir(model_name):
+        return revision or "local"
+
+    # Names without an organization are sentence-transformers models
+    candidates = [model_name]
+    if "/" not in model_name:
+        candidates.append(f"sentence-transformers/{model_name}")
+    for repo_id in candidates:
+        try:
+            path = snapshot_download(
+                repo_id, revision=revision, cache_dir=cache_dir, local_files_only=True
+            )
+        except (OSError, ValueError):
+            continue
+        return os.path.basename(os.path.normpath(path))
+    return revision or "main"
+
+
+def _backend_dir(model_name, backend, kwargs):
+    """
+    Directory of a backend's export and validation results, keyed by the model,
+    the commit it is loaded from and its loader arguments.
+    """
+    kwargs = dict(kwargs)
+    revision = resolve_revision(
+        model_name, kwargs.pop("revision", None), kwargs.get("cache_folder")
+    )
+    key = json.dumps(
+        {"model_name": model_name, "revision": revision, "kwargs": kwargs},
+        sort_keys=True,
+        default=repr,
+    )
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return os.path.join(ENCODER_BACKEND_CONFIG["cache_dir"], backend, digest)
+
+
+def _load_onnx(model_name, directory, kwargs):
+    if os.path.exists(os.path.join(directory, "modules.json")):
+        return SentenceTransformer(directory, backend="onnx", **kwargs)
+
+    logger.info(f"Exporting {model_name} to ONNX in {directory}")
+    model = SentenceTransformer(model_name, backend="onnx", **kwargs)
+    model.save_pretrained(directory)
+    return model
+
+
+def _load_int8(model_name, kwargs):
+    model = SentenceTransformer(model_name, **{**kwargs, "device": "cpu"})
+    return torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def _min_cosine(model, reference):
+    vectors = model.encode(PROBE_TEXTS, normalize_embeddings=True)
+    reference_vectors = reference.encode(PROBE_TEXTS, normalize_embeddings=True)
+    return float(np.min(np.sum(vectors * reference_vectors, axis=1)))
+
+
+def _validate(model_name, backend, model, kwargs, directory):
+    """
+    Check that a backend's embeddings stay within the cosine tolerance of the
+    torch model's. The result is stored next to the export, per tolerance, so
+    the reference model is only compared once.
+
+    :return SentenceTransformer | None: The reference model if the check failed
+    """
+    min_cosine = ENCODER_BACKEND_CONFIG["min_cosine"]
+    path = os.path.join(directory, f"validation-{min_cosine!r}.json")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            validation = json.load(f)
+        reference = None
+    else:
+        reference = SentenceTransformer(model_name, **kwargs)
+        validation = {
+            "model_name": model_name,
+            "backend": backend,
+            "threshold": min_cosine,
+            "min_cosine": _min_cosine(model, reference),
+        }
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(validation, f)
+        if validation["min_cosine"] >= min_cosine:
+            logger.info(
+                f"{backend} backend of {model_name} validated "
+                f"(min cosine {validation['min_cosine']:.6f})"
+            )
+
+    if validation["min_cosine"] >= min_cosine:
+        return None
+    logger.warning(
+        f"{backend} embeddings of {model_name} deviate from torch "
+        f"(min cosine {validation['min_cosine']:.6f} < {min_cosine}), using torch"
+    )
+    return reference or SentenceTransformer(model_name, **kwargs)
+
+
+def load_encoder(model_name, backend="torch", **kwargs):
+    """
+    Load a SentenceTransformer with the given inference backend.
+
+    :param str model_name: Name of the model
+    :param str backend: 'torch', 'onnx' (ONNX Runtime, exported once and cached on
+        disk) or 'int8' (dynamically quantized torch Linear layers)
+    :param kwargs: SentenceTransformer keyword arguments
+    :return SentenceTransformer: The encoder, or the torch model if the backend's
+        embeddings are outside the cosine tolerance
+    :raises ValueError: If the backend is not supported
+    """
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unsupported encoder backend: {backend}")
+    if backend == "torch":
+        return SentenceTransformer(model_name, **kwargs)
+
+    directory = _backend_dir(model_name, backend, kwargs)
+    if backend == "onnx":
+        model = _load_onnx(model_name, directory, kwargs)
+    else:
+        model = _load_int8(model_name, kwargs)
+
+    reference = _validate(model_name, backend, model, kwargs, directory)
+    return reference if reference is not None else model
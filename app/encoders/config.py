@@ -1,18 +1,59 @@
+import os
+
+from app.config.config import data_path
+
 DEFAULT_ENCODER_CONFIG = {
     "code": {
         "model_name": "microsoft/codebert-base",
         "trust_remote_code": True,
         "device": "cpu",
+        # 'torch', 'onnx' or 'int8' (dynamically quantized torch)
+        "backend": os.getenv("CODE_ENCODER_BACKEND", "torch"),
+        # Branch, tag or commit of the model on the Hub (None for the default branch)
+        "revision": os.getenv("CODE_ENCODER_REVISION") or None,
         "kwargs": {},
     },
     "text": {
         "model_name": "all-MiniLM-L6-v2",
         "trust_remote_code": False,
         "device": "cpu",
+        "backend": os.getenv("TEXT_ENCODER_BACKEND", "torch"),
+        "revision": os.getenv("TEXT_ENCODER_REVISION") or None,
         "kwargs": {},
     },
 }
 
+ENCODER_REGISTRY_CONFIG = {
+    # Upper bound on the memory held by loaded encoder weights
+    "memory_budget_mb": int(os.getenv("ENCODER_MEMORY_BUDGET_MB", 4096)),
+}
+
+ENCODER_BACKEND_CONFIG = {
+    # Exported models and their validation results
+    "cache_dir": os.getenv("ENCODER_BACKEND_CACHE", data_path("encoders", "backends")),
+    # Minimum cosine similarity between backend and torch embeddings of the probe texts
+    "min_cosine": float(os.getenv("ENCODER_BACKEND_MIN_COSINE", 0.98)),
+}
+
+ENCODER_POOL_CONFIG = {
+    # Worker processes encoding ingestion batches (0 encodes in the calling process)
+    "processes": int(os.getenv("ENCODER_POOL_PROCESSES", 0)),
+    # Torch threads of each worker; processes * threads should not exceed the cores
+    "threads_per_process": int(os.getenv("ENCODER_POOL_THREADS", 1)),
+    # Smaller batches are encoded in the calling process
+    "min_batch": int(os.getenv("ENCODER_POOL_MIN_BATCH", 64)),
+    # Texts sent to a worker at a time, at least
+    "min_texts_per_task": 8,
+}
+
+SPARSE_ENCODER_CONFIG = {
+    # BM25 term frequency saturation and length normalization; IDF is applied by Qdrant
+    "k1": 1.2,
+    "b": 0.75,
+    # Assumed average chunk length in tokens
+    "avg_length": 256,
+}
+
 
 def get_encoder_config(encoder_type):
 
@@ -25,3 +66,15 @@ def get_encoder_config(encoder_type):
     if encoder_type in DEFAULT_ENCODER_CONFIG:
         return DEFAULT_ENCODER_CONFIG[encoder_type]
     raise ValueError(f"Unsupported encoder type: {encoder_type}")
+
+
+def get_encoder_type_for_model(model_name):
+    """
+    Find the encoder type configured with the given model name.
+    :param str model_name: Name of the model
+    :return: str | None: Encoder type or None if no type uses this model
+    """
+    for encoder_type, config in DEFAULT_ENCODER_CONFIG.items():
+        if config["model_name"] == model_name:
+            return encoder_type
+    return None
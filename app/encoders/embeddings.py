@@ -0,0 +1,41 @@
+from langchain_core.embeddings import Embeddings
+
+from app.encoders.encoder import EncoderFactory
+
+
+class EncoderEmbeddings(Embeddings):
+    """LangChain embeddings backed by the shared encoder registry."""
+
+    def __init__(self, model_name, encode_kwargs=None):
+        """
+        Initialize the embeddings.
+
+        :param str model_name: Name of the embeddings model
+        :param dict encode_kwargs: Additional keyword arguments for encode
+        """
+        self.model_name = model_name
+        self.encode_kwargs = encode_kwargs or {}
+
+    @property
+    def encoder(self):
+        """Resolve the encoder through the registry so evicted models can be freed."""
+        return EncoderFactory.get_encoder_by_model_name(self.model_name)
+
+    def embed_documents(self, texts):
+        """
+        Embed a list of documents.
+
+        :param list texts: Texts to embed
+        :return list: List of embeddings
+        """
+        vectors = self.encoder.encode(list(texts), **self.encode_kwargs)
+        return vectors.tolist()
+
+    def embed_query(self, text):
+        """
+        Embed a query.
+
+        :param str text: Query text
+        :return list: Embedding
+        """
+        return self.embed_documents([text])[0]
@@ -1,11 +1,34 @@
-from sentence_transformers import SentenceTransformer
-from app.encoders.config import get_encoder_config
+import copy
+
+from app.encoders.backends import load_encoder
+from app.encoders.config import get_encoder_config, get_encoder_type_for_model
+from app.encoders.registry import EncoderRegistry, make_cache_key
+
+
+def load_from_config(config):
+    """
+    Load an encoder from its full configuration.
+
+    :param dict config: Encoder configuration (model_name, backend, kwargs, ...)
+    :return: SentenceTransformer: The encoder model
+    """
+    params = copy.deepcopy(config)
+
+    # Extract parameters
+    model_name = params.pop("model_name")
+    backend = params.pop("backend", "torch")
+    kwargs = params.pop("kwargs", {})
+
+    # Merge remaining config items into kwargs
+    kwargs.update(params)
+
+    return load_encoder(model_name, backend, **kwargs)
 
 
 class EncoderFactory:
     """Factory class for creating and managing text and code encoders."""
 
-    _encoders = {}  # Class-level cache for encoders
+    _registry = EncoderRegistry()  # Shared by ingestion and query paths
 
     @classmethod
     def get_encoder(cls, encoder_type, custom_config=None):
@@ -18,40 +41,53 @@ class EncoderFactory:
         :raises: ValueError: If the encoder_type is not supported
         """
 
-        # Create a config key that includes any custom settings
-        config_key = encoder_type
+        # Get config and override with custom settings if provided
+        config = copy.deepcopy(get_encoder_config(encoder_type))
         if custom_config:
-            config_key = f"{encoder_type}_{hash(frozenset(custom_config.items()))}"
+            config.update(copy.deepcopy(custom_config))
 
-        # Return cached encoder if available
-        if config_key in cls._encoders:
-            return cls._encoders[config_key]
+        # Create a config key that includes any custom settings
+        config_key = make_cache_key(encoder_type, config)
 
-        # Get config and override with custom settings if provided
-        config = get_encoder_config(encoder_type).copy()
-        if custom_config:
-            config.update(custom_config)
+        return cls._registry.get_or_load(
+            config_key, lambda: load_from_config(config), config=config
+        )
 
-        # Extract parameters
-        model_name = config.pop("model_name")
-        kwargs = config.pop("kwargs", {})
+    @classmethod
+    def get_encoder_by_model_name(cls, model_name):
+        """
+        Get an encoder by model name, sharing the instance with the encoder type
+        configured for that model.
+
+        :param str model_name: Name of the model
+        :return: SentenceTransformer: The encoder model
+        """
+        encoder_type = get_encoder_type_for_model(model_name)
+        if encoder_type:
+            return cls.get_encoder(encoder_type)
+        return cls.get_encoder("text", {"model_name": model_name})
 
-        # Merge remaining config items into kwargs
-        kwargs.update(config)
+    @classmethod
+    def describe(cls, encoder):
+        """
+        Get the configuration an encoder was created with.
 
-        # Create the encoder
-        encoder = SentenceTransformer(model_name, **kwargs)
+        :param SentenceTransformer encoder: Encoder instance
+        :return dict | None: Encoder configuration or None if unknown
+        """
+        return cls._registry.describe(encoder)
 
-        # Cache and return
-        cls._encoders[config_key] = encoder
-        return encoder
+    @classmethod
+    def get_registry(cls):
+        """Get the shared encoder registry."""
+        return cls._registry
 
     @classmethod
     def clear_cache(cls):
 
         """Clear the encoder cache to free memory."""
 
-        cls._encoders = {}
+        cls._registry.clear()
 
 
 def get_code_encoder(custom_config=None):
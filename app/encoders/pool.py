@@ -0,0 +1,149 @@
+import atexit
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from loguru import logger
+
+from app.encoders.config import ENCODER_POOL_CONFIG
+from app.encoders.registry import make_cache_key
+
+# Encoders loaded by a worker process, by cache key
+_worker_encoders = {}
+
+
+def _init_worker(threads):
+    import torch
+
+    torch.set_num_threads(threads)
+
+
+def _encode_in_worker(key, config, texts, batch_size):
+    from app.encoders.encoder import load_from_config
+
+    encoder = _worker_encoders.get(key)
+    if encoder is None:
+        encoder = _worker_encoders[key] = load_from_config(config)
+    return encoder.encode(texts, batch_size=batch_size)
+
+
+class EncodingPool:
+    """
+    Persistent worker processes encoding texts in parallel. Each worker loads
+    its own copy of an encoder on first use, from the configuration the encoder
+    was created with, and keeps it for later batches. A batch is split evenly
+    across the workers and the embeddings are returned in input order.
+    """
+
+    def __init__(
+        self, processes, threads_per_process=1, min_batch=0, min_texts_per_task=8
+    ):
+        """
+        :param int processes: Worker processes
+        :param int threads_per_process: Torch threads of each worker
+        :param int min_batch: Batches smaller than this are not worth sending to the pool
+        :param int min_texts_per_task: Minimum texts sent to a worker at a time
+        """
+        self.processes = processes
+        self.threads_per_process = threads_per_process
+        self.min_batch = min_batch
+        self.min_texts_per_task = min_texts_per_task
+        self.broken = False
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(threads_per_process,),
+        )
+        logger.info(
+            f"Started encoding pool of {processes} processes "
+            f"with {threads_per_process} threads each"
+        )
+
+    def encode(self, config, texts, batch_size=32):
+        """
+        Encode texts in the worker processes, split evenly across them.
+
+        :param dict config: Encoder configuration, as returned by EncoderFactory.describe
+        :param list texts: Texts to encode
+        :param int batch_size: Encoding batch size within a worker
+        :return np.ndarray: One embedding per text
+        :raises BrokenProcessPool: If a worker died, e.g. running out of memory
+        """
+        per_task = max(self.min_texts_per_task, math.ceil(len(texts) / self.processes))
+        batches = [texts[i : i + per_task] for i in range(0, len(texts), per_task)]
+        return np.concatenate(self.encode_batches(config, batches, batch_size))
+
+    def encode_batches(self, config, batches, batch_size=None):
+        """
+        Encode prepared batches of texts, one worker task per batch.
+
+        :param dict config: Encoder configuration, as returned by EncoderFactory.describe
+        :param list batches: Lists of texts
+        :param int batch_size: Encoding batch size within a worker (defaults to
+            the whole batch)
+        :return list: Embeddings array per batch
+        :raises BrokenProcessPool: If a worker died, e.g. running out of memory
+        """
+        key = make_cache_key("pool", config)
+        try:
+            futures = [
+                self._executor.submit(
+                    _encode_in_worker, key, config, batch, batch_size or len(batch)
+                )
+                for batch in batches
+            ]
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            self.broken = True
+            raise
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        self._executor.shutdown(cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_encoding_pool(config=None):
+    """
+    Get the process-wide encoding pool, shared by all ingestion jobs. The pool is
+    started on first use and restarted if a worker died.
+
+    :param dict config: Pool configuration (defaults to ENCODER_POOL_CONFIG)
+    :return EncodingPool | None: The pool, or None if disabled or in a daemon
+        process (e.g. a local shard worker), which cannot start processes
+    """
+    global _pool
+    config = config or ENCODER_POOL_CONFIG
+    if config["processes"] <= 0 or multiprocessing.current_process().daemon:
+        return None
+
+    with _pool_lock:
+        if _pool is None or _pool.broken:
+            if _pool is not None:
+                _pool.shutdown()
+            _pool = EncodingPool(
+                config["processes"],
+                config["threads_per_process"],
+                config["min_batch"],
+                config["min_texts_per_task"],
+            )
+        return _pool
+
+
+def shutdown_encoding_pool():
+    """Stop the process-wide encoding pool, if started."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+atexit.register(shutdown_encoding_pool)
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import torch
+from loguru import logger
+
+from app.encoders.config import ENCODER_REGISTRY_CONFIG
+
+
+def make_cache_key(encoder_type, config):
+    """
+    Build a stable cache key from an encoder type and its (possibly nested) config.
+
+    :param str encoder_type: Type of encoder ('code' or 'text')
+    :param dict config: Full encoder configuration
+    :return str: Cache key
+    """
+    serialized = json.dumps(config, sort_keys=True, default=repr)
+    digest = hashlib.sha1(serialized.encode("utf-8")).hexdigest()
+    return f"{encoder_type}_{digest}"
+
+
+def _onnx_sessions(model):
+    """ONNX Runtime sessions of a SentenceTransformer's modules."""
+    try:
+        modules = list(model.modules())
+    except AttributeError:
+        return []
+    sessions = []
+    for module in modules:
+        auto_model = getattr(module, "auto_model", None)
+        # optimum keeps the session in 'session', older versions in 'model'
+        for name in ("session", "model"):
+            session = getattr(auto_model, name, None)
+            if getattr(session, "_model_path", None):
+                sessions.append(session)
+                break
+    return sessions
+
+
+def _onnx_size(session):
+    """Size of an ONNX model file and its external data files."""
+    path = session._model_path
+    directory = os.path.dirname(path) or "."
+    name = os.path.basename(path)
+    return sum(
+        os.path.getsize(os.path.join(directory, entry))
+        for entry in os.listdir(directory)
+        if entry.startswith(name)
+    )
+
+
+def _tensors(value):
+    """Tensors of a state dict value; packed quantized weights are tuples."""
+    if isinstance(value, (tuple, list)):
+        for item in value:
+            yield from _tensors(item)
+    elif isinstance(value, torch.Tensor):
+        yield value
+
+
+def estimate_model_size(model):
+    """
+    Estimate the memory held by a model's weights: the size of its ONNX files
+    for ONNX Runtime models, else its state dict, which includes the packed
+    weights of quantized layers.
+
+    :param model: torch module (e.g. SentenceTransformer)
+    :return int: Size in bytes, 0 if it cannot be estimated
+    """
+    sessions = _onnx_sessions(model)
+    if sessions:
+        try:
+            return sum(_onnx_size(session) for session in sessions)
+        except OSError:
+            return 0
+    try:
+        state = model.state_dict()
+    except AttributeError:
+        return 0
+    # Tied weights appear under several keys
+    tensors = {
+        tensor.data_ptr(): tensor
+        for value in state.values()
+        for tensor in _tensors(value)
+    }
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors.values())
+
+
+class EncoderRegistry:
+    """Process-wide LRU registry of loaded encoders bounded by a memory budget."""
+
+    def __init__(self, memory_budget_mb=None):
+        """
+        Initialize the registry.
+
+        :param int memory_budget_mb: Memory budget in MB (defaults to ENCODER_REGISTRY_CONFIG)
+        """
+        if memory_budget_mb is None:
+            memory_budget_mb = ENCODER_REGISTRY_CONFIG["memory_budget_mb"]
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self._entries = OrderedDict()  # key -> (encoder, size in bytes, config)
+        self._lock = threading.RLock()
+
+    def get_or_load(self, key, loader, config=None):
+        """
+        Get a cached encoder or load it, evicting least recently used encoders
+        when the memory budget is exceeded.
+
+        :param str key: Cache key
+        :param callable loader: Zero-argument callable that loads the encoder
+        :param dict config: Configuration the encoder was created with
+        :return: The encoder
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+
+            encoder = loader()
+            size = estimate_model_size(encoder)
+            self._entries[key] = (encoder, size, config or {})
+            logger.info(
+                f"Loaded encoder {key} ({size / 1024 / 1024:.1f} MB), "
+                f"registry usage {self.memory_usage / 1024 / 1024:.1f} MB"
+            )
+            self._evict(keep=key)
+            return encoder
+
+    def _evict(self, keep):
+        """Evict least recently used encoders until usage fits the budget."""
+        while self.memory_usage > self.memory_budget:
+            key = next((k for k in self._entries if k != keep), None)
+            if key is None:
+                logger.warning(
+                    f"Encoder {keep} alone exceeds the memory budget "
+                    f"of {self.memory_budget / 1024 / 1024:.0f} MB"
+                )
+                return
+            self._entries.pop(key)
+            logger.info(f"Evicted encoder {key} from registry")
+
+    def describe(self, encoder):
+        """
+        Get the configuration a cached encoder was created with.
+
+        :param encoder: Encoder instance
+        :return dict | None: Encoder configuration or None if not registered
+        """
+        with self._lock:
+            for cached, _, config in self._entries.values():
+                if cached is encoder:
+                    return config
+        return None
+
+    @property
+    def memory_usage(self):
+        """Estimated memory held by cached encoders in bytes."""
+        return sum(size for _, size, _ in self._entries.values())
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Drop all cached encoders."""
+        with self._lock:
+            self._entries = OrderedDict()
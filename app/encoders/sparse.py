@@ -0,0 +1,108 @@
+import re
+import zlib
+from collections import Counter
+
+from app.encoders.config import SPARSE_ENCODER_CONFIG
+
+_TOKEN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+# Lowercase runs, capitalized words, acronyms (kept apart from a following word) and digits
+_SUBWORD = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+STOP_WORDS = frozenset(
+    (
+        "a an and are as be by def do does for from how if import in is it not of "
+        "on or return self that the this to what when where which why with"
+    ).split()
+)
+
+
+def split_identifier(identifier):
+    """
+    Split a snake_case, camelCase or CamelCase identifier into lowercase words.
+
+    :param str identifier: Identifier, e.g. 'HTTPServerError' or 'get_user_name'
+    :return list: Words, e.g. ['http', 'server', 'error']
+    """
+    words = []
+    for part in identifier.split("_"):
+        words.extend(word.lower() for word in _SUBWORD.findall(part))
+    return words
+
+
+def tokenize_code(text):
+    """
+    Tokenize code or prose for lexical matching. Each identifier yields its
+    lowercased full form, so exact names match precisely, plus its words when it
+    is compound, so 'user name' still finds 'getUserName'.
+
+    :param str text: Text to tokenize
+    :return list: Tokens
+    """
+    tokens = []
+    for match in _TOKEN.finditer(text):
+        identifier = match.group()
+        full = identifier.lower()
+        if len(full) > 1 and full not in STOP_WORDS:
+            tokens.append(full)
+        words = split_identifier(identifier)
+        if len(words) > 1:
+            tokens.extend(
+                word for word in words if len(word) > 1 and word not in STOP_WORDS
+            )
+    return tokens
+
+
+def token_index(token):
+    """Map a token to a stable sparse vector index."""
+    return zlib.crc32(token.encode("utf-8"))
+
+
+class SparseEncoder:
+    """
+    Encodes text as BM25 sparse vectors over code-aware tokens. Documents carry
+    saturated, length-normalized term frequencies; Qdrant multiplies them by
+    the collection's IDF (sparse vectors configured with the IDF modifier).
+    """
+
+    def __init__(self, k1=None, b=None, avg_length=None):
+        """
+        :param float k1: Term frequency saturation
+        :param float b: Length normalization strength
+        :param float avg_length: Assumed average document length in tokens
+        """
+        self.k1 = SPARSE_ENCODER_CONFIG["k1"] if k1 is None else k1
+        self.b = SPARSE_ENCODER_CONFIG["b"] if b is None else b
+        self.avg_length = (
+            SPARSE_ENCODER_CONFIG["avg_length"] if avg_length is None else avg_length
+        )
+
+    def encode(self, texts):
+        """
+        Encode documents.
+
+        :param list texts: Texts to encode
+        :return list: (indices, values) per text
+        """
+        vectors = []
+        for text in texts:
+            tokens = tokenize_code(text)
+            norm = self.k1 * (1 - self.b + self.b * len(tokens) / self.avg_length)
+            weights = {}
+            for token, tf in Counter(tokens).items():
+                index = token_index(token)
+                weights[index] = weights.get(index, 0.0) + tf * (self.k1 + 1) / (
+                    tf + norm
+                )
+            vectors.append((list(weights), list(weights.values())))
+        return vectors
+
+    def encode_query(self, text):
+        """
+        Encode a query: every distinct token weighs 1, so the score is the sum of
+        the matching documents' BM25 term weights.
+
+        :param str text: Query text
+        :return tuple: (indices, values)
+        """
+        indices = sorted({token_index(token) for token in tokenize_code(text)})
+        return indices, [1.0] * len(indices)
@@ -0,0 +1,17 @@
+from app.ingestion.distributed import ShardFailed, ingest_repository_distributed
+from app.ingestion.jobs import Job, JobManager, JobQueueFull
+from app.ingestion.pipeline import ingest_repository
+from app.ingestion.progress import IngestionCancelled, IngestionProgress
+from app.ingestion.shards import ShardQueue
+
+__all__ = [
+    "Job",
+    "JobManager",
+    "JobQueueFull",
+    "IngestionCancelled",
+    "IngestionProgress",
+    "ShardFailed",
+    "ShardQueue",
+    "ingest_repository",
+    "ingest_repository_distributed",
+]
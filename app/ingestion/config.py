@@ -0,0 +1,65 @@
+import os
+
+from app.config.config import data_path
+
+INGESTION_JOB_CONFIG = {
+    # Number of ingestion jobs running at the same time
+    "max_workers": int(os.getenv("INGESTION_MAX_WORKERS", 2)),
+    # Queued and running jobs accepted before new submissions are rejected
+    "max_pending": int(os.getenv("INGESTION_MAX_PENDING", 16)),
+    # Finished jobs kept for status lookups
+    "max_finished": int(os.getenv("INGESTION_MAX_FINISHED", 100)),
+}
+
+INGESTION_PIPELINE_CONFIG = {
+    # Chunks checked, encoded and handed to the uploader at a time
+    "batch_size": int(os.getenv("INGESTION_BATCH_SIZE", 128)),
+    # Encoded batches waiting for upload before encoding blocks
+    "upload_queue_size": int(os.getenv("INGESTION_UPLOAD_QUEUE_SIZE", 4)),
+}
+
+INGESTION_SHARD_CONFIG = {
+    # Work queue shared by the coordinator and shard workers
+    "queue_path": os.getenv("SHARD_QUEUE_PATH", data_path("ingestion", "shards.db")),
+    # Files per shard; larger directories are split by path hash
+    "max_files_per_shard": int(os.getenv("SHARD_MAX_FILES", 500)),
+    # Worker processes started by the coordinator (0 to rely on external workers)
+    "local_workers": int(os.getenv("SHARD_LOCAL_WORKERS", 2)),
+    # Attempts before a shard, and with it the ingestion, is marked failed
+    "max_attempts": int(os.getenv("SHARD_MAX_ATTEMPTS", 3)),
+    # Seconds a worker may go without renewing its claim before the shard is retried
+    "lease_seconds": float(os.getenv("SHARD_LEASE_SECONDS", 120)),
+    "poll_interval": 1.0,
+}
+
+
+def get_job_config():
+    """
+    Get configuration for the ingestion job manager.
+    :return: dict: Configuration settings for ingestion jobs
+    """
+    return dict(INGESTION_JOB_CONFIG)
+
+
+def get_pipeline_config():
+    """
+    Get configuration for the streaming ingestion pipeline.
+    :return: dict: Configuration settings for the pipeline
+    """
+    return dict(INGESTION_PIPELINE_CONFIG)
+
+
+def get_shard_config():
+    """
+    Get configuration for sharded, distributed ingestion.
+    :return: dict: Configuration settings for shards and shard workers
+    """
+    return dict(INGESTION_SHARD_CONFIG)
+
+
+def get_state_path():
+    """
+    Get the path of the index state database.
+    :return: str: SQLite database path
+    """
+    return os.getenv("INDEX_STATE_PATH", data_path("ingestion", "index_state.db"))
@@ -0,0 +1,180 @@
+import multiprocessing
+import time
+import uuid
+
+from loguru import logger
+
+from app.ingestion.config import get_shard_config
+from app.ingestion.pipeline import resolve_since_commit, stale_path_deletions
+from app.ingestion.progress import IngestionProgress
+from app.ingestion.shards import ShardQueue, plan_shards
+from app.ingestion.state import IndexStateStore
+from app.ingestion.worker import run_local_worker
+from app.loaders.git_loader import checkout_repository
+from app.qdrant.tenancy import collection_for_repo, normalize_repo_id
+
+_COUNTERS = (
+    "files_loaded",
+    "files_deduplicated",
+    "chunks_total",
+    "chunks_unchanged",
+    "chunks_encoded",
+    "points_uploaded",
+    "embedding_cache_hits",
+    "embedding_cache_misses",
+)
+
+
+class ShardFailed(Exception):
+    """Raised when a shard failed on all of its attempts."""
+
+
+def _start_local_workers(count, queue_path, job_id):
+    context = multiprocessing.get_context("spawn")
+    stop_event = context.Event()
+    processes = [
+        context.Process(
+            target=run_local_worker,
+            args=(queue_path, f"{job_id[:8]}-local-{i}", stop_event),
+            name=f"shard-worker-{i}",
+            daemon=True,
+        )
+        for i in range(count)
+    ]
+    for process in processes:
+        process.start()
+    return stop_event, processes
+
+
+def _stop_local_workers(stop_event, processes, timeout=30):
+    stop_event.set()
+    for process in processes:
+        process.join(timeout)
+        if process.is_alive():
+            logger.warning(f"Terminating unresponsive {process.name}")
+            process.terminate()
+
+
+def _wait_for_shards(shard_queue, job_id, progress, poll_interval):
+    """
+    Wait until all shards of a run are done, merging their counters into progress.
+
+    :return list: Paths indexed by the shards
+    """
+    reported = set()
+    indexed_paths = []
+    while True:
+        progress.check_cancelled()
+        shards = shard_queue.poll(job_id)
+
+        for shard in shards:
+            if shard["status"] == ShardQueue.DONE and shard["id"] not in reported:
+                reported.add(shard["id"])
+                for counter in _COUNTERS:
+                    progress.add(counter, shard["stats"].get(counter, 0))
+                indexed_paths.extend(shard["indexed_paths"])
+
+        failed = [s for s in shards if s["status"] == ShardQueue.FAILED]
+        if failed:
+            raise ShardFailed(
+                f"{len(failed)} of {len(shards)} shards failed, "
+                f"first error: {failed[0]['error']}"
+            )
+        if len(reported) == len(shards):
+            return indexed_paths
+        time.sleep(poll_interval)
+
+
+def ingest_repository_distributed(
+    qdrant_client,
+    repo_url,
+    branch="main",
+    progress=None,
+    full_reindex=False,
+    state_store=None,
+    config=None,
+    repo_id=None,
+    shard_queue=None,
+):
+    """
+    Index a repository by splitting its files into shards that are indexed by a
+    pool of worker processes, possibly on other machines, through a shared work
+    queue. The coordinator checks out the repository, waits for all shards,
+    retrying failed ones, and then removes points of deleted files.
+
+    :param qdrant_client: Qdrant client instance
+    :param str repo_url: Repository URL
+    :param str branch: Branch to index
+    :param IngestionProgress progress: Optional progress tracker, also used for cancellation
+    :param bool full_reindex: Ignore the last indexed commit and reload every file
+    :param IndexStateStore state_store: Store of last indexed commits
+    :param dict config: Optional shard configuration (defaults to INGESTION_SHARD_CONFIG)
+    :param str repo_id: Repository identifier (defaults to the normalized URL)
+    :param ShardQueue shard_queue: Work queue (defaults to the configured queue path)
+    :return dict: Final progress counters
+    :raises IngestionCancelled: If the run was cancelled through the progress tracker
+    :raises ShardFailed: If a shard failed on all of its attempts
+    """
+    progress = progress or IngestionProgress()
+    state_store = state_store or IndexStateStore()
+    config = config or get_shard_config()
+    shard_queue = shard_queue or ShardQueue(config["queue_path"])
+    repo = repo_id or normalize_repo_id(repo_url)
+
+    vectorstore, since_commit = resolve_since_commit(
+        qdrant_client, state_store, repo, branch, full_reindex
+    )
+
+    progress.set_stage("loading")
+    logger.info(f"Loading documents from repository: {repo_url}")
+    # The mirror stays locked, and its checkout unchanged, until all shards are done
+    with checkout_repository(repo_url, branch, since_commit, repo) as snapshot:
+        paths = list(snapshot.iter_paths())
+        shards = plan_shards(paths, config["max_files_per_shard"])
+        job_id = uuid.uuid4().hex
+        shard_queue.enqueue(
+            job_id,
+            repo,
+            snapshot.repo_dir,
+            snapshot.commit,
+            shards,
+            config["max_attempts"],
+        )
+        logger.info(f"Queued {len(paths)} files of {repo} in {len(shards)} shards")
+
+        progress.set_stage("indexing")
+        workers = None
+        if config["local_workers"] > 0 and shards:
+            workers = _start_local_workers(
+                config["local_workers"], shard_queue.path, job_id
+            )
+        try:
+            indexed_paths = _wait_for_shards(
+                shard_queue, job_id, progress, config["poll_interval"]
+            )
+        except BaseException:
+            shard_queue.cancel(job_id)
+            raise
+        finally:
+            if workers is not None:
+                _stop_local_workers(*workers)
+            shard_queue.purge(job_id)
+
+        progress.set_stage("finalizing")
+        # Files skipped when read by a worker are not seen, so their points go
+        seen_paths = {
+            collection_for_repo("code_collection", repo): [
+                path for path in indexed_paths if path.endswith(".py")
+            ],
+            collection_for_repo("md_collection", repo): [
+                path for path in indexed_paths if path.endswith(".md")
+            ],
+        }
+        for operation in stale_path_deletions(vectorstore, snapshot, repo, seen_paths):
+            operation()
+
+    state_store.record_commit(repo, branch, snapshot.commit)
+    logger.success(f"Indexed {repo} at {snapshot.commit} with {len(shards)} shards")
+
+    progress.set_stage("done")
+    return progress.to_dict()
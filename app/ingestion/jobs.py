@@ -0,0 +1,194 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+from app.ingestion.config import get_job_config
+from app.ingestion.progress import IngestionCancelled, IngestionProgress
+
+
+class JobQueueFull(Exception):
+    """Raised when the job manager cannot accept more jobs."""
+
+
+class Job:
+    """A background ingestion job and its progress."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+    def __init__(self, description=None):
+        """
+        Initialize the job.
+
+        :param str description: Human readable description (e.g. the repository URL)
+        """
+        self.id = uuid.uuid4().hex
+        self.description = description
+        self.status = self.QUEUED
+        self.error = None
+        self.result = None
+        self.progress = IngestionProgress()
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    @property
+    def finished(self):
+        """Whether the job has reached a final status."""
+        return self.status in self.FINISHED_STATUSES
+
+    def to_dict(self):
+        """Serializable view of the job."""
+        return {
+            "job_id": self.id,
+            "description": self.description,
+            "status": self.status,
+            "error": self.error,
+            "progress": self.progress.to_dict(),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """Runs ingestion jobs on a bounded background worker pool."""
+
+    def __init__(self, config=None):
+        """
+        Initialize the job manager.
+
+        :param dict config: Optional configuration (defaults to INGESTION_JOB_CONFIG)
+        """
+        self.config = config or get_job_config()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.config["max_workers"], thread_name_prefix="ingestion"
+        )
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, target, description=None, on_success=None, **kwargs):
+        """
+        Submit a job. The target is called as ``target(progress=..., **kwargs)``.
+
+        :param callable target: Function running the ingestion
+        :param str description: Human readable description of the job
+        :param callable on_success: Called with the job after it succeeds
+        :param kwargs: Keyword arguments for the target
+        :return Job: The queued job
+        :raises JobQueueFull: If too many jobs are queued or running
+        """
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if not job.finished)
+            if pending >= self.config["max_pending"]:
+                raise JobQueueFull(f"{pending} ingestion jobs are already pending")
+
+            job = Job(description=description)
+            self._jobs[job.id] = job
+            job.future = self._executor.submit(
+                self._run, job, target, on_success, kwargs
+            )
+            self._prune()
+        logger.info(f"Queued ingestion job {job.id}: {description}")
+        return job
+
+    def _run(self, job, target, on_success, kwargs):
+        """Execute a job and record its outcome."""
+        if job.progress.cancel_event.is_set():
+            self._finish(job, Job.CANCELLED)
+            return
+
+        job.status = Job.RUNNING
+        job.started_at = time.time()
+        logger.info(f"Running ingestion job {job.id}")
+        try:
+            job.result = target(progress=job.progress, **kwargs)
+        except IngestionCancelled:
+            logger.info(f"Ingestion job {job.id} cancelled")
+            self._finish(job, Job.CANCELLED)
+            return
+        except Exception as e:
+            logger.error(f"Ingestion job {job.id} failed: {e}")
+            self._finish(job, Job.FAILED, error=str(e))
+            return
+
+        self._finish(job, Job.SUCCEEDED)
+        logger.success(f"Ingestion job {job.id} succeeded")
+        if on_success:
+            try:
+                on_success(job)
+            except Exception as e:
+                logger.error(f"Post-processing of ingestion job {job.id} failed: {e}")
+
+    @staticmethod
+    def _finish(job, status, error=None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the configured limit."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[: max(0, len(finished) - self.config["max_finished"])]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """
+        Get a job by ID.
+
+        :param str job_id: Job ID
+        :return Job | None: The job or None if unknown
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status_counts(self):
+        """
+        Count known jobs per status.
+
+        :return dict: Number of jobs per status, including statuses without jobs
+        """
+        counts = dict.fromkeys((Job.QUEUED, Job.RUNNING, *Job.FINISHED_STATUSES), 0)
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return counts
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job. Running jobs stop at the next progress update.
+
+        :param str job_id: Job ID
+        :return Job | None: The job or None if unknown
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+
+        job.progress.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            self._finish(job, Job.CANCELLED)
+        logger.info(f"Cancellation requested for ingestion job {job_id}")
+        return job
+
+    def shutdown(self, wait=False):
+        """
+        Stop the worker pool, cancelling unfinished jobs.
+
+        :param bool wait: Whether to wait for running jobs to stop
+        """
+        with self._lock:
+            job_ids = [job_id for job_id, job in self._jobs.items() if not job.finished]
+        for job_id in job_ids:
+            self.cancel(job_id)
+        self._executor.shutdown(wait=wait, cancel_futures=True)
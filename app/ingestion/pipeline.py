@@ -0,0 +1,488 @@
+import queue
+import threading
+from functools import partial
+
+from langchain_core.documents import Document
+from loguru import logger
+from qdrant_client import models as qdrant_models
+
+from app.embeddings.points import PointsCreator
+from app.encoders.encoder import get_code_encoder, get_text_encoder
+from app.encoders.sparse import SparseEncoder
+from app.ingestion.config import get_pipeline_config
+from app.ingestion.progress import IngestionProgress
+from app.ingestion.state import IndexStateStore
+from app.loaders.git_loader import checkout_repository
+from app.qdrant.qdrant_store import QdrantStore
+from app.qdrant.tenancy import collection_for_repo, normalize_repo_id
+from app.splitters.text_splitter import get_python_splitter, get_markdown_splitter
+from app.telemetry import span
+from app.telemetry.metrics import STAGE_ITEMS
+
+
+class _Uploader:
+    """Runs queued upload and delete operations in order on a background thread."""
+
+    def __init__(self, queue_size):
+        """
+        :param int queue_size: Operations waiting before :meth:`put` blocks
+        """
+        self.error = None
+        self._aborted = False
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(
+            target=self._run, name="ingestion-uploader", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            operation = self._queue.get()
+            if operation is None:
+                return
+            if self.error is not None or self._aborted:
+                continue
+            try:
+                operation()
+            except BaseException as e:
+                self.error = e
+
+    def put(self, operation):
+        """
+        Queue an operation, blocking while the queue is full.
+
+        :param callable operation: Zero-argument callable
+        :raises Exception: The error of a previously failed operation
+        """
+        while True:
+            if self.error is not None:
+                raise self.error
+            try:
+                self._queue.put(operation, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def close(self):
+        """
+        Wait for queued operations to finish.
+
+        :raises Exception: The error of a failed operation
+        """
+        self._queue.put(None)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def abort(self):
+        """Drop queued operations and stop the thread."""
+        self._aborted = True
+        self._queue.put(None)
+        self._thread.join()
+
+
+class _CollectionWriter:
+    """
+    Streams one collection's chunks in batches: unchanged chunks are skipped, new
+    ones are encoded and queued for upload, and once all chunks of a file are
+    queued its stale points are queued for deletion.
+    """
+
+    def __init__(
+        self,
+        vectorstore,
+        uploader,
+        collection_name,
+        create_points,
+        repo,
+        batch_size,
+        progress,
+    ):
+        self.vectorstore = vectorstore
+        self.uploader = uploader
+        self.collection_name = collection_name
+        self.create_points = create_points
+        self.repo = repo
+        self.batch_size = batch_size
+        self.progress = progress
+
+        self._buffer = []  # (chunk, point id)
+        self._added = 0
+        self._flushed = 0
+        self._pending_files = []  # (path, point ids, chunk offset of the file's end)
+
+    def add_file(self, path, chunks):
+        """
+        Add the chunks of one file.
+
+        :param str path: File path
+        :param list chunks: The file's chunks
+        """
+        ids = [PointsCreator.point_id(chunk, None) for chunk in chunks]
+        self._buffer.extend(zip(chunks, ids))
+        self._added += len(chunks)
+        self._pending_files.append((path, ids, self._added))
+
+        while len(self._buffer) >= self.batch_size:
+            self._flush(self.batch_size)
+        self._queue_deletes()
+
+    def finish(self):
+        """Flush the remaining chunks and deletions."""
+        if self._buffer:
+            self._flush(len(self._buffer))
+        self._queue_deletes()
+
+    def _flush(self, size):
+        batch, self._buffer = self._buffer[:size], self._buffer[size:]
+        self._flushed += len(batch)
+
+        ids = list({point_id for _, point_id in batch})
+        existing_ids = self.vectorstore.get_existing_ids(self.collection_name, ids)
+
+        # Unchanged chunks keep their points and are not re-embedded
+        new_chunks = [
+            chunk for chunk, point_id in batch if point_id not in existing_ids
+        ]
+        self.progress.add("chunks_unchanged", len(batch) - len(new_chunks))
+        if not new_chunks:
+            return
+
+        points = self.create_points(
+            new_chunks,
+            show_progress=False,
+            progress_callback=self.progress.counter("chunks_encoded"),
+        )
+        self.uploader.put(
+            partial(
+                self.vectorstore.upload_points,
+                collection_name=self.collection_name,
+                points=points,
+                progress_callback=self.progress.counter("points_uploaded"),
+            )
+        )
+
+    def _queue_deletes(self):
+        """Queue deletion of old chunk versions of files whose chunks are all queued."""
+        done = [f for f in self._pending_files if f[2] <= self._flushed]
+        if not done:
+            return
+        self._pending_files = self._pending_files[len(done) :]
+
+        paths = [path for path, _, _ in done]
+        keep_ids = [point_id for _, ids, _ in done for point_id in ids]
+        self.uploader.put(
+            partial(
+                self.vectorstore.delete_stale_points,
+                self.collection_name,
+                self.repo,
+                paths=paths,
+                keep_ids=keep_ids,
+            )
+        )
+
+
+def prepare_collections(qdrant_client, repo):
+    """
+    Create a repository's collections and payload indexes if they do not exist.
+
+    :param qdrant_client: Qdrant client instance
+    :param str repo: Repository identifier
+    :return tuple: (vector store, markdown collection name, code collection name,
+        whether any of the collections was created)
+    """
+    md_collection = collection_for_repo("md_collection", repo)
+    code_collection = collection_for_repo("code_collection", repo)
+
+    logger.info("Creating collections in the vector store")
+    vectorstore = QdrantStore(qdrant_client, qdrant_models)
+    md_created = vectorstore.create_collection_from_encoder(
+        collection_name=md_collection,
+        encoder=get_text_encoder(),
+        distance="COSINE",
+    )
+    code_created = vectorstore.create_collection_from_encoder(
+        collection_name=code_collection,
+        encoder=get_code_encoder(),
+        distance="COSINE",
+    )
+    vectorstore.create_payload_indexes(md_collection)
+    vectorstore.create_payload_indexes(code_collection)
+    return vectorstore, md_collection, code_collection, md_created or code_created
+
+
+def resolve_since_commit(qdrant_client, state_store, repo, branch, full_reindex):
+    """
+    Prepare a repository's collections and get the commit to re-index from. The
+    last indexed commit is only used while the collections still hold the
+    repository's points: if a collection had to be created or none of the
+    repository's points are left, e.g. after Qdrant was reset, the recorded
+    state is dropped and every file is loaded again.
+
+    :param qdrant_client: Qdrant client instance
+    :param IndexStateStore state_store: Store of last indexed commits
+    :param str repo: Repository identifier
+    :param str branch: Branch to index
+    :param bool full_reindex: Ignore the last indexed commit
+    :return tuple: (vector store, commit to re-index from or None for a full load)
+    """
+    vectorstore, md_collection, code_collection, created = prepare_collections(
+        qdrant_client, repo
+    )
+    if full_reindex:
+        return vectorstore, None
+
+    since_commit = state_store.get_last_commit(repo, branch)
+    if since_commit is None:
+        return vectorstore, None
+    if created or not any(
+        vectorstore.count_repo_points(collection, repo)
+        for collection in (md_collection, code_collection)
+    ):
+        logger.warning(
+            f"Collections hold no points of {repo} indexed at {since_commit}, "
+            "loading every file"
+        )
+        state_store.forget(repo)
+        return vectorstore, None
+    return vectorstore, since_commit
+
+
+def sparse_encoder_for(vectorstore, repo):
+    """
+    Get the sparse encoder for a repository's points, if its collections store
+    sparse vectors. Collections created before hybrid retrieval was enabled keep
+    dense vectors only until they are recreated and fully re-indexed.
+
+    :param QdrantStore vectorstore: Vector store
+    :param str repo: Repository identifier
+    :return SparseEncoder | None: Encoder, or None if points stay dense only
+    """
+    if not vectorstore.config.get("hybrid.enabled", False):
+        return None
+
+    collections = [
+        collection_for_repo("md_collection", repo),
+        collection_for_repo("code_collection", repo),
+    ]
+    missing = [c for c in collections if not vectorstore.has_sparse_vectors(c)]
+    if missing:
+        logger.warning(
+            f"Collections {', '.join(missing)} have no sparse vectors, indexing "
+            "dense vectors only; recreate them to enable hybrid retrieval"
+        )
+        return None
+    return SparseEncoder()
+
+
+def _copy_chunks(chunks, path):
+    """Copy the chunks of a file for another path holding the same content."""
+    return [
+        Document(
+            page_content=chunk.page_content,
+            metadata={**chunk.metadata, "source": path, "path": path},
+        )
+        for chunk in chunks
+    ]
+
+
+def stream_documents(
+    vectorstore,
+    points_creator,
+    uploader,
+    documents,
+    repo,
+    config,
+    progress,
+    shared_blobs=None,
+):
+    """
+    Split, encode and queue the upload of documents, one file at a time. Files
+    with the same git blob are split once; their chunks get their own points
+    but reuse the embeddings through the embedding cache.
+
+    :param QdrantStore vectorstore: Vector store
+    :param PointsCreator points_creator: Points creator shared across calls
+    :param _Uploader uploader: Uploader running the queued operations
+    :param documents: Iterable of documents
+    :param str repo: Repository identifier
+    :param dict config: Pipeline configuration
+    :param IngestionProgress progress: Progress tracker
+    :param set shared_blobs: Blob SHAs at several paths, whose chunks are kept for reuse
+    :return dict: Paths seen per collection name
+    """
+    collections = {
+        ".py": (
+            collection_for_repo("code_collection", repo),
+            points_creator.create_code_points,
+        ),
+        ".md": (
+            collection_for_repo("md_collection", repo),
+            points_creator.create_text_points,
+        ),
+    }
+    splitters = {".py": get_python_splitter(), ".md": get_markdown_splitter()}
+    writers = {
+        extension: _CollectionWriter(
+            vectorstore,
+            uploader,
+            collection_name,
+            create_points,
+            repo,
+            config["batch_size"],
+            progress,
+        )
+        for extension, (collection_name, create_points) in collections.items()
+    }
+    seen_paths = {collection_name: [] for collection_name, _ in collections.values()}
+    shared_blobs = shared_blobs or set()
+    blob_chunks = {}  # blob SHA -> chunks of the first path holding it
+
+    for document in documents:
+        progress.add("files_loaded", 1)
+        path = document.metadata["path"]
+        extension = path[path.rfind(".") :]
+        blob = document.metadata.get("blob")
+
+        if blob in blob_chunks:
+            chunks = _copy_chunks(blob_chunks[blob], path)
+            progress.add("files_deduplicated", 1)
+        else:
+            with span("split"):
+                chunks = splitters[extension].split_documents([document])
+            STAGE_ITEMS.labels("split").inc(len(chunks))
+            if blob in shared_blobs:
+                blob_chunks[blob] = chunks
+        progress.add("chunks_total", len(chunks))
+        writers[extension].add_file(path, chunks)
+        seen_paths[collections[extension][0]].append(path)
+
+    for writer in writers.values():
+        writer.finish()
+    return seen_paths
+
+
+def stale_path_deletions(vectorstore, snapshot, repo, seen_paths):
+    """
+    Build the deletions of points whose files no longer exist.
+
+    :param QdrantStore vectorstore: Vector store
+    :param RepositorySnapshot snapshot: The indexed checkout
+    :param str repo: Repository identifier
+    :param dict seen_paths: Paths indexed per collection name
+    :return list: Zero-argument delete operations
+    """
+    extensions = {
+        collection_for_repo("code_collection", repo): ".py",
+        collection_for_repo("md_collection", repo): ".md",
+    }
+    operations = []
+    for collection_name, extension in extensions.items():
+        seen = seen_paths.get(collection_name, [])
+        if snapshot.incremental:
+            gone = set(snapshot.deleted_paths) | set(snapshot.changed_paths)
+            gone -= set(seen)
+            paths = sorted(p for p in gone if p.endswith(extension))
+            operation = partial(
+                vectorstore.delete_stale_points,
+                collection_name,
+                repo,
+                paths=paths,
+            )
+        else:
+            operation = partial(
+                vectorstore.delete_stale_points,
+                collection_name,
+                repo,
+                keep_paths=seen,
+            )
+        operations.append(operation)
+    return operations
+
+
+def ingest_repository(
+    qdrant_client,
+    repo_url,
+    branch="main",
+    progress=None,
+    full_reindex=False,
+    state_store=None,
+    config=None,
+    repo_id=None,
+):
+    """
+    Index a repository as a stream: files are read, split, encoded and uploaded
+    in bounded batches, with uploads overlapping the encoding of the next batch.
+    When the repository was indexed before, only files changed since the last
+    indexed commit are processed and points of removed files are deleted.
+
+    :param qdrant_client: Qdrant client instance
+    :param str repo_url: Repository URL
+    :param str branch: Branch to index
+    :param IngestionProgress progress: Optional progress tracker, also used for cancellation
+    :param bool full_reindex: Ignore the last indexed commit and reload every file
+    :param IndexStateStore state_store: Store of last indexed commits
+    :param dict config: Optional pipeline configuration (defaults to INGESTION_PIPELINE_CONFIG)
+    :param str repo_id: Repository identifier (defaults to the normalized URL)
+    :return dict: Final progress counters
+    :raises IngestionCancelled: If the run was cancelled through the progress tracker
+    """
+    progress = progress or IngestionProgress()
+    state_store = state_store or IndexStateStore()
+    config = config or get_pipeline_config()
+    repo = repo_id or normalize_repo_id(repo_url)
+
+    vectorstore, since_commit = resolve_since_commit(
+        qdrant_client, state_store, repo, branch, full_reindex
+    )
+
+    progress.set_stage("loading")
+    logger.info(f"Loading documents from repository: {repo_url}")
+    with checkout_repository(repo_url, branch, since_commit, repo) as snapshot:
+        if snapshot.incremental:
+            logger.info(
+                f"Re-indexing {len(snapshot.changed_paths)} changed and "
+                f"{len(snapshot.deleted_paths)} deleted files since {since_commit}"
+            )
+
+        points_creator = PointsCreator(
+            qdrant_models, sparse_encoder=sparse_encoder_for(vectorstore, repo)
+        )
+        uploader = _Uploader(config["upload_queue_size"])
+        try:
+            progress.set_stage("indexing")
+            seen_paths = stream_documents(
+                vectorstore,
+                points_creator,
+                uploader,
+                snapshot.iter_documents(),
+                repo,
+                config,
+                progress,
+                shared_blobs=snapshot.shared_blobs,
+            )
+
+            progress.set_stage("finalizing")
+            # Remove points of files that no longer exist
+            for operation in stale_path_deletions(
+                vectorstore, snapshot, repo, seen_paths
+            ):
+                uploader.put(operation)
+
+            uploader.close()
+        except BaseException:
+            uploader.abort()
+            raise
+
+    cache_stats = points_creator.cache_stats
+    progress.add("embedding_cache_hits", cache_stats["hits"])
+    progress.add("embedding_cache_misses", cache_stats["misses"])
+    logger.info(
+        f"Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses"
+    )
+
+    state_store.record_commit(repo, branch, snapshot.commit)
+    logger.success(f"Indexed {repo} at {snapshot.commit}")
+
+    progress.set_stage("done")
+    return progress.to_dict()
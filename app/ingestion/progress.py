@@ -0,0 +1,81 @@
+import threading
+
+
+class IngestionCancelled(Exception):
+    """Raised inside an ingestion run when its job has been cancelled."""
+
+
+class IngestionProgress:
+    """Thread-safe per-stage progress counters for an ingestion run."""
+
+    def __init__(self, cancel_event=None):
+        """
+        Initialize the progress tracker.
+
+        :param threading.Event cancel_event: Event that is set when the run should stop
+        """
+        self.cancel_event = cancel_event or threading.Event()
+        self._lock = threading.Lock()
+        self.stage = "pending"
+        self.files_loaded = 0
+        self.files_deduplicated = 0
+        self.chunks_total = 0
+        self.chunks_unchanged = 0
+        self.chunks_encoded = 0
+        self.points_uploaded = 0
+        self.embedding_cache_hits = 0
+        self.embedding_cache_misses = 0
+
+    def set_stage(self, stage):
+        """
+        Move to a new stage, stopping first if the run was cancelled.
+
+        :param str stage: Stage name (e.g. 'loading', 'splitting', 'encoding', 'uploading')
+        """
+        self.check_cancelled()
+        with self._lock:
+            self.stage = stage
+
+    def add(self, counter, amount):
+        """
+        Increment a counter, stopping first if the run was cancelled.
+
+        :param str counter: Counter name ('files_loaded', 'chunks_total', ...)
+        :param int amount: Amount to add
+        """
+        self.check_cancelled()
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def counter(self, name):
+        """
+        Get a callback that increments a counter, for progress_callback parameters.
+
+        :param str name: Counter name
+        :return callable: Callback taking the increment
+        """
+        return lambda amount: self.add(name, amount)
+
+    def check_cancelled(self):
+        """
+        Raise if the run was cancelled.
+
+        :raises IngestionCancelled: If the cancel event is set
+        """
+        if self.cancel_event.is_set():
+            raise IngestionCancelled("Ingestion was cancelled")
+
+    def to_dict(self):
+        """Snapshot of the progress counters."""
+        with self._lock:
+            return {
+                "stage": self.stage,
+                "files_loaded": self.files_loaded,
+                "files_deduplicated": self.files_deduplicated,
+                "chunks_total": self.chunks_total,
+                "chunks_unchanged": self.chunks_unchanged,
+                "chunks_encoded": self.chunks_encoded,
+                "points_uploaded": self.points_uploaded,
+                "embedding_cache_hits": self.embedding_cache_hits,
+                "embedding_cache_misses": self.embedding_cache_misses,
+            }
@@ -0,0 +1,315 @@
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.ingestion.config import get_shard_config
+
+
+def plan_shards(paths, max_files):
+    """
+    Split repository paths into shards of at most ``max_files`` files. Files of a
+    top-level directory stay together where possible; directories larger than a
+    shard are split into ranges of path hashes.
+
+    :param list paths: Repository-relative paths
+    :param int max_files: Maximum number of files per shard
+    :return list: Lists of paths
+    """
+    groups = OrderedDict()
+    for path in sorted(paths):
+        top = path.split("/", 1)[0] if "/" in path else ""
+        groups.setdefault(top, []).append(path)
+
+    units = []
+    for group in groups.values():
+        if len(group) <= max_files:
+            units.append(group)
+            continue
+        buckets = [[] for _ in range(math.ceil(len(group) / max_files) + 1)]
+        for path in group:
+            digest = int(hashlib.sha1(path.encode("utf-8")).hexdigest()[:8], 16)
+            buckets[digest % len(buckets)].append(path)
+        units.extend(bucket for bucket in buckets if bucket)
+
+    # Pack small directories together
+    shards, current = [], []
+    for unit in units:
+        if current and len(current) + len(unit) > max_files:
+            shards.append(current)
+            current = []
+        current = current + unit
+    if current:
+        shards.append(current)
+    return shards
+
+
+class ShardQueue:
+    """
+    SQLite-backed work queue of ingestion shards. Workers claim a shard with a
+    time-limited lease which they renew while working; shards whose lease
+    expires or whose worker reports a failure are retried up to their attempt
+    limit.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, path=None):
+        """
+        Initialize the queue.
+
+        :param str path: SQLite database path (defaults to INGESTION_SHARD_CONFIG)
+        """
+        self.path = path or get_shard_config()["queue_path"]
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS shards (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT NOT NULL,
+                    repo TEXT NOT NULL,
+                    repo_dir TEXT NOT NULL,
+                    commit_sha TEXT NOT NULL,
+                    paths TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    worker TEXT,
+                    lease_expires REAL,
+                    error TEXT,
+                    stats TEXT,
+                    indexed_paths TEXT,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS shards_status ON shards (status, id)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS shards_job ON shards (job_id)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _transaction(self):
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        return connection
+
+    def enqueue(self, job_id, repo, repo_dir, commit, shards, max_attempts):
+        """
+        Add the shards of an ingestion run.
+
+        :param str job_id: Run identifier
+        :param str repo: Repository identifier
+        :param str repo_dir: Checkout directory, readable by all workers
+        :param str commit: Checked out commit
+        :param list shards: Lists of repository-relative paths
+        :param int max_attempts: Attempts before a shard is marked failed
+        """
+        now = time.time()
+        with self._lock, self._connect() as connection:
+            connection.executemany(
+                """
+                INSERT INTO shards (job_id, repo, repo_dir, commit_sha, paths,
+                                    status, max_attempts, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        job_id,
+                        repo,
+                        repo_dir,
+                        commit,
+                        json.dumps(paths),
+                        self.PENDING,
+                        max_attempts,
+                        now,
+                    )
+                    for paths in shards
+                ],
+            )
+
+    def _expire_leases(self, connection, now):
+        connection.execute(
+            """
+            UPDATE shards
+            SET status = CASE WHEN attempts >= max_attempts THEN ? ELSE ? END,
+                error = 'Worker lease expired', worker = NULL, updated_at = ?
+            WHERE status = ? AND lease_expires < ?
+            """,
+            (self.FAILED, self.PENDING, now, self.RUNNING, now),
+        )
+
+    def claim(self, worker_id, lease_seconds):
+        """
+        Claim the oldest pending shard.
+
+        :param str worker_id: Claiming worker
+        :param float lease_seconds: Seconds until the claim expires unless renewed
+        :return dict | None: The shard, or None when no shard is pending
+        """
+        now = time.time()
+        with self._lock:
+            connection = self._transaction()
+            try:
+                self._expire_leases(connection, now)
+                row = connection.execute(
+                    """
+                    SELECT id, job_id, repo, repo_dir, commit_sha, paths, attempts
+                    FROM shards WHERE status = ? ORDER BY id LIMIT 1
+                    """,
+                    (self.PENDING,),
+                ).fetchone()
+                if row is not None:
+                    connection.execute(
+                        """
+                        UPDATE shards
+                        SET status = ?, attempts = attempts + 1, worker = ?,
+                            lease_expires = ?, updated_at = ?
+                        WHERE id = ?
+                        """,
+                        (self.RUNNING, worker_id, now + lease_seconds, now, row[0]),
+                    )
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            finally:
+                connection.close()
+
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "job_id": row[1],
+            "repo": row[2],
+            "repo_dir": row[3],
+            "commit": row[4],
+            "paths": json.loads(row[5]),
+            "attempt": row[6] + 1,
+        }
+
+    def _update_claimed(self, shard_id, worker_id, assignments, values):
+        with self._lock, self._connect() as connection:
+            cursor = connection.execute(
+                f"""
+                UPDATE shards SET {assignments}, updated_at = ?
+                WHERE id = ? AND worker = ? AND status = ?
+                """,
+                (*values, time.time(), shard_id, worker_id, self.RUNNING),
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(self, shard_id, worker_id, lease_seconds):
+        """
+        Renew a claim.
+
+        :param int shard_id: Shard identifier
+        :param str worker_id: Worker holding the claim
+        :param float lease_seconds: Seconds until the claim expires unless renewed
+        :return bool: False if the claim was lost or the shard cancelled
+        """
+        return self._update_claimed(
+            shard_id, worker_id, "lease_expires = ?", (time.time() + lease_seconds,)
+        )
+
+    def complete(self, shard_id, worker_id, stats, indexed_paths):
+        """
+        Mark a claimed shard done.
+
+        :param int shard_id: Shard identifier
+        :param str worker_id: Worker holding the claim
+        :param dict stats: Progress counters of the shard
+        :param list indexed_paths: Paths whose points were written, i.e. the
+            shard's paths except files skipped when read (unreadable, generated)
+        :return bool: False if the claim was lost in the meantime
+        """
+        return self._update_claimed(
+            shard_id,
+            worker_id,
+            "status = ?, stats = ?, indexed_paths = ?",
+            (self.DONE, json.dumps(stats), json.dumps(indexed_paths)),
+        )
+
+    def fail(self, shard_id, worker_id, error):
+        """
+        Report a failed attempt; the shard is retried while attempts remain.
+
+        :param int shard_id: Shard identifier
+        :param str worker_id: Worker holding the claim
+        :param str error: Error description
+        :return bool: False if the claim was lost in the meantime
+        """
+        return self._update_claimed(
+            shard_id,
+            worker_id,
+            "status = CASE WHEN attempts >= max_attempts THEN ? ELSE ? END, "
+            "error = ?, worker = NULL",
+            (self.FAILED, self.PENDING, error),
+        )
+
+    def cancel(self, job_id):
+        """
+        Cancel the unfinished shards of a run. Workers notice on their next heartbeat.
+
+        :param str job_id: Run identifier
+        """
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "UPDATE shards SET status = ?, updated_at = ? "
+                "WHERE job_id = ? AND status IN (?, ?)",
+                (self.CANCELLED, time.time(), job_id, self.PENDING, self.RUNNING),
+            )
+
+    def poll(self, job_id):
+        """
+        Get the state of a run's shards, expiring stale leases first.
+
+        :param str job_id: Run identifier
+        :return list: Dicts with 'id', 'paths', 'status', 'error', 'stats' and
+            'indexed_paths' (None until done) per shard
+        """
+        now = time.time()
+        with self._lock, self._connect() as connection:
+            self._expire_leases(connection, now)
+            rows = connection.execute(
+                "SELECT id, paths, status, error, stats, indexed_paths FROM shards "
+                "WHERE job_id = ? ORDER BY id",
+                (job_id,),
+            ).fetchall()
+        return [
+            {
+                "id": row[0],
+                "paths": json.loads(row[1]),
+                "status": row[2],
+                "error": row[3],
+                "stats": json.loads(row[4]) if row[4] else None,
+                "indexed_paths": json.loads(row[5]) if row[5] else None,
+            }
+            for row in rows
+        ]
+
+    def purge(self, job_id):
+        """
+        Remove the shards of a finished run.
+
+        :param str job_id: Run identifier
+        """
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM shards WHERE job_id = ?", (job_id,))
@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import threading
+import time
+
+from app.ingestion.config import get_state_path
+
+
+class IndexStateStore:
+    """SQLite-backed record of the last indexed commit per repository and branch."""
+
+    def __init__(self, path=None):
+        """
+        Initialize the state store.
+
+        :param str path: SQLite database path (defaults to INDEX_STATE_PATH)
+        """
+        self.path = path or get_state_path()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS repo_state (
+                    repo TEXT NOT NULL,
+                    branch TEXT NOT NULL,
+                    commit_sha TEXT NOT NULL,
+                    indexed_at REAL NOT NULL,
+                    PRIMARY KEY (repo, branch)
+                )
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_last_commit(self, repo, branch):
+        """
+        Get the last indexed commit of a repository branch.
+
+        :param str repo: Repository identifier
+        :param str branch: Branch name
+        :return str | None: Commit SHA or None if never indexed
+        """
+        with self._lock, self._connect() as connection:
+            row = connection.execute(
+                "SELECT commit_sha FROM repo_state WHERE repo = ? AND branch = ?",
+                (repo, branch),
+            ).fetchone()
+        return row[0] if row else None
+
+    def list_repos(self):
+        """
+        List the repositories with a recorded commit.
+
+        :return list: Sorted repository identifiers
+        """
+        with self._lock, self._connect() as connection:
+            rows = connection.execute(
+                "SELECT DISTINCT repo FROM repo_state ORDER BY repo"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def record_commit(self, repo, branch, commit):
+        """
+        Record the commit a repository branch was indexed at.
+
+        :param str repo: Repository identifier
+        :param str branch: Branch name
+        :param str commit: Commit SHA
+        """
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                """
+                INSERT INTO repo_state (repo, branch, commit_sha, indexed_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (repo, branch)
+                DO UPDATE SET commit_sha = excluded.commit_sha,
+                              indexed_at = excluded.indexed_at
+                """,
+                (repo, branch, commit, time.time()),
+            )
+
+    def forget(self, repo, branch=None):
+        """
+        Drop recorded state so the next ingestion is a full re-index.
+
+        :param str repo: Repository identifier
+        :param str branch: Branch name (None for all branches)
+        """
+        with self._lock, self._connect() as connection:
+            if branch is None:
+                connection.execute("DELETE FROM repo_state WHERE repo = ?", (repo,))
+            else:
+                connection.execute(
+                    "DELETE FROM repo_state WHERE repo = ? AND branch = ?",
+                    (repo, branch),
+                )
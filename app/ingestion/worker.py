@@ -0,0 +1,217 @@
+"""
+Shard worker for distributed ingestion.
+
+Usage: python -m app.ingestion.worker [--queue PATH] [--worker-id ID]
+
+Workers on other machines must see the coordinator's mirror directory
+(GIT_MIRROR_PATH) and shard queue (SHARD_QUEUE_PATH) at the same paths, e.g.
+on a shared volume.
+"""
+
+import argparse
+import os
+import socket
+import threading
+import uuid
+
+from loguru import logger
+from qdrant_client import models as qdrant_models
+
+from app.embeddings.points import PointsCreator
+from app.ingestion.config import get_pipeline_config, get_shard_config
+from app.ingestion.pipeline import _Uploader, sparse_encoder_for, stream_documents
+from app.ingestion.progress import IngestionCancelled, IngestionProgress
+from app.ingestion.shards import ShardQueue
+from app.loaders.config import get_loader_config
+from app.loaders.filters import FileFilter
+from app.loaders.git_loader import RepositorySnapshot
+from app.qdrant.qdrant_store import QdrantStore
+
+
+class _LeaseKeeper:
+    """Renews a shard claim in the background and cancels the shard when it is lost."""
+
+    def __init__(self, shard_queue, shard_id, worker_id, lease_seconds, cancel_event):
+        self.shard_queue = shard_queue
+        self.shard_id = shard_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.cancel_event = cancel_event
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="shard-lease", daemon=True
+        )
+
+    def _run(self):
+        while not self._stopped.wait(self.lease_seconds / 3):
+            if not self.shard_queue.heartbeat(
+                self.shard_id, self.worker_id, self.lease_seconds
+            ):
+                logger.warning(f"Lost claim on shard {self.shard_id}, stopping it")
+                self.cancel_event.set()
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+
+def index_shard(vectorstore, points_creator, shard, progress, config):
+    """
+    Split, encode and upload the files of one shard.
+
+    :param QdrantStore vectorstore: Vector store
+    :param PointsCreator points_creator: Points creator reused across shards
+    :param dict shard: Claimed shard
+    :param IngestionProgress progress: Progress tracker of the shard
+    :param dict config: Pipeline configuration
+    :return list: Paths that were indexed
+    """
+    snapshot = RepositorySnapshot(
+        shard["repo_dir"],
+        shard["repo"],
+        shard["commit"],
+        shard["paths"],
+        [],
+        incremental=True,
+        file_filter=FileFilter(shard["repo_dir"], get_loader_config()),
+    )
+    uploader = _Uploader(config["upload_queue_size"])
+    try:
+        seen_paths = stream_documents(
+            vectorstore,
+            points_creator,
+            uploader,
+            snapshot.iter_documents(),
+            shard["repo"],
+            config,
+            progress,
+            shared_blobs=snapshot.shared_blobs,
+        )
+        uploader.close()
+    except BaseException:
+        uploader.abort()
+        raise
+    return [path for paths in seen_paths.values() for path in paths]
+
+
+def run_worker(
+    qdrant_client,
+    shard_queue=None,
+    worker_id=None,
+    stop_event=None,
+    config=None,
+    pipeline_config=None,
+):
+    """
+    Claim and index shards until ``stop_event`` is set.
+
+    :param qdrant_client: Qdrant client instance
+    :param ShardQueue shard_queue: Work queue (defaults to INGESTION_SHARD_CONFIG)
+    :param str worker_id: Worker name used for claims (defaults to host and pid)
+    :param stop_event: Event that stops the worker once its current shard is done
+    :param dict config: Optional shard configuration (defaults to INGESTION_SHARD_CONFIG)
+    :param dict pipeline_config: Optional pipeline configuration
+    """
+    config = config or get_shard_config()
+    pipeline_config = pipeline_config or get_pipeline_config()
+    shard_queue = shard_queue or ShardQueue(config["queue_path"])
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    stop_event = stop_event or threading.Event()
+
+    vectorstore = QdrantStore(qdrant_client, qdrant_models)
+    points_creator = PointsCreator(qdrant_models)
+    logger.info(f"Shard worker {worker_id} started")
+
+    while not stop_event.is_set():
+        shard = shard_queue.claim(worker_id, config["lease_seconds"])
+        if shard is None:
+            stop_event.wait(config["poll_interval"])
+            continue
+
+        logger.info(
+            f"Worker {worker_id} indexing shard {shard['id']} of {shard['repo']} "
+            f"({len(shard['paths'])} files, attempt {shard['attempt']})"
+        )
+        progress = IngestionProgress()
+        cache_hits = points_creator.cache_stats["hits"]
+        cache_misses = points_creator.cache_stats["misses"]
+        try:
+            points_creator.sparse_encoder = sparse_encoder_for(
+                vectorstore, shard["repo"]
+            )
+            with _LeaseKeeper(
+                shard_queue,
+                shard["id"],
+                worker_id,
+                config["lease_seconds"],
+                progress.cancel_event,
+            ):
+                indexed_paths = index_shard(
+                    vectorstore, points_creator, shard, progress, pipeline_config
+                )
+        except IngestionCancelled:
+            logger.info(f"Shard {shard['id']} was cancelled")
+            continue
+        except Exception as e:
+            logger.exception(f"Shard {shard['id']} failed")
+            shard_queue.fail(shard["id"], worker_id, repr(e))
+            continue
+
+        progress.add(
+            "embedding_cache_hits", points_creator.cache_stats["hits"] - cache_hits
+        )
+        progress.add(
+            "embedding_cache_misses",
+            points_creator.cache_stats["misses"] - cache_misses,
+        )
+        shard_queue.complete(shard["id"], worker_id, progress.to_dict(), indexed_paths)
+
+    logger.info(f"Shard worker {worker_id} stopped")
+
+
+def run_local_worker(queue_path, worker_id, stop_event):
+    """
+    Entry point of worker processes started by the coordinator.
+
+    :param str queue_path: Shard queue database path
+    :param str worker_id: Worker name
+    :param stop_event: Multiprocessing event that stops the worker
+    """
+    from app.config.config import get_config
+    from app.qdrant.qdrant import get_client
+
+    run_worker(
+        get_client(config=get_config()),
+        shard_queue=ShardQueue(queue_path),
+        worker_id=worker_id,
+        stop_event=stop_event,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queue", default=None, help="Shard queue database path")
+    parser.add_argument("--worker-id", default=None, help="Worker name")
+    args = parser.parse_args()
+
+    from app.config.config import get_config
+    from app.qdrant.qdrant import get_client
+
+    worker_id = args.worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+    try:
+        run_worker(
+            get_client(config=get_config()),
+            shard_queue=ShardQueue(args.queue),
+            worker_id=worker_id,
+        )
+    except KeyboardInterrupt:
+        logger.info(f"Shard worker {worker_id} interrupted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import os
+
+from app.config.config import data_path
+
+
+def _globs(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return list(default)
+    return [glob.strip() for glob in value.split(",") if glob.strip()]
+
+
+GIT_LOADER_CONFIG = {
+    # Persistent mirrors, fetched instead of re-cloned on every ingestion
+    "mirror_path": os.getenv("GIT_MIRROR_PATH", data_path("loaders", "mirrors")),
+    # Threads reading checked out files
+    "read_workers": int(os.getenv("GIT_READ_WORKERS", 8)),
+    # Skip files matched by the repository's .gitignore files, even if tracked
+    "respect_gitignore": os.getenv("GIT_RESPECT_GITIGNORE", "true").lower() == "true",
+    # Comma-separated globs; when set, only matching paths are indexed
+    "include_globs": _globs("GIT_INCLUDE_GLOBS", []),
+    # Comma-separated globs of paths never indexed (vendored and generated code)
+    "exclude_globs": _globs(
+        "GIT_EXCLUDE_GLOBS",
+        [
+            "**/vendor/**",
+            "**/vendored/**",
+            "**/third_party/**",
+            "**/node_modules/**",
+            "**/site-packages/**",
+            "**/.venv/**",
+            "**/venv/**",
+            "**/migrations/**",
+            "*_pb2.py",
+            "*_pb2_grpc.py",
+        ],
+    ),
+    # Larger files are mostly data rather than code (0 for no limit)
+    "max_file_bytes": int(os.getenv("GIT_MAX_FILE_BYTES", 256 * 1024)),
+    # Skip files marked as generated or looking minified
+    "skip_generated": os.getenv("GIT_SKIP_GENERATED", "true").lower() == "true",
+    "max_average_line_length": int(os.getenv("GIT_MAX_AVERAGE_LINE_LENGTH", 400)),
+}
+
+
+def get_loader_config():
+    """
+    Get configuration for the git loader.
+    :return: dict: Configuration settings for the git loader
+    """
+    return dict(GIT_LOADER_CONFIG)
@@ -0,0 +1,146 @@
+import os
+import re
+import subprocess
+
+from loguru import logger
+
+# Words marking generated code when found in a comment near the start of a file
+_GENERATED_WORDS = (
+    r"(?:@generated|do not edit|auto-?generated|automatically generated|generated by)"
+)
+# Comment syntax per file type: a '#' line in Markdown is a heading, not a comment
+GENERATED_MARKERS = {
+    ".py": re.compile(rf"^\s*#.*?{_GENERATED_WORDS}", re.IGNORECASE | re.MULTILINE),
+    ".md": re.compile(
+        rf"<!--(?:(?!-->).)*?{_GENERATED_WORDS}", re.IGNORECASE | re.DOTALL
+    ),
+}
+GENERATED_HEADER_CHARS = 1000
+
+
+def glob_to_regex(pattern):
+    """
+    Translate a path glob into a regular expression. '**' matches any number
+    of directories, '*' and '?' do not match '/'. Patterns without '/' match
+    the file name in any directory.
+
+    :param str pattern: Glob, e.g. '**/migrations/**' or '*_pb2.py'
+    :return re.Pattern: Compiled expression matching repository-relative paths
+    """
+    if "/" not in pattern:
+        pattern = f"**/{pattern}"
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return re.compile(regex + r"\Z")
+
+
+class FileFilter:
+    """
+    Decides which checked out files are indexed: paths ignored by the
+    repository's .gitignore files, not matching the include globs or matching
+    the exclude globs are skipped, as are files over the size limit and
+    generated or minified files.
+    """
+
+    def __init__(self, repo_dir, config):
+        """
+        :param str repo_dir: Checkout directory
+        :param dict config: Git loader configuration
+        """
+        self.repo_dir = repo_dir
+        self.respect_gitignore = config["respect_gitignore"]
+        self.include = [glob_to_regex(glob) for glob in config["include_globs"]]
+        self.exclude = [glob_to_regex(glob) for glob in config["exclude_globs"]]
+        self.max_file_bytes = config["max_file_bytes"]
+        self.skip_generated = config["skip_generated"]
+        self.max_average_line_length = config["max_average_line_length"]
+
+    def _matches(self, path):
+        if self.include and not any(regex.match(path) for regex in self.include):
+            return False
+        return not any(regex.match(path) for regex in self.exclude)
+
+    def _gitignored(self, paths):
+        """Get the paths matched by .gitignore rules, tracked or not."""
+        if not self.respect_gitignore or not paths:
+            return set()
+        result = subprocess.run(
+            ["git", "-C", self.repo_dir, "check-ignore", "--no-index", "-z", "--stdin"],
+            input="\0".join(paths),
+            capture_output=True,
+            text=True,
+        )
+        # Exit code 1 means no path is ignored
+        if result.returncode not in (0, 1):
+            logger.warning(f"Could not apply .gitignore rules: {result.stderr.strip()}")
+            return set()
+        return set(filter(None, result.stdout.split("\0")))
+
+    def _too_large(self, path):
+        try:
+            size = os.path.getsize(os.path.join(self.repo_dir, path))
+        except OSError:
+            return False
+        return bool(self.max_file_bytes) and size > self.max_file_bytes
+
+    def filter_paths(self, paths):
+        """
+        Drop paths excluded by .gitignore, the globs or the size limit.
+
+        :param list paths: Repository-relative paths
+        :return list: Indexed paths, in the given order
+        """
+        matched = [path for path in paths if self._matches(path)]
+        ignored = self._gitignored(matched)
+        kept = [
+            path
+            for path in matched
+            if path not in ignored and not self._too_large(path)
+        ]
+        skipped = len(paths) - len(kept)
+        if skipped:
+            logger.info(
+                f"Skipping {skipped} of {len(paths)} files: {len(paths) - len(matched)} "
+                f"excluded by globs, {len(ignored)} ignored by .gitignore, "
+                f"{len(matched) - len(ignored) - len(kept)} over {self.max_file_bytes} bytes"
+            )
+        return kept
+
+    def is_generated(self, content, path=""):
+        """
+        Check whether file content is generated or minified.
+
+        :param str content: File content
+        :param str path: Repository-relative path, whose extension selects the
+            comment syntax searched for generated code markers
+        :return bool: True if the file should not be indexed
+        """
+        if not self.skip_generated or not content:
+            return False
+        extension = os.path.splitext(path)[1].lower()
+        markers = (
+            [GENERATED_MARKERS[extension]]
+            if extension in GENERATED_MARKERS
+            else GENERATED_MARKERS.values()
+        )
+        header = content[:GENERATED_HEADER_CHARS]
+        if any(marker.search(header) for marker in markers):
+            return True
+        lines = content.count("\n") + 1
+        return len(content) / lines > self.max_average_line_length
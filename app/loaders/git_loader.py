@@ -1,43 +1,228 @@
 import os
-import tempfile
-import subprocess
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import cached_property
 from langchain.schema import Document
+from loguru import logger
+from app.loaders.config import get_loader_config
+from app.loaders.filters import FileFilter
+from app.loaders.mirror import RepositoryMirror, run_git
+from app.telemetry import span
+
+INDEXED_EXTENSIONS = (".py", ".md")
+
+
+class RepositorySnapshot:
+    """A checked out repository commit, with changes since a previous commit."""
+
+    def __init__(
+        self,
+        repo_dir,
+        repo_id,
+        commit,
+        changed_paths,
+        deleted_paths,
+        incremental,
+        read_workers=1,
+        file_filter=None,
+    ):
+        """
+        :param str repo_dir: Checkout directory
+        :param str repo_id: Repository identifier stored in document metadata
+        :param str commit: Checked out commit
+        :param list changed_paths: Indexed paths added or modified (None on a full load)
+        :param list deleted_paths: Indexed paths removed since the previous commit
+        :param bool incremental: Whether only changes since the previous commit are loaded
+        :param int read_workers: Threads reading files in parallel
+        :param FileFilter file_filter: Filter of the indexed files (None to index all)
+        """
+        self.repo_dir = repo_dir
+        self.repo_id = repo_id
+        self.commit = commit
+        self.changed_paths = changed_paths
+        self.deleted_paths = deleted_paths
+        self.incremental = incremental
+        self.read_workers = read_workers
+        self.file_filter = file_filter
+
+    def _all_paths(self):
+        if self.changed_paths is not None:
+            return list(self.changed_paths)
+
+        paths = []
+        for root, dirs, files in os.walk(self.repo_dir):
+            dirs[:] = sorted(d for d in dirs if d != ".git")
+            for file in sorted(files):
+                if file.endswith(INDEXED_EXTENSIONS):
+                    file_path = os.path.join(root, file)
+                    paths.append(os.path.relpath(file_path, self.repo_dir))
+        return paths
+
+    def iter_paths(self):
+        """
+        Iterate over the indexed paths to load.
+
+        :return: Generator of repository-relative paths
+        """
+        paths = self._all_paths()
+        if self.file_filter is not None:
+            paths = self.file_filter.filter_paths(paths)
+        yield from paths
+
+    @cached_property
+    def blobs(self):
+        """Git blob SHA of every indexed path of the commit."""
+        blobs = {}
+        output = run_git(self.repo_dir, "ls-tree", "-r", "-z", self.commit)
+        for entry in filter(None, output.split("\0")):
+            info, path = entry.split("\t", 1)
+            _, object_type, sha = info.split()
+            if object_type == "blob" and path.endswith(INDEXED_EXTENSIONS):
+                blobs[path] = sha
+        return blobs
+
+    @cached_property
+    def shared_blobs(self):
+        """Blob SHAs found at more than one indexed path of the commit."""
+        paths_per_blob = Counter(self.blobs.values())
+        return {sha for sha, count in paths_per_blob.items() if count > 1}
+
+    def _read_document(self, path):
+        file_path = os.path.join(self.repo_dir, path)
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                content = f.read()
+        except Exception as e:
+            logger.warning(f"Error reading {file_path}: {e}")
+            return None
+
+        if self.file_filter is not None and self.file_filter.is_generated(
+            content, path
+        ):
+            logger.info(f"Skipping generated or minified file {path}")
+            return None
+
+        metadata = {"source": path, "path": path, "repo": self.repo_id}
+        blob = self.blobs.get(path)
+        if blob is not None:
+            metadata["blob"] = blob
+        return Document(page_content=content, metadata=metadata)
+
+    def iter_documents(self):
+        """
+        Lazily read the indexed files in parallel, yielding documents in path order.
+        Only a bounded number of files is read ahead of the consumer.
+
+        :return: Generator of documents
+        """
+        with ThreadPoolExecutor(max_workers=self.read_workers) as executor:
+            pending = deque()
+            for path in self.iter_paths():
+                pending.append(executor.submit(self._read_document, path))
+                if len(pending) >= self.read_workers * 4:
+                    document = pending.popleft().result()
+                    if document is not None:
+                        yield document
+
+            while pending:
+                document = pending.popleft().result()
+                if document is not None:
+                    yield document
+
+
+def _diff_paths(repo_dir, since_commit, commit):
+    """
+    List indexed paths changed between two commits.
+
+    :return tuple: (changed paths, deleted paths)
+    """
+    output = run_git(
+        repo_dir, "diff", "--name-status", "--no-renames", "-z", since_commit, commit
+    )
+    fields = output.split("\0")
+    changed, deleted = [], []
+    for status, path in zip(fields[::2], fields[1::2]):
+        if not path.endswith(INDEXED_EXTENSIONS):
+            continue
+        if status.startswith("D"):
+            deleted.append(path)
+        else:
+            changed.append(path)
+    return changed, deleted
+
+
+@contextmanager
+def checkout_repository(
+    repo_url: str,
+    branch: str = "main",
+    since_commit: str | None = None,
+    repo_id: str | None = None,
+):
+    """
+    Sync the repository's local mirror and check out the branch tip for the duration
+    of the context. When ``since_commit`` is given and still present in the mirror,
+    only files changed since that commit are loaded.
+
+    :param str repo_url: Repository URL or local repository path
+    :param str branch: Branch to load
+    :param str since_commit: Previously indexed commit
+    :param str repo_id: Repository identifier stored in document metadata (defaults to the URL)
+    :return RepositorySnapshot: Checkout and change information
+    """
+    config = get_loader_config()
+    repo_id = repo_id or repo_url
+    mirror = RepositoryMirror(
+        repo_url,
+        root=config["mirror_path"],
+        # .gitignore files are checked out to filter the indexed files
+        patterns=[f"*{extension}" for extension in INDEXED_EXTENSIONS] + [".gitignore"],
+    )
+
+    with mirror.locked():
+        with span("clone"):
+            commit = mirror.sync(branch)
+        file_filter = FileFilter(mirror.path, config)
+
+        if since_commit and mirror.has_commit(since_commit):
+            changed, deleted = _diff_paths(mirror.path, since_commit, commit)
+            snapshot = RepositorySnapshot(
+                mirror.path,
+                repo_id,
+                commit,
+                changed,
+                deleted,
+                incremental=True,
+                read_workers=config["read_workers"],
+                file_filter=file_filter,
+            )
+        else:
+            snapshot = RepositorySnapshot(
+                mirror.path,
+                repo_id,
+                commit,
+                None,
+                [],
+                incremental=False,
+                read_workers=config["read_workers"],
+                file_filter=file_filter,
+            )
+
+        yield snapshot
+        # Keep the commit for diffing once it has been consumed successfully
+        mirror.keep(branch, commit)
 
 
 def git_loader(
     repo_url: str, branch: str = "main"
 ) -> tuple[list[Document], list[Document]]:
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # Clone repository using subprocess
-        subprocess.run(
-            ["git", "clone", "--branch", branch, repo_url, temp_dir], check=True
-        )
-
+    with checkout_repository(repo_url, branch) as snapshot:
         py_docs = []
         md_docs = []
-
-        # Walk through the directory and collect files
-        for root, _, files in os.walk(temp_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    if file.endswith(".py"):
-                        with open(file_path, "r", encoding="utf-8") as f:
-                            content = f.read()
-                            py_docs.append(
-                                Document(
-                                    page_content=content, metadata={"source": file_path}
-                                )
-                            )
-                    elif file.endswith(".md"):
-                        with open(file_path, "r", encoding="utf-8") as f:
-                            content = f.read()
-                            md_docs.append(
-                                Document(
-                                    page_content=content, metadata={"source": file_path}
-                                )
-                            )
-                except Exception as e:
-                    print(f"Error reading {file_path}: {e}")
+        for document in snapshot.iter_documents():
+            if document.metadata["path"].endswith(".py"):
+                py_docs.append(document)
+            else:
+                md_docs.append(document)
 
         return py_docs, md_docs
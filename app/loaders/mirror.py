@@ -0,0 +1,117 @@
+import fcntl
+import hashlib
+import os
+import subprocess
+from contextlib import contextmanager
+from pathlib import Path
+
+from loguru import logger
+
+
+def run_git(repo_dir, *args):
+    """
+    Run a git command inside a repository.
+
+    :param str repo_dir: Repository working directory
+    :return str: Standard output of the command
+    """
+    result = subprocess.run(
+        ["git", "-C", repo_dir, *args], check=True, capture_output=True, text=True
+    )
+    return result.stdout
+
+
+class RepositoryMirror:
+    """
+    Persistent local copy of a remote repository that is fetched instead of re-cloned.
+
+    The mirror is a shallow (depth 1), blob-filtered clone with a sparse checkout of
+    the indexed file types, so only the blobs of those files at the fetched commit
+    are ever downloaded. Earlier commits stay in the object store, which lets
+    changes since a previously indexed commit be diffed without full history.
+    """
+
+    def __init__(self, repo_url, root, patterns):
+        """
+        :param str repo_url: Remote URL or local repository path
+        :param str root: Directory holding all mirrors
+        :param list patterns: Sparse checkout patterns (e.g. ['*.py', '*.md'])
+        """
+        if os.path.exists(repo_url):
+            # file:// makes git honour --depth and --filter for local repositories
+            repo_url = Path(repo_url).resolve().as_uri()
+        self.repo_url = repo_url
+        self.patterns = patterns
+
+        key = hashlib.sha1(repo_url.encode("utf-8")).hexdigest()
+        os.makedirs(root, exist_ok=True)
+        self.path = os.path.join(root, key)
+        self.lock_path = os.path.join(root, f"{key}.lock")
+
+    @contextmanager
+    def locked(self):
+        """Hold an exclusive lock on the mirror, across threads and processes."""
+        with open(self.lock_path, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield self
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _initialize(self):
+        logger.info(f"Creating mirror of {self.repo_url} in {self.path}")
+        os.makedirs(self.path, exist_ok=True)
+        run_git(self.path, "init", "--quiet")
+        run_git(self.path, "remote", "add", "origin", self.repo_url)
+        run_git(self.path, "config", "remote.origin.promisor", "true")
+        run_git(self.path, "config", "remote.origin.partialclonefilter", "blob:none")
+
+    def sync(self, branch):
+        """
+        Fetch the branch tip and check it out. Must be called while holding :meth:`locked`.
+
+        :param str branch: Branch to fetch
+        :return str: Checked out commit
+        """
+        if not os.path.isdir(os.path.join(self.path, ".git")):
+            self._initialize()
+
+        logger.info(f"Fetching {branch} of {self.repo_url}")
+        run_git(
+            self.path,
+            "fetch",
+            "--quiet",
+            "--depth",
+            "1",
+            "--filter=blob:none",
+            "origin",
+            f"+refs/heads/{branch}:refs/remotes/origin/{branch}",
+        )
+        # Set on every sync so existing mirrors pick up new patterns
+        run_git(self.path, "sparse-checkout", "set", "--no-cone", *self.patterns)
+        run_git(
+            self.path, "checkout", "--quiet", "--force", "--detach", f"origin/{branch}"
+        )
+        return run_git(self.path, "rev-parse", "HEAD").strip()
+
+    def keep(self, branch, commit):
+        """
+        Keep a commit reachable so it can be diffed against on the next sync.
+
+        :param str branch: Branch name
+        :param str commit: Commit SHA
+        """
+        run_git(self.path, "update-ref", f"refs/indexed/{branch}", commit)
+
+    def has_commit(self, commit):
+        """
+        Check whether a commit is present in the mirror.
+
+        :param str commit: Commit SHA
+        :return bool: True if the commit object is available
+        """
+        result = subprocess.run(
+            ["git", "-C", self.path, "cat-file", "-e", f"{commit}^{{commit}}"],
+            capture_output=True,
+        )
+        return result.returncode == 0
@@ -1,9 +1,50 @@
+import os
+
+
 class Config:
     VECTOR_PARAMS = {
         "vector_size": 384,
         "distance_metric": "COSINE",  # Options: COSINE, EUCLID, DOT
         "batch_size": 100,
     }
+    UPLOAD_PARAMS = {
+        "parallel": 4,  # Batches in flight at the same time
+        "wait": False,  # Don't wait for each batch to be applied before acknowledging
+        "max_retries": 3,
+        "retry_backoff": 0.5,  # Seconds, doubled after every failed attempt
+    }
+    STORAGE_PARAMS = {
+        # "none", "scalar" (int8, 4x smaller) or "binary" (1 bit per dimension, 32x smaller)
+        "quantization": os.getenv("QDRANT_QUANTIZATION", "none"),
+        # Keep quantized vectors in RAM, so searches only read originals to rescore
+        "quantization_always_ram": True,
+        # Quantile of values used to set the int8 range, clipping outliers
+        "scalar_quantile": 0.99,
+        # Keep original vectors on disk (memory-mapped) instead of in RAM
+        "on_disk": os.getenv("QDRANT_ON_DISK", "false").lower() == "true",
+        "hnsw_m": int(os.getenv("QDRANT_HNSW_M", 16)),
+        "hnsw_ef_construct": int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", 100)),
+        "hnsw_on_disk": os.getenv("QDRANT_HNSW_ON_DISK", "false").lower() == "true",
+    }
+    SEARCH_PARAMS = {
+        # HNSW candidate list size at search time (None for Qdrant's default)
+        "hnsw_ef": None,
+        # Quantized collections: candidates fetched per result, then rescored
+        "oversampling": 2.0,
+        "rescore": True,
+    }
+    HYBRID = {
+        # Store a BM25 sparse vector next to the dense one and fuse both at query time
+        "enabled": os.getenv("QDRANT_HYBRID", "true").lower() == "true",
+        "sparse_vector_name": "sparse",
+        # Candidates taken from each of the dense and sparse searches before fusion
+        "prefetch_limit": 20,
+    }
+    TENANCY = {
+        # "shared": all repositories in one collection per type, filtered by payload
+        # "per_repo": one collection per repository and type
+        "mode": os.getenv("QDRANT_TENANCY_MODE", "shared"),
+    }
 
     @classmethod
     def get(cls, key, default=None):
@@ -1,4 +1,4 @@
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 
 from app.config.config import Config
 
@@ -9,7 +9,19 @@ def get_client(config: Config):
         port=config.qdrant_port,
         grpc_port=config.qdrant_grpc_port,
         api_key=config.qdrant_api_key,
-        prefer_grpc=False,
+        prefer_grpc=config.qdrant_prefer_grpc,
     )
 
     return qdrant_client
+
+
+def get_async_client(config: Config):
+    async_qdrant_client = AsyncQdrantClient(
+        url=config.qdrant_url,
+        port=config.qdrant_port,
+        grpc_port=config.qdrant_grpc_port,
+        api_key=config.qdrant_api_key,
+        prefer_grpc=config.qdrant_prefer_grpc,
+    )
+
+    return async_qdrant_client
@@ -1,4 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+from qdrant_client import models
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+
 from app.qdrant.config import Config
+from app.qdrant.tenancy import PATH_FIELD, REPO_FIELD
+from app.telemetry import span
+
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def is_transient_error(error):
+    """
+    Check whether a Qdrant request failure is worth retrying.
+
+    :param Exception error: Raised exception
+    :return bool: True for connection errors, timeouts and overload responses
+    """
+    if isinstance(error, ResponseHandlingException):
+        return True
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code in TRANSIENT_STATUS_CODES
+    # gRPC errors expose their status through code()
+    code = getattr(error, "code", None)
+    if callable(code):
+        return getattr(code(), "name", None) in (
+            "UNAVAILABLE",
+            "DEADLINE_EXCEEDED",
+            "RESOURCE_EXHAUSTED",
+        )
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+def search_params(hnsw_ef=None, oversampling=None, rescore=None, config=None):
+    """
+    Build search parameters, defaulting to the configured ones.
+
+    :param int hnsw_ef: HNSW candidate list size
+    :param float oversampling: Candidates fetched per result from quantized vectors
+    :param bool rescore: Whether to rescore candidates with the original vectors
+    :param config: Optional configuration object (defaults to global Config)
+    :return SearchParams | None: Parameters, or None if Qdrant's defaults apply
+    """
+    config = config or Config
+    defaults = config.get("search_params", {})
+    hnsw_ef = defaults.get("hnsw_ef") if hnsw_ef is None else hnsw_ef
+    oversampling = (
+        defaults.get("oversampling") if oversampling is None else oversampling
+    )
+    rescore = defaults.get("rescore") if rescore is None else rescore
+
+    quantization = None
+    if config.get("storage_params.quantization", "none") != "none":
+        quantization = models.QuantizationSearchParams(
+            rescore=rescore, oversampling=oversampling
+        )
+    if hnsw_ef is None and quantization is None:
+        return None
+    return models.SearchParams(hnsw_ef=hnsw_ef, quantization=quantization)
 
 
 class QdrantStore:
@@ -14,13 +75,24 @@ class QdrantStore:
         self.client = client
         self.models = models
         self.config = config or Config
+        self.last_upload_stats = None
 
-    def create_collection(self, collection_name, vectors_config):
+    def create_collection(
+        self,
+        collection_name,
+        vectors_config,
+        sparse_vectors_config=None,
+        hnsw_config=None,
+        quantization_config=None,
+    ):
         """
         Create a new collection if it doesn't exist.
 
         :param str collection_name: Name of the collection
         :param vectors_config: VectorParams instance or dict
+        :param dict sparse_vectors_config: Optional named SparseVectorParams
+        :param HnswConfigDiff hnsw_config: Optional HNSW index parameters
+        :param quantization_config: Optional scalar or binary quantization
         :return bool: True if collection was created, False if it already existed
         """
         # Check if collection exists
@@ -31,10 +103,78 @@ class QdrantStore:
             self.client.create_collection(
                 collection_name=collection_name,
                 vectors_config=vectors_config,
+                sparse_vectors_config=sparse_vectors_config,
+                hnsw_config=hnsw_config,
+                quantization_config=quantization_config,
             )
             return True
         return False
 
+    def has_sparse_vectors(self, collection_name):
+        """
+        Check whether a collection stores the configured sparse vector.
+
+        :param str collection_name: Name of the collection
+        :return bool: True if points can carry the sparse vector
+        """
+        sparse_vectors = self.client.get_collection(
+            collection_name
+        ).config.params.sparse_vectors
+        return self.config.get("hybrid.sparse_vector_name") in (sparse_vectors or {})
+
+    def quantization_config(self):
+        """
+        Build the configured quantization.
+
+        :return: ScalarQuantization, BinaryQuantization or None
+        :raises ValueError: If the quantization mode is not supported
+        """
+        mode = self.config.get("storage_params.quantization", "none")
+        always_ram = self.config.get("storage_params.quantization_always_ram", True)
+        if mode == "none":
+            return None
+        if mode == "scalar":
+            return self.models.ScalarQuantization(
+                scalar=self.models.ScalarQuantizationConfig(
+                    type=self.models.ScalarType.INT8,
+                    quantile=self.config.get("storage_params.scalar_quantile"),
+                    always_ram=always_ram,
+                )
+            )
+        if mode == "binary":
+            return self.models.BinaryQuantization(
+                binary=self.models.BinaryQuantizationConfig(always_ram=always_ram)
+            )
+        raise ValueError(f"Unsupported quantization: {mode}")
+
+    def hnsw_config(self):
+        """Build the configured HNSW index parameters."""
+        return self.models.HnswConfigDiff(
+            m=self.config.get("storage_params.hnsw_m"),
+            ef_construct=self.config.get("storage_params.hnsw_ef_construct"),
+            on_disk=self.config.get("storage_params.hnsw_on_disk"),
+        )
+
+    def create_payload_indexes(self, collection_name):
+        """
+        Index the repository and path payload fields used to scope searches and deletes.
+        Creating an index that already exists is a no-op.
+
+        :param str collection_name: Name of the collection
+        """
+        self.client.create_payload_index(
+            collection_name=collection_name,
+            field_name=REPO_FIELD,
+            field_schema=self.models.KeywordIndexParams(
+                type=self.models.KeywordIndexType.KEYWORD, is_tenant=True
+            ),
+        )
+        self.client.create_payload_index(
+            collection_name=collection_name,
+            field_name=PATH_FIELD,
+            field_schema=self.models.PayloadSchemaType.KEYWORD,
+        )
+
     def create_collection_from_encoder(self, collection_name, encoder, distance=None):
         """
         Create a collection with parameters derived from an encoder.
@@ -53,10 +193,31 @@ class QdrantStore:
         vectors_config = self.models.VectorParams(
             size=encoder.get_sentence_embedding_dimension(),
             distance=distance_metric,
+            on_disk=self.config.get("storage_params.on_disk", False),
         )
 
+        # BM25 sparse vectors, with IDF computed by Qdrant from the collection
+        sparse_vectors_config = None
+        if self.config.get("hybrid.enabled", False):
+            sparse_vectors_config = {
+                self.config.get(
+                    "hybrid.sparse_vector_name"
+                ): self.models.SparseVectorParams(
+                    index=self.models.SparseIndexParams(
+                        on_disk=self.config.get("storage_params.on_disk", False)
+                    ),
+                    modifier=self.models.Modifier.IDF,
+                )
+            }
+
         # Create collection
-        return self.create_collection(collection_name, vectors_config)
+        return self.create_collection(
+            collection_name,
+            vectors_config,
+            sparse_vectors_config,
+            hnsw_config=self.hnsw_config(),
+            quantization_config=self.quantization_config(),
+        )
 
     def create_custom_collection(
         self, collection_name=None, vector_size=None, distance=None
@@ -88,28 +249,187 @@ class QdrantStore:
         # Create collection
         return self.create_collection(collection_name, vectors_config)
 
-    def upload_points(self, collection_name, points, batch_size=None):
+    def upload_points(
+        self,
+        collection_name,
+        points,
+        batch_size=None,
+        progress_callback=None,
+        parallel=None,
+        wait=None,
+        max_retries=None,
+    ):
         """
-        Upload points to the collection.
+        Upload points to the collection, sending several batches concurrently and
+        retrying transient failures with exponential backoff.
 
         :param str collection_name: Name of the collection
         :param list points: List of points to upload
         :param int batch_size: Size of batches for uploading
+        :param callable progress_callback: Called with the number of points uploaded per batch
+        :param int parallel: Number of batches in flight at the same time
+        :param bool wait: Whether each request waits until its batch is applied
+        :param int max_retries: Retries per batch on transient failures
         :return: Upload operation results
         """
-        # Use config value as default for batch_size
+        # Use config values as defaults
         if batch_size is None:
             batch_size = self.config.get("vector_params.batch_size", 100)
+        if parallel is None:
+            parallel = self.config.get("upload_params.parallel", 1)
+        if wait is None:
+            wait = self.config.get("upload_params.wait", True)
+        if max_retries is None:
+            max_retries = self.config.get("upload_params.max_retries", 0)
 
-        results = []
-        for i in range(0, len(points), batch_size):
-            batch = points[i : i + batch_size]
-            result = self.client.upload_points(
-                collection_name=collection_name, points=batch
+        batches = [
+            points[i : i + batch_size] for i in range(0, len(points), batch_size)
+        ]
+
+        def upload(batch):
+            result = self._upsert_with_retry(collection_name, batch, wait, max_retries)
+            if progress_callback:
+                progress_callback(len(batch))
+            return result
+
+        start = time.perf_counter()
+        with span("upload", items=len(points)):
+            if parallel > 1 and len(batches) > 1:
+                with ThreadPoolExecutor(max_workers=parallel) as executor:
+                    results = list(executor.map(upload, batches))
+            else:
+                results = [upload(batch) for batch in batches]
+        elapsed = time.perf_counter() - start
+
+        self.last_upload_stats = {
+            "points": len(points),
+            "batches": len(batches),
+            "seconds": elapsed,
+            "points_per_second": len(points) / elapsed if elapsed > 0 else 0.0,
+        }
+        if points:
+            logger.info(
+                f"Uploaded {len(points)} points to {collection_name} in {elapsed:.2f}s "
+                f"({self.last_upload_stats['points_per_second']:.0f} points/s)"
             )
-            results.append(result)
         return results
 
+    def _upsert_with_retry(self, collection_name, batch, wait, max_retries):
+        """
+        Upsert a batch, retrying transient failures with exponential backoff.
+
+        :param str collection_name: Name of the collection
+        :param list batch: Points to upsert
+        :param bool wait: Whether to wait until the batch is applied
+        :param int max_retries: Number of retries
+        :return: Upsert operation result
+        """
+        backoff = self.config.get("upload_params.retry_backoff", 0.5)
+        for attempt in range(max_retries + 1):
+            try:
+                return self.client.upsert(
+                    collection_name=collection_name, points=batch, wait=wait
+                )
+            except Exception as e:
+                if attempt == max_retries or not is_transient_error(e):
+                    raise
+                delay = backoff * 2**attempt
+                logger.warning(
+                    f"Upload to {collection_name} failed ({e}), retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+    def get_existing_ids(self, collection_name, ids, batch_size=None):
+        """
+        Find which of the given point IDs already exist in the collection.
+
+        :param str collection_name: Name of the collection
+        :param list ids: Point IDs to look up
+        :param int batch_size: Number of IDs per request
+        :return set: IDs (as strings) present in the collection
+        """
+        if batch_size is None:
+            batch_size = self.config.get("vector_params.batch_size", 100)
+
+        existing = set()
+        for i in range(0, len(ids), batch_size):
+            records = self.client.retrieve(
+                collection_name=collection_name,
+                ids=ids[i : i + batch_size],
+                with_payload=False,
+                with_vectors=False,
+            )
+            existing.update(str(record.id) for record in records)
+        return existing
+
+    def count_repo_points(self, collection_name, repo):
+        """
+        Count a repository's points in a collection.
+
+        :param str collection_name: Name of the collection
+        :param str repo: Repository identifier
+        :return int: Number of points with the repository in their payload
+        """
+        result = self.client.count(
+            collection_name=collection_name,
+            count_filter=self.models.Filter(
+                must=[
+                    self.models.FieldCondition(
+                        key=REPO_FIELD, match=self.models.MatchValue(value=repo)
+                    )
+                ]
+            ),
+            exact=True,
+        )
+        return result.count
+
+    def delete_stale_points(
+        self, collection_name, repo, paths=None, keep_ids=None, keep_paths=None
+    ):
+        """
+        Delete a repository's points, optionally restricted to some paths, except
+        for points with kept IDs or on kept paths.
+
+        :param str collection_name: Name of the collection
+        :param str repo: Repository identifier
+        :param list paths: Only delete points of these paths (None for all paths)
+        :param list keep_ids: IDs of points to keep
+        :param list keep_paths: Paths whose points are kept
+        :return: Delete operation result, or None if there was nothing to delete
+        """
+        if paths is not None and not paths:
+            return None
+
+        must = [
+            self.models.FieldCondition(
+                key=REPO_FIELD, match=self.models.MatchValue(value=repo)
+            )
+        ]
+        if paths is not None:
+            must.append(
+                self.models.FieldCondition(
+                    key=PATH_FIELD, match=self.models.MatchAny(any=list(paths))
+                )
+            )
+
+        must_not = []
+        if keep_ids:
+            must_not.append(self.models.HasIdCondition(has_id=list(keep_ids)))
+        if keep_paths:
+            must_not.append(
+                self.models.FieldCondition(
+                    key=PATH_FIELD,
+                    match=self.models.MatchAny(any=list(keep_paths)),
+                )
+            )
+
+        return self.client.delete(
+            collection_name=collection_name,
+            points_selector=self.models.FilterSelector(
+                filter=self.models.Filter(must=must, must_not=must_not)
+            ),
+        )
+
     def delete_collection(self, collection_name):
 
         """
@@ -0,0 +1,79 @@
+import hashlib
+import os
+import re
+from urllib.parse import urlparse
+
+from qdrant_client import models
+
+from app.qdrant.config import Config
+
+REPO_FIELD = "metadata.repo"
+PATH_FIELD = "metadata.path"
+
+
+def normalize_repo_id(repo):
+    """
+    Build a stable repository identifier from a URL, an scp-like git address or a
+    local path, so that e.g. 'https://github.com/org/repo.git' and
+    'git@github.com:org/repo' map to the same repository.
+
+    :param str repo: Repository URL, address or identifier
+    :return str: Repository identifier like 'github.com/org/repo'
+    """
+    repo = repo.strip()
+    if os.path.exists(repo):
+        return os.path.abspath(repo)
+
+    scp_like = re.match(r"^[\w.-]+@([\w.-]+):(.+)$", repo)
+    if scp_like:
+        host, path = scp_like.groups()
+    else:
+        parsed = urlparse(repo if "://" in repo else f"//{repo}")
+        host, path = parsed.hostname or "", parsed.path
+
+    path = path.strip("/")
+    if path.endswith(".git"):
+        path = path[: -len(".git")]
+    return f"{host.lower()}/{path}" if host else path
+
+
+def is_per_repo(config=None):
+    """Whether each repository gets its own collections."""
+    config = config or Config
+    return config.get("tenancy.mode", "shared") == "per_repo"
+
+
+def collection_for_repo(base_name, repo_id, config=None):
+    """
+    Get the collection holding a repository's points.
+
+    :param str base_name: Base collection name (e.g. 'code_collection')
+    :param str repo_id: Repository identifier
+    :param config: Optional configuration object (defaults to global Config)
+    :return str: Collection name
+    """
+    if not is_per_repo(config):
+        return base_name
+
+    slug = re.sub(r"[^a-zA-Z0-9]+", "_", repo_id).strip("_")[-48:]
+    digest = hashlib.sha1(repo_id.encode("utf-8")).hexdigest()[:8]
+    return f"{base_name}_{slug}_{digest}"
+
+
+def repo_filter(repo_id, config=None):
+    """
+    Get the payload filter restricting a search to one repository.
+
+    :param str repo_id: Repository identifier
+    :param config: Optional configuration object (defaults to global Config)
+    :return Filter | None: Filter, or None when the collection holds a single repository
+    """
+    if repo_id is None or is_per_repo(config):
+        return None
+    return models.Filter(
+        must=[
+            models.FieldCondition(
+                key=REPO_FIELD, match=models.MatchValue(value=repo_id)
+            )
+        ]
+    )
@@ -1,5 +1,10 @@
 from app.retrievers.retriever import RetrieverFactory
-from app.retrievers.classifier import QueryClassifier
+from app.retrievers.classifier import QueryClassifier, EmbeddingQueryClassifier
 from app.retrievers.reranker import Reranker
 
-__all__ = ["RetrieverFactory", "QueryClassifier", "Reranker"]
+__all__ = [
+    "RetrieverFactory",
+    "QueryClassifier",
+    "EmbeddingQueryClassifier",
+    "Reranker",
+]
@@ -1,41 +1,142 @@
+import asyncio
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.encoders.encoder import get_text_encoder
+from app.retrievers.config import CLASSIFIER_PROTOTYPES, get_classifier_config
+from app.telemetry import record_cache_lookups, span
+
+
+def _weights_for(label, categories):
+    """
+    Turn a classification label into retriever weights.
+
+    :param str label: Predicted category or 'both'
+    :param list categories: Categories in retriever order
+    :return list: Weights for each category
+    """
+    # Default weights (equal distribution)
+    weights = [0.5, 0.5]
+
+    # Adjust weights based on classification
+    if label == "both":
+        return weights  # Equal weights
+
+    for i, category in enumerate(categories):
+        if label == category:
+            # Assign higher weight to the matched category
+            weights = [0.3] * len(categories)
+            weights[i] = 0.7
+            break
+
+    return weights
+
+
+class _DecisionCache:
+    """Thread-safe LRU cache of recent classification labels."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._labels = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._labels:
+                return None
+            self._labels.move_to_end(key)
+            return self._labels[key]
+
+    def put(self, key, label):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._labels[key] = label
+            self._labels.move_to_end(key)
+            while len(self._labels) > self.max_size:
+                self._labels.popitem(last=False)
+
+
 class QueryClassifier:
     """Class for classifying user queries to determine retrieval weights."""
 
-    def __init__(self, llm):
+    def __init__(self, llm, cache_size=None):
 
         self.llm = llm
+        cache_size = (
+            get_classifier_config()["cache_size"] if cache_size is None else cache_size
+        )
+        self._cache = _DecisionCache(cache_size)
 
-    def classify(self, query, categories=None):
+    def predict(self, query, categories=None):
         """
-        Classify a query into predefined categories.
+        Predict the category of a query.
+
         :param str query: User query to classify
         :param list categories: List of categories to choose from
-        :return list: Weights for each category
+        :return str: One of the categories or 'both'
+        """
+
+        if not categories:
+            categories = ["documentation", "code"]
+
+        key = (query.strip().lower(), tuple(categories))
+        label = self._cache.get(key)
+        record_cache_lookups("classifier", label is not None, label is None)
+        if label is None:
+            with span("classify"):
+                label = self._predict(query, categories)
+            self._cache.put(key, label)
+        return label
+
+    async def apredict(self, query, categories=None):
+        """
+        Predict the category of a query without blocking the event loop.
+
+        :param str query: User query to classify
+        :param list categories: List of categories to choose from
+        :return str: One of the categories or 'both'
         """
 
         if not categories:
             categories = ["documentation", "code"]
 
+        key = (query.strip().lower(), tuple(categories))
+        label = self._cache.get(key)
+        record_cache_lookups("classifier", label is not None, label is None)
+        if label is None:
+            with span("classify"):
+                label = await self._apredict(query, categories)
+            self._cache.put(key, label)
+        return label
+
+    def _prompt(self, query, categories):
         category_str = "', '".join(categories)
-        prompt = f"Classify if this query is about {category_str}: '{query}'. Answer with one of: '{category_str}', or 'both'."
+        return f"Classify if this query is about {category_str}: '{query}'. Answer with one of: '{category_str}', or 'both'."
 
-        result = self.llm.generate([prompt]).generations[0][0].text.strip().lower()
+    def _predict(self, query, categories):
+        prompt = self._prompt(query, categories)
+        return self.llm.generate([prompt]).generations[0][0].text.strip().lower()
 
-        # Default weights (equal distribution)
-        weights = [0.5, 0.5]
+    async def _apredict(self, query, categories):
+        prompt = self._prompt(query, categories)
+        result = await self.llm.agenerate([prompt])
+        return result.generations[0][0].text.strip().lower()
 
-        # Adjust weights based on classification
-        if result == "both":
-            return weights  # Equal weights
+    def classify(self, query, categories=None):
+        """
+        Classify a query into predefined categories.
+        :param str query: User query to classify
+        :param list categories: List of categories to choose from
+        :return list: Weights for each category
+        """
 
-        for i, category in enumerate(categories):
-            if result == category:
-                # Assign higher weight to the matched category
-                weights = [0.3] * len(categories)
-                weights[i] = 0.7
-                break
+        if not categories:
+            categories = ["documentation", "code"]
 
-        return weights
+        return _weights_for(self.predict(query, categories), categories)
 
     def get_retriever_weights(self, query, retrievers=None):
         """
@@ -49,3 +150,82 @@ class QueryClassifier:
             retrievers = ["documentation", "code"]
 
         return self.classify(query, retrievers)
+
+    async def aget_retriever_weights(self, query, retrievers=None):
+        """
+        Get weights for retriever ensemble without blocking the event loop.
+        :param str query: User query to classify
+        :param list retrievers: List of retriever names
+        :return list: Weights for each retriever
+        """
+
+        if not retrievers:
+            retrievers = ["documentation", "code"]
+
+        return _weights_for(await self.apredict(query, retrievers), retrievers)
+
+
+class EmbeddingQueryClassifier(QueryClassifier):
+    """
+    Classifies queries locally by comparing their text-encoder embedding with the
+    centroids of labelled example queries, avoiding an LLM round trip.
+    """
+
+    def __init__(self, prototypes=None, margin=None, cache_size=None):
+        """
+        :param dict prototypes: Example queries per label (defaults to CLASSIFIER_PROTOTYPES)
+        :param float margin: Cosine gap below which a query is classified as 'both'
+        :param int cache_size: Number of recent decisions to cache
+        """
+        super().__init__(llm=None, cache_size=cache_size)
+        config = get_classifier_config()
+        self.prototypes = prototypes or CLASSIFIER_PROTOTYPES
+        self.margin = config["margin"] if margin is None else margin
+
+        self._labels = list(self.prototypes)
+        self._centroids = None
+        self._lock = threading.Lock()
+
+    def _encode(self, texts):
+        # The text encoder is shared with the md retriever, so it is already warm
+        return get_text_encoder().encode(
+            texts, normalize_embeddings=True, show_progress_bar=False
+        )
+
+    def _get_centroids(self):
+        with self._lock:
+            if self._centroids is None:
+                centroids = []
+                for label in self._labels:
+                    centroid = self._encode(self.prototypes[label]).mean(axis=0)
+                    centroids.append(centroid / np.linalg.norm(centroid))
+                self._centroids = np.vstack(centroids)
+            return self._centroids
+
+    def warm_up(self):
+        """
+        Embed the prototypes ahead of the first query.
+
+        :return EmbeddingQueryClassifier: Self for method chaining
+        """
+        self._get_centroids()
+        return self
+
+    async def _apredict(self, query, categories):
+        # Encoding is CPU bound, keep it off the event loop
+        return await asyncio.to_thread(self._predict, query, categories)
+
+    def _predict(self, query, categories):
+        centroids = self._get_centroids()
+        scores = centroids @ self._encode([query])[0]
+
+        # Only labels the caller asked about, plus 'both', are candidates
+        candidates = [
+            i
+            for i, label in enumerate(self._labels)
+            if label in categories or label == "both"
+        ]
+        ranked = sorted(candidates, key=lambda i: scores[i], reverse=True)
+        if len(ranked) > 1 and scores[ranked[0]] - scores[ranked[1]] < self.margin:
+            return "both"
+        return self._labels[ranked[0]]
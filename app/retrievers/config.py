@@ -0,0 +1,59 @@
+import os
+
+QUERY_CLASSIFIER_CONFIG = {
+    # 'embedding' classifies locally with the text encoder, 'llm' asks the chat model
+    "mode": os.getenv("QUERY_CLASSIFIER_MODE", "llm"),
+    # Recent decisions kept per classifier
+    "cache_size": 1024,
+    # Below this cosine gap between the two closest labels a query counts as 'both'
+    "margin": 0.03,
+}
+
+# Example queries whose embedding centroids act as label prototypes. They are
+# phrased for any repository, not for this project's own code.
+CLASSIFIER_PROTOTYPES = {
+    "documentation": [
+        "How do I install this project?",
+        "What does this repository do?",
+        "How do I configure the environment variables?",
+        "Is there a guide for contributing?",
+        "What are the prerequisites to run it?",
+        "How do I run it with Docker?",
+        "What license is the project released under?",
+        "Where can I find the usage instructions?",
+        "What features does the project support?",
+        "Who maintains this project?",
+        "What is on the roadmap?",
+        "Give me an overview of the architecture described in the README",
+    ],
+    "code": [
+        "What does the parse_args function return?",
+        "Which class opens the database connection?",
+        "How is the retry logic implemented?",
+        "What arguments does the constructor take?",
+        "Where is the main entry point defined?",
+        "Show me the implementation of the cache",
+        "Which method raises ValueError for invalid input?",
+        "How are IDs generated in the code?",
+        "What does the __init__ method of the client class do?",
+        "Which module imports requests?",
+        "Is there a bug in this loop?",
+        "What is the return type of this function?",
+    ],
+    "both": [
+        "How does the build process work?",
+        "Explain how requests are handled",
+        "How is authentication implemented and configured?",
+        "How does the project handle errors?",
+        "What happens when the application starts?",
+        "How is logging set up and how do I change the level?",
+    ],
+}
+
+
+def get_classifier_config():
+    """
+    Get configuration for the query classifier.
+    :return: dict: Configuration settings for the query classifier
+    """
+    return dict(QUERY_CLASSIFIER_CONFIG)
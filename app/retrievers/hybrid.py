@@ -0,0 +1,211 @@
+import asyncio
+from typing import Any, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from loguru import logger
+from qdrant_client import models
+
+from app.encoders.sparse import SparseEncoder
+from app.telemetry import span
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever fusing dense and BM25 sparse search in a single Qdrant query: both
+    searches run as prefetches and their results are merged server-side with
+    reciprocal rank fusion. Collections without the sparse vector are searched
+    with the dense vector only.
+    """
+
+    client: Any
+    async_client: Any = None
+    collection_name: str
+    embeddings: Embeddings
+    sparse_encoder: SparseEncoder
+    sparse_vector_name: str = "sparse"
+    k: int = 5
+    prefetch_limit: int = 20
+    search_filter: Optional[models.Filter] = None
+    # HNSW and quantization parameters of the dense search
+    search_params: Optional[models.SearchParams] = None
+
+    # None until the collection was found; a missing collection is checked again
+    _has_sparse: Optional[bool] = None
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _check_sparse(self, collection_exists, sparse_vectors):
+        if not collection_exists:
+            return False
+        self._has_sparse = self.sparse_vector_name in (sparse_vectors or {})
+        if not self._has_sparse:
+            logger.warning(
+                f"Collection {self.collection_name} has no sparse vectors, "
+                "searching dense vectors only"
+            )
+        return self._has_sparse
+
+    def _sparse_available(self):
+        if self._has_sparse is not None:
+            return self._has_sparse
+        exists = self.client.collection_exists(self.collection_name)
+        sparse_vectors = None
+        if exists:
+            collection = self.client.get_collection(self.collection_name)
+            sparse_vectors = collection.config.params.sparse_vectors
+        return self._check_sparse(exists, sparse_vectors)
+
+    async def _asparse_available(self):
+        if self._has_sparse is not None:
+            return self._has_sparse
+        exists = await self.async_client.collection_exists(self.collection_name)
+        sparse_vectors = None
+        if exists:
+            collection = await self.async_client.get_collection(self.collection_name)
+            sparse_vectors = collection.config.params.sparse_vectors
+        return self._check_sparse(exists, sparse_vectors)
+
+    def _query_args(self, dense, query, has_sparse):
+        """Prefetches and fusion of one query, or a plain dense query."""
+        if not has_sparse:
+            return {"query": dense}
+        indices, values = self.sparse_encoder.encode_query(query)
+        return {
+            "prefetch": [
+                models.Prefetch(
+                    query=dense,
+                    limit=self.prefetch_limit,
+                    filter=self.search_filter,
+                    params=self.search_params,
+                ),
+                models.Prefetch(
+                    query=models.SparseVector(indices=indices, values=values),
+                    using=self.sparse_vector_name,
+                    limit=self.prefetch_limit,
+                    filter=self.search_filter,
+                ),
+            ],
+            "query": models.FusionQuery(fusion=models.Fusion.RRF),
+        }
+
+    @staticmethod
+    def _to_documents(points):
+        return [
+            Document(
+                page_content=point.payload.get("page_content", ""),
+                metadata=point.payload.get("metadata") or {},
+            )
+            for point in points
+        ]
+
+    def _requests(self, queries, dense_vectors, has_sparse):
+        return [
+            models.QueryRequest(
+                filter=self.search_filter,
+                limit=self.k,
+                with_payload=True,
+                # With fusion, search parameters apply to the dense prefetch
+                params=None if has_sparse else self.search_params,
+                **self._query_args(dense, query, has_sparse),
+            )
+            for query, dense in zip(queries, dense_vectors)
+        ]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        has_sparse = self._sparse_available()
+        dense = self.embeddings.embed_query(query)
+        response = self.client.query_points(
+            self.collection_name,
+            query_filter=self.search_filter,
+            limit=self.k,
+            with_payload=True,
+            search_params=None if has_sparse else self.search_params,
+            **self._query_args(dense, query, has_sparse),
+        )
+        return self._to_documents(response.points)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        if self.async_client is None:
+            return await super()._aget_relevant_documents(
+                query, run_manager=run_manager
+            )
+
+        has_sparse = await self._asparse_available()
+        dense = await self.embeddings.aembed_query(query)
+        response = await self.async_client.query_points(
+            self.collection_name,
+            query_filter=self.search_filter,
+            limit=self.k,
+            with_payload=True,
+            search_params=None if has_sparse else self.search_params,
+            **self._query_args(dense, query, has_sparse),
+        )
+        return self._to_documents(response.points)
+
+    def search_batch(self, queries):
+        """
+        Retrieve documents for several queries with one embedding call and one
+        Qdrant batch request.
+
+        :param list queries: User queries
+        :return list: Documents of each query
+        """
+        if not queries:
+            return []
+        has_sparse = self._sparse_available()
+        dense_vectors = self.embeddings.embed_documents(queries)
+        responses = self.client.query_batch_points(
+            self.collection_name,
+            requests=self._requests(queries, dense_vectors, has_sparse),
+        )
+        return [self._to_documents(response.points) for response in responses]
+
+    async def asearch_batch(self, queries):
+        """
+        Retrieve documents for several queries without blocking the event loop.
+
+        :param list queries: User queries
+        :return list: Documents of each query
+        """
+        if self.async_client is None:
+            return await asyncio.to_thread(self.search_batch, queries)
+        if not queries:
+            return []
+        has_sparse = await self._asparse_available()
+        dense_vectors = await self.embeddings.aembed_documents(queries)
+        responses = await self.async_client.query_batch_points(
+            self.collection_name,
+            requests=self._requests(queries, dense_vectors, has_sparse),
+        )
+        return [self._to_documents(response.points) for response in responses]
+
+    # Runnable.batch would send one request per query from a thread pool
+    def batch(self, inputs, config=None, *, return_exceptions=False, **kwargs):
+        collection = (self.metadata or {}).get("collection", "")
+        try:
+            with span("retrieve", target=collection, items=len(inputs)):
+                return self.search_batch(list(inputs))
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            return [e] * len(inputs)
+
+    async def abatch(self, inputs, config=None, *, return_exceptions=False, **kwargs):
+        collection = (self.metadata or {}).get("collection", "")
+        try:
+            with span("retrieve", target=collection, items=len(inputs)):
+                return await self.asearch_batch(list(inputs))
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            return [e] * len(inputs)
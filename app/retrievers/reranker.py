@@ -1,16 +1,323 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import torch
+from loguru import logger
 from sentence_transformers import CrossEncoder
 from typing import Any, Tuple
 
+from app.config.config import data_path
+from app.embeddings.points import content_hash
+from app.encoders.backends import resolve_revision
+from app.telemetry import record_cache_lookups, span
+
+RERANKER_BACKENDS = ("torch", "onnx", "int8")
+
+# Pairs scored by both the ONNX export and the torch model before the latter is released
+PROBE_PAIRS = [
+    ("How do I install the project?", "Run `pip install .` in the checkout."),
+    ("How do I install the project?", "def add(a, b):\n    return a + b"),
+    ("Where are retries handled?", "for attempt in range(retries):\n    try_once()"),
+    ("What license is used?", "Released under the MIT license."),
+]
+
+
+class _ScoreCache:
+    """Thread-safe LRU cache of (query hash, chunk hash) -> relevance score."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._scores:
+                    self._scores.move_to_end(key)
+                    found[key] = self._scores[key]
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        record_cache_lookups("reranker", len(found), len(keys) - len(found))
+        return found
+
+    def put_many(self, scores):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            for key, score in scores.items():
+                self._scores[key] = score
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.max_size:
+                self._scores.popitem(last=False)
+
+
+class _OnnxScorer:
+    """Scores pairs with an ONNX export of the cross-encoder run by ONNX Runtime."""
+
+    OPSET_VERSION = 17
+
+    def __init__(self, cross_encoder, model_name, max_length, cache_dir, revision=None):
+        import onnxruntime
+
+        self.tokenizer = cross_encoder.tokenizer
+        self.max_length = max_length
+        self.num_labels = cross_encoder.config.num_labels
+
+        directory = os.path.join(
+            cache_dir, self._export_key(model_name, revision, max_length)
+        )
+        path = os.path.join(directory, "model.onnx")
+        if not os.path.exists(path):
+            os.makedirs(directory, exist_ok=True)
+            self._export(cross_encoder.model, path)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        self.session = onnxruntime.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _export_key(self, model_name, revision, max_length):
+        """Hash of the model, the commit it is loaded from and the export settings."""
+        key = json.dumps(
+            {
+                "model_name": model_name,
+                "revision": resolve_revision(model_name, revision),
+                "max_length": max_length,
+                "opset_version": self.OPSET_VERSION,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def _export(self, model, path):
+        logger.info(f"Exporting reranker to ONNX: {path}")
+        features = self.tokenizer(
+            [["query", "document"]],
+            padding=True,
+            truncation=True,
+            return_tensors="pt",
+        )
+        input_names = list(features.keys())
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["logits"] = {0: "batch"}
+
+        class _Wrapper(torch.nn.Module):
+            # Binds the positional export inputs to the model's keyword arguments
+            def __init__(self, model):
+                super().__init__()
+                self.model = model
+
+            def forward(self, *inputs):
+                return self.model(**dict(zip(input_names, inputs))).logits
+
+        tmp_path = f"{path}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                _Wrapper(model.eval().to("cpu")),
+                tuple(features[name] for name in input_names),
+                tmp_path,
+                input_names=input_names,
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=self.OPSET_VERSION,
+                dynamo=False,
+            )
+        os.replace(tmp_path, path)
+
+    def predict(self, pairs, batch_size):
+        scores = []
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start : start + batch_size]
+            features = self.tokenizer(
+                [list(pair) for pair in batch],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            inputs = {
+                name: value.astype(np.int64)
+                for name, value in features.items()
+                if name in self.input_names
+            }
+            logits = self.session.run(["logits"], inputs)[0]
+            if self.num_labels == 1:
+                # Same activation CrossEncoder.predict applies to single-label models
+                scores.extend(1 / (1 + np.exp(-logits[:, 0])))
+            else:
+                scores.extend(logits)
+        return np.asarray(scores)
+
 
 class Reranker:
     """Class for reranking retrieved documents."""
 
-    def __init__(self, model_name="BAAI/bge-reranker-base", max_length=512, top_k=3):
+    def __init__(
+        self,
+        model_name="BAAI/bge-reranker-base",
+        max_length=512,
+        top_k=3,
+        backend="torch",
+        batch_size=32,
+        cache_size=4096,
+        onnx_cache_dir=data_path("rerankers", "onnx"),
+        revision=None,
+        onnx_tolerance=1e-3,
+    ):
+        """
+        Initialize the reranker.
+
+        :param str model_name: Cross-encoder model name
+        :param int max_length: Maximum tokens per (query, document) pair
+        :param int top_k: Number of documents kept
+        :param str backend: 'torch', 'onnx' (ONNX Runtime) or 'int8' (dynamically quantized torch)
+        :param int batch_size: Pairs scored per forward pass
+        :param int cache_size: Number of (query, chunk) scores cached
+        :param str onnx_cache_dir: Directory of exported ONNX models
+        :param str revision: Branch, tag or commit of the model on the Hub
+        :param float onnx_tolerance: Largest score difference between the ONNX export
+            and the torch model on probe pairs for the ONNX backend to be used
+        """
+        if backend not in RERANKER_BACKENDS:
+            raise ValueError(f"Unsupported reranker backend: {backend}")
 
         self.cross_encoder = CrossEncoder(
-            model_name, max_length=max_length, trust_remote_code=True
+            model_name,
+            max_length=max_length,
+            trust_remote_code=True,
+            revision=revision,
+            # The ONNX and int8 backends are CPU only
+            device=None if backend == "torch" else "cpu",
         )
         self.top_k = top_k
+        self.backend = backend
+        self.batch_size = batch_size
+        self._cache = _ScoreCache(cache_size)
+        self._onnx_scorer = None
+
+        if backend == "int8":
+            # In place, so the float weights are not kept next to the quantized ones
+            self.cross_encoder.model = torch.quantization.quantize_dynamic(
+                self.cross_encoder.model,
+                {torch.nn.Linear},
+                dtype=torch.qint8,
+                inplace=True,
+            )
+        elif backend == "onnx":
+            scorer = _OnnxScorer(
+                self.cross_encoder, model_name, max_length, onnx_cache_dir, revision
+            )
+            if self._validate(scorer, onnx_tolerance):
+                self._onnx_scorer = scorer
+                # The session and tokenizer are all ONNX scoring needs
+                self.cross_encoder = None
+            else:
+                self.backend = "torch"
+        logger.info(f"Reranker {model_name} loaded with the {self.backend} backend")
+
+    def _validate(self, scorer, tolerance):
+        """
+        Check that the ONNX scorer reproduces the torch model's scores.
+
+        :return bool: True if the ONNX scorer can replace the torch model
+        """
+        expected = self.cross_encoder.predict(
+            PROBE_PAIRS, batch_size=self.batch_size, show_progress_bar=False
+        )
+        difference = float(
+            np.max(np.abs(scorer.predict(PROBE_PAIRS, self.batch_size) - expected))
+        )
+        if difference > tolerance:
+            logger.warning(
+                f"ONNX reranker scores deviate from torch by {difference:.6f} "
+                f"(> {tolerance}), using torch"
+            )
+            return False
+        return True
+
+    @property
+    def cache_stats(self):
+        """Hits and misses of the score cache."""
+        return {"hits": self._cache.hits, "misses": self._cache.misses}
+
+    def predict(self, pairs):
+        """
+        Score (query, document) pairs with the configured backend, bypassing the cache.
+
+        :param list pairs: (query, document text) tuples
+        :return np.ndarray: One relevance score per pair
+        """
+        if not pairs:
+            return np.asarray([])
+        if self._onnx_scorer is not None:
+            return self._onnx_scorer.predict(pairs, self.batch_size)
+        return self.cross_encoder.predict(
+            pairs, batch_size=self.batch_size, show_progress_bar=False
+        )
+
+    def score_batch(self, queries: list, document_lists: list) -> list:
+        """
+        Score the documents of several queries in one batched forward pass.
+        Identical (query, chunk) pairs are scored once and scores of previously
+        seen pairs are reused.
+
+        :param list queries: User queries
+        :param list document_lists: Retrieved documents of each query
+        :return list: One list of scores per query
+        """
+        keys_per_query = []
+        pairs = {}
+        for query, documents in zip(queries, document_lists):
+            query_hash = hashlib.sha1(query.encode("utf-8")).hexdigest()
+            keys = [(query_hash, content_hash(doc.page_content)) for doc in documents]
+            keys_per_query.append(keys)
+            for key, doc in zip(keys, documents):
+                pairs.setdefault(key, (query, doc.page_content))
+
+        scores = self._cache.get_many(set(pairs))
+        missing = {key: pair for key, pair in pairs.items() if key not in scores}
+        if missing:
+            new_scores = self.predict(list(missing.values()))
+            new_scores = dict(zip(missing, (float(s) for s in new_scores)))
+            self._cache.put_many(new_scores)
+            scores.update(new_scores)
+
+        return [[scores[key] for key in keys] for keys in keys_per_query]
+
+    def score(self, query: str, documents: list) -> list:
+        """
+        Score documents against a query. Identical chunks are scored once and
+        scores of previously seen (query, chunk) pairs are reused.
+
+        :param str query: Original user query
+        :param list documents: List of retrieved documents
+        :return list: One score per document
+        """
+        return self.score_batch([query], [documents])[0]
+
+    @staticmethod
+    def _unique(documents):
+        # Identical chunks (e.g. returned by several retrievers) are kept once
+        unique = {}
+        for doc in documents:
+            unique.setdefault(doc.page_content, doc)
+        return list(unique.values())
+
+    def _top_k(self, documents, scores):
+        reranked = sorted(zip(documents, scores), key=lambda x: x[1], reverse=True)
+        return [doc for doc, _ in reranked[: self.top_k]]
 
     def rerank(self, query: str, documents: list) -> list:
         """
@@ -22,10 +329,26 @@ class Reranker:
         if not documents:
             return []
 
-        pairs = [(query, doc.page_content) for doc in documents]
-        scores = self.cross_encoder.predict(pairs)
-        reranked = sorted(zip(documents, scores), key=lambda x: x[1], reverse=True)
-        return [doc for doc, _ in reranked[: self.top_k]]
+        documents = self._unique(documents)
+        with span("rerank", items=len(documents)):
+            scores = self.score(query, documents)
+        return self._top_k(documents, scores)
+
+    def rerank_batch(self, queries: list, document_lists: list) -> list:
+        """
+        Rerank the documents of several queries with one batched cross-encoder call.
+
+        :param list queries: User queries
+        :param list document_lists: Retrieved documents of each query
+        :return list: Reranked documents of each query
+        """
+        document_lists = [self._unique(documents) for documents in document_lists]
+        with span("rerank", items=sum(len(docs) for docs in document_lists)):
+            score_lists = self.score_batch(queries, document_lists)
+        return [
+            self._top_k(documents, scores)
+            for documents, scores in zip(document_lists, score_lists)
+        ]
 
     def format_for_prompt(self, results: dict[str, Any]) -> dict[str, Any]:
 
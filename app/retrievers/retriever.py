@@ -1,35 +1,67 @@
 from langchain_qdrant import Qdrant
 from langchain.retrievers import EnsembleRetriever
-from langchain_huggingface import HuggingFaceEmbeddings
 from loguru import logger
+from app.encoders.embeddings import EncoderEmbeddings
+from app.encoders.sparse import SparseEncoder
+from app.qdrant.config import Config
+from app.qdrant.qdrant_store import search_params
+from app.qdrant.tenancy import collection_for_repo, repo_filter
+from app.retrievers.hybrid import HybridRetriever
+
+_UNRESOLVED = object()
+
+
+class _QdrantVectorStore(Qdrant):
+    """
+    Qdrant vector store that resolves the dense vector name on first use. Points
+    of collections that also store sparse vectors come back with named vectors,
+    so their unnamed dense vector is addressed as "" (needed by MMR).
+    """
+
+    @property
+    def vector_name(self):
+        if self._vector_name is _UNRESOLVED:
+            if not self.client.collection_exists(self.collection_name):
+                return None
+            collection = self.client.get_collection(self.collection_name)
+            self._vector_name = "" if collection.config.params.sparse_vectors else None
+        return self._vector_name
+
+    @vector_name.setter
+    def vector_name(self, value):
+        self._vector_name = _UNRESOLVED if value is None else value
 
 
 class RetrieverFactory:
     """Factory class for creating and managing retrievers."""
 
-    def __init__(self, qdrant_client):
+    def __init__(self, qdrant_client, async_qdrant_client=None):
         """
         Initialize the retriever factory.
 
         :param qdrant_client: Qdrant client instance
+        :param async_qdrant_client: Optional async Qdrant client used by async retrieval
         """
         self.qdrant_client = qdrant_client
+        self.async_qdrant_client = async_qdrant_client
         self.embeddings_cache = {}
         self.vectorstore_cache = {}
         self.retriever_cache = {}
+        # repo_id -> keys of cached vector stores of repository-scoped collections
+        self._repo_vectorstores = {}
 
     def get_embeddings(self, model_name):
         """
-        Get HuggingFace embeddings model.
+        Get embeddings backed by the shared encoder registry.
 
         :param str model_name: Name of the embeddings model
-        :return: HuggingFaceEmbeddings: Embeddings model
+        :return: EncoderEmbeddings: Embeddings model
         """
         if model_name not in self.embeddings_cache:
             logger.info(f"Loading embeddings model: {model_name}")
-            self.embeddings_cache[model_name] = HuggingFaceEmbeddings(
-                model_name=model_name, cache_folder="retrievers/cache"
-            )
+            embeddings = EncoderEmbeddings(model_name=model_name)
+            embeddings.encoder  # Warm the shared encoder
+            self.embeddings_cache[model_name] = embeddings
             logger.success(f"Embeddings model {model_name} loaded successfully.")
         return self.embeddings_cache[model_name]
 
@@ -48,10 +80,11 @@ class RetrieverFactory:
             )
             embeddings = self.get_embeddings(embedding_model_name)
 
-            self.vectorstore_cache[cache_key] = Qdrant(
+            self.vectorstore_cache[cache_key] = _QdrantVectorStore(
                 client=self.qdrant_client,
                 collection_name=collection_name,
                 embeddings=embeddings,
+                async_client=self.async_qdrant_client,
             )
             logger.success(
                 f"Vector store created for collection: {collection_name} with embedding model: {embedding_model_name}"
@@ -60,36 +93,122 @@ class RetrieverFactory:
         return self.vectorstore_cache[cache_key]
 
     def get_retriever(
-        self, collection_name, embedding_model_name, search_type="mmr", k=5, **kwargs
+        self,
+        collection_name,
+        embedding_model_name,
+        search_type="mmr",
+        k=5,
+        repo_id=None,
+        hnsw_ef=None,
+        oversampling=None,
+        rescore=None,
+        **kwargs,
     ):
         """
         Get a retriever for a collection.
-        :param str collection_name: Name of the Qdrant collection
+        :param str collection_name: Name of the Qdrant collection (base name when scoped to a repository)
         :param str embedding_model_name: Name of the embeddings model
-        :param str search_type: Type of search (e.g., "mmr")
+        :param str search_type: Type of search (e.g., "mmr"), or "hybrid" to fuse dense and sparse search
         :param int k: Number of documents to retrieve
+        :param str repo_id: Only retrieve documents of this repository
+        :param int hnsw_ef: HNSW candidate list size (higher is slower but more accurate)
+        :param float oversampling: Candidates fetched per result from quantized vectors
+        :param bool rescore: Whether to rescore quantized candidates with the original vectors
         :param dict kwargs: Additional search parameters
         :return: Retriever instance
         """
-        cache_key = f"{collection_name}_{embedding_model_name}_{search_type}_{k}"
+        # Metrics are labelled by the base name, whatever the tenancy mode
+        metadata = {"collection": collection_name}
+        if repo_id is not None:
+            collection_name = collection_for_repo(collection_name, repo_id)
+
+        params = search_params(hnsw_ef, oversampling, rescore)
+        cache_key = (
+            collection_name,
+            embedding_model_name,
+            search_type,
+            k,
+            repo_id,
+            hnsw_ef,
+            oversampling,
+            rescore,
+            # Remaining search parameters, e.g. prefetch_limit, fetch_k or lambda_mult
+            tuple(sorted((name, repr(value)) for name, value in kwargs.items())),
+        )
 
         if cache_key not in self.retriever_cache:
             logger.info(
-                f"Creating retriever for collection: {collection_name} with embedding model: {embedding_model_name}, search type: {search_type}, k: {k}"
-            )
-            vectorstore = self.get_vectorstore(collection_name, embedding_model_name)
-
-            search_kwargs = {"k": k, **kwargs}
-
-            self.retriever_cache[cache_key] = vectorstore.as_retriever(
-                search_type=search_type, search_kwargs=search_kwargs
+                f"Creating retriever for collection: {collection_name} with embedding model: {embedding_model_name}, search type: {search_type}, k: {k}, repo: {repo_id}"
             )
+            search_filter = repo_filter(repo_id)
+            if search_type == "hybrid":
+                self.retriever_cache[cache_key] = HybridRetriever(
+                    client=self.qdrant_client,
+                    async_client=self.async_qdrant_client,
+                    collection_name=collection_name,
+                    embeddings=self.get_embeddings(embedding_model_name),
+                    sparse_encoder=SparseEncoder(),
+                    sparse_vector_name=Config.get("hybrid.sparse_vector_name"),
+                    k=k,
+                    prefetch_limit=kwargs.get(
+                        "prefetch_limit", Config.get("hybrid.prefetch_limit")
+                    ),
+                    search_filter=search_filter,
+                    search_params=params,
+                    metadata=metadata,
+                )
+            else:
+                vectorstore = self.get_vectorstore(
+                    collection_name, embedding_model_name
+                )
+                # Resolved now rather than by the first search, possibly on an event loop
+                vectorstore.vector_name
+                if collection_name != metadata["collection"]:
+                    self._repo_vectorstores.setdefault(repo_id, set()).add(
+                        f"{collection_name}_{embedding_model_name}"
+                    )
+
+                search_kwargs = {"k": k, **kwargs}
+                if search_filter is not None:
+                    search_kwargs["filter"] = search_filter
+                if params is not None:
+                    search_kwargs["search_params"] = params
+
+                self.retriever_cache[cache_key] = vectorstore.as_retriever(
+                    search_type=search_type,
+                    search_kwargs=search_kwargs,
+                    metadata=metadata,
+                )
             logger.success(
-                f"Retriever created for collection: {collection_name} with embedding model: {embedding_model_name}, search type: {search_type}, k: {k}"
+                f"Retriever created for collection: {collection_name} with embedding model: {embedding_model_name}, search type: {search_type}, k: {k}, repo: {repo_id}"
             )
 
         return self.retriever_cache[cache_key]
 
+    def clear_cache(self, keep_embeddings=False):
+        """
+        Clear cached vector stores and retrievers.
+
+        :param bool keep_embeddings: Whether to keep loaded embeddings models
+        """
+        self.vectorstore_cache = {}
+        self.retriever_cache = {}
+        self._repo_vectorstores = {}
+        if not keep_embeddings:
+            self.embeddings_cache = {}
+
+    def evict(self, repo_id):
+        """
+        Drop the cached retrievers of a repository, and the vector stores of its
+        own collections.
+
+        :param str repo_id: Repository identifier
+        """
+        for cache_key in [key for key in self.retriever_cache if key[4] == repo_id]:
+            del self.retriever_cache[cache_key]
+        for cache_key in self._repo_vectorstores.pop(repo_id, ()):
+            self.vectorstore_cache.pop(cache_key, None)
+
     @staticmethod
     def create_ensemble_retriever(retrievers, weights=None):
         """
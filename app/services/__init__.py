@@ -0,0 +1,3 @@
+from app.services.query_service import QueryService
+
+__all__ = ["QueryService"]
@@ -0,0 +1,199 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from app.encoders.encoder import get_text_encoder
+from app.telemetry import record_cache_lookups
+
+
+class _CacheEntry:
+    __slots__ = ("embedding", "answer", "created_at")
+
+    def __init__(self, embedding, answer, created_at):
+        self.embedding = embedding
+        self.answer = answer
+        self.created_at = created_at
+
+
+class SemanticAnswerCache:
+    """
+    Cache of answers per repository and index version. A query hits the cache
+    when its text-encoder embedding is within a cosine similarity threshold of a
+    previously answered query, so near-duplicate questions skip retrieval,
+    reranking and the LLM call.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold=0.95,
+        ttl_seconds=3600,
+        max_entries_per_repo=512,
+        enabled=True,
+    ):
+        """
+        :param float similarity_threshold: Minimum cosine similarity for a hit
+        :param float ttl_seconds: Seconds an answer stays valid
+        :param int max_entries_per_repo: Entries kept per repository, least recently used are evicted
+        :param bool enabled: Whether answers are cached at all
+        """
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_repo = max_entries_per_repo
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._repos = {}  # repo_id -> (index version, OrderedDict of entries)
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def _normalize(query):
+        return " ".join(query.lower().split())
+
+    @staticmethod
+    def embed(query):
+        """
+        Embed a query with the shared text encoder.
+
+        :param str query: User query
+        :return np.ndarray: Normalized embedding
+        """
+        return get_text_encoder().encode(
+            [query], normalize_embeddings=True, show_progress_bar=False
+        )[0]
+
+    @staticmethod
+    def embed_many(queries):
+        """
+        Embed several queries in one encoder call.
+
+        :param list queries: User queries
+        :return np.ndarray: Normalized embeddings, one row per query
+        """
+        return get_text_encoder().encode(
+            list(queries), normalize_embeddings=True, show_progress_bar=False
+        )
+
+    def _entries(self, repo_id, index_version):
+        version, entries = self._repos.get(repo_id, (None, None))
+        if entries is None or version != index_version:
+            if entries:
+                self._stats["invalidations"] += len(entries)
+            entries = OrderedDict()
+            self._repos[repo_id] = (index_version, entries)
+        return entries
+
+    def _expire(self, entries, now):
+        expired = [
+            key
+            for key, entry in entries.items()
+            if now - entry.created_at > self.ttl_seconds
+        ]
+        for key in expired:
+            del entries[key]
+        self._stats["expirations"] += len(expired)
+
+    def get(self, query, repo_id, index_version, embedding=None):
+        """
+        Look up the answer of the same or a similar query.
+
+        :param str query: User query
+        :param str repo_id: Repository identifier
+        :param index_version: Version of the repository's index (e.g. the indexed commit)
+        :param np.ndarray embedding: Query embedding, computed when needed if omitted
+        :return tuple: (cached answer or None, query embedding or None)
+        """
+        if not self.enabled:
+            return None, embedding
+
+        key = self._normalize(query)
+        with self._lock:
+            entries = self._entries(repo_id, index_version)
+            self._expire(entries, time.time())
+
+            entry = entries.get(key)
+            if entry is not None:
+                entries.move_to_end(key)
+                self._stats["hits"] += 1
+                record_cache_lookups("answer", 1, 0)
+                return entry.answer, embedding
+            if not entries:
+                self._stats["misses"] += 1
+                record_cache_lookups("answer", 0, 1)
+                return None, embedding
+            keys = list(entries)
+            matrix = np.vstack([entries[k].embedding for k in keys])
+
+        if embedding is None:
+            embedding = self.embed(query)
+        scores = matrix @ embedding
+        best = int(np.argmax(scores))
+
+        with self._lock:
+            entries = self._entries(repo_id, index_version)
+            entry = entries.get(keys[best])
+            if entry is not None and scores[best] >= self.similarity_threshold:
+                entries.move_to_end(keys[best])
+                self._stats["hits"] += 1
+                record_cache_lookups("answer", 1, 0)
+                return entry.answer, embedding
+            self._stats["misses"] += 1
+        record_cache_lookups("answer", 0, 1)
+        return None, embedding
+
+    def put(self, query, repo_id, index_version, answer, embedding=None):
+        """
+        Store an answer.
+
+        :param str query: User query
+        :param str repo_id: Repository identifier
+        :param index_version: Version of the repository's index
+        :param str answer: Answer to cache
+        :param np.ndarray embedding: Query embedding, computed if omitted
+        """
+        if not self.enabled:
+            return
+        if embedding is None:
+            embedding = self.embed(query)
+
+        key = self._normalize(query)
+        with self._lock:
+            entries = self._entries(repo_id, index_version)
+            entries[key] = _CacheEntry(embedding, answer, time.time())
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries_per_repo:
+                entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, repo_id=None):
+        """
+        Drop cached answers, e.g. after a re-index.
+
+        :param str repo_id: Only drop this repository's answers (None for all)
+        """
+        with self._lock:
+            repo_ids = list(self._repos) if repo_id is None else [repo_id]
+            for key in repo_ids:
+                _, entries = self._repos.pop(key, (None, None))
+                if entries:
+                    self._stats["invalidations"] += len(entries)
+
+    def stats(self):
+        """
+        Get hit-rate metrics.
+
+        :return dict: Counters, hit rate and number of cached entries
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = sum(len(entries) for _, entries in self._repos.values())
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,70 @@
+import copy
+import os
+
+from app.config.config import data_path
+
+DEFAULT_QUERY_SERVICE_CONFIG = {
+    "llm": {
+        "model": "gpt-4o",
+        "temperature": 0,
+        "max_retries": 2,
+        # Report token usage on streamed answers too
+        "stream_usage": True,
+    },
+    "http": {
+        "max_connections": 20,
+        "max_keepalive_connections": 10,
+        "timeout": 60.0,
+    },
+    "retrievers": {
+        "md": {
+            "collection_name": "md_collection",
+            "embedding_model_name": "all-MiniLM-L6-v2",
+            # Dense and BM25 sparse results fused by Qdrant ("mmr" for dense only)
+            "search_type": "hybrid",
+        },
+        "code": {
+            "collection_name": "code_collection",
+            "embedding_model_name": "microsoft/codebert-base",
+            "search_type": "hybrid",
+        },
+    },
+    # Repositories whose prebuilt chains and retrievers are kept warm
+    "max_cached_repos": 64,
+    "batch": {
+        # Questions accepted by one /get_answers request
+        "max_queries": int(os.getenv("BATCH_MAX_QUERIES", 256)),
+        # LLM calls (classification and generation) in flight per batch
+        "llm_concurrency": int(os.getenv("BATCH_LLM_CONCURRENCY", 8)),
+    },
+    "answer_cache": {
+        "enabled": True,
+        # Cosine similarity above which a previous answer is reused
+        "similarity_threshold": 0.95,
+        "ttl_seconds": 3600,
+        "max_entries_per_repo": 512,
+    },
+    "reranker": {
+        "model_name": "BAAI/bge-reranker-base",
+        "max_length": 512,
+        "top_k": 3,
+        # 'torch', 'onnx' (ONNX Runtime) or 'int8' (dynamically quantized)
+        "backend": os.getenv("RERANKER_BACKEND", "torch"),
+        # Branch, tag or commit of the model on the Hub (None for the default branch)
+        "revision": os.getenv("RERANKER_REVISION") or None,
+        "batch_size": 32,
+        # (query, chunk) scores kept for repeated queries
+        "cache_size": 4096,
+        "onnx_cache_dir": os.getenv(
+            "RERANKER_ONNX_CACHE", data_path("rerankers", "onnx")
+        ),
+    },
+}
+
+
+def get_query_service_config():
+    """
+    Get a copy of the query service configuration.
+    :return: dict: Configuration settings for the query service
+    """
+    return copy.deepcopy(DEFAULT_QUERY_SERVICE_CONFIG)
@@ -0,0 +1,453 @@
+import asyncio
+import threading
+from collections import OrderedDict
+
+import httpx
+from langchain.retrievers import EnsembleRetriever
+from langchain_openai import ChatOpenAI
+from loguru import logger
+
+from app.chains import QAChainBuilder
+from app.retrievers import (
+    RetrieverFactory,
+    QueryClassifier,
+    EmbeddingQueryClassifier,
+    Reranker,
+)
+from app.retrievers.config import get_classifier_config
+from app.ingestion.state import IndexStateStore
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.config import get_query_service_config
+from app.telemetry import MetricsCallbackHandler
+from app.utils.answer_questions import answer_question
+
+
+async def _aretrieve_batch(retriever, queries):
+    """
+    Retrieve documents for several queries, falling back to a worker thread for
+    vector stores without an async client (e.g. local Qdrant).
+    """
+    try:
+        return await retriever.abatch(queries)
+    except NotImplementedError:
+        return await asyncio.to_thread(retriever.batch, queries)
+
+
+class QueryService:
+    """Process-wide holder for warm models, retrievers and prebuilt QA chains."""
+
+    def __init__(
+        self,
+        qdrant_client,
+        openai_api_key=None,
+        config=None,
+        state_store=None,
+        async_qdrant_client=None,
+    ):
+        """
+        Initialize the query service. Models are loaded by :meth:`start`.
+
+        :param qdrant_client: Qdrant client instance
+        :param str openai_api_key: OpenAI API key used by the LLM client
+        :param dict config: Optional configuration (defaults to DEFAULT_QUERY_SERVICE_CONFIG)
+        :param IndexStateStore state_store: Store of indexed commits, used as index versions
+        :param async_qdrant_client: Async Qdrant client used by :meth:`aanswer`
+        """
+        self.qdrant_client = qdrant_client
+        self.async_qdrant_client = async_qdrant_client
+        self.openai_api_key = openai_api_key
+        self.config = config or get_query_service_config()
+        self.state_store = state_store or IndexStateStore()
+        self.answer_cache = SemanticAnswerCache(**self.config["answer_cache"])
+
+        self._lock = threading.RLock()
+        self._http_client = None
+        self._http_async_client = None
+        self.metrics_callback = MetricsCallbackHandler()
+
+        self.llm = None
+        self.classifier = None
+        self.reranker = None
+        self.chain_builder = None
+        self.generation_chain = None
+        self.retriever_factory = None
+        self._chains = OrderedDict()  # repo_id -> (dynamic chain, static chain)
+
+    def start(self):
+        """
+        Load the LLM client, reranker, embeddings and query classifier. Chains are
+        built per repository on first use.
+
+        :return QueryService: Self for method chaining
+        """
+        with self._lock:
+            logger.info("Starting query service")
+            http_config = self.config["http"]
+            limits = httpx.Limits(
+                max_connections=http_config["max_connections"],
+                max_keepalive_connections=http_config["max_keepalive_connections"],
+            )
+            self._http_client = httpx.Client(
+                limits=limits, timeout=http_config["timeout"]
+            )
+            self._http_async_client = httpx.AsyncClient(
+                limits=limits, timeout=http_config["timeout"]
+            )
+
+            self.llm = ChatOpenAI(
+                openai_api_key=self.openai_api_key,
+                http_client=self._http_client,
+                http_async_client=self._http_async_client,
+                callbacks=[self.metrics_callback],
+                **self.config["llm"],
+            )
+            self.reranker = Reranker(**self.config["reranker"])
+            self.chain_builder = QAChainBuilder(self.llm)
+            self.generation_chain = self.chain_builder.build_generation().with_config(
+                callbacks=[self.metrics_callback]
+            )
+            self.retriever_factory = RetrieverFactory(
+                self.qdrant_client, self.async_qdrant_client
+            )
+            for retriever_config in self.config["retrievers"].values():
+                self.retriever_factory.get_embeddings(
+                    retriever_config["embedding_model_name"]
+                )
+
+            if get_classifier_config()["mode"] == "llm":
+                self.classifier = QueryClassifier(self.llm)
+            else:
+                self.classifier = EmbeddingQueryClassifier().warm_up()
+            logger.success("Query service started")
+        return self
+
+    def get_retrievers(self, repo_id):
+        """
+        Get the repository-scoped markdown and code retrievers.
+
+        :param str repo_id: Repository identifier
+        :return list: [markdown retriever, code retriever]
+        """
+        retrievers_config = self.config["retrievers"]
+        return [
+            self.retriever_factory.get_retriever(
+                repo_id=repo_id, **retrievers_config["md"]
+            ),
+            self.retriever_factory.get_retriever(
+                repo_id=repo_id, **retrievers_config["code"]
+            ),
+        ]
+
+    def _build_chains(self, repo_id):
+        """
+        Create repository-scoped retrievers and build the dynamic and static chains.
+
+        :param str repo_id: Repository identifier
+        :return tuple: (dynamic chain, static chain)
+        """
+
+        retrievers = self.get_retrievers(repo_id)
+
+        ensemble_retriever = self.retriever_factory.create_ensemble_retriever(
+            retrievers=retrievers, weights=[0.5, 0.5]
+        )
+
+        dynamic_chain = self.chain_builder.build_with_dynamic_weights(
+            retrievers=retrievers,
+            classifier=self.classifier,
+            reranker=self.reranker,
+        )
+        static_chain = self.chain_builder.build_with_ensemble(
+            ensemble_retriever=ensemble_retriever, reranker=self.reranker
+        )
+        # Inherited by the retrievers, so each collection search is timed
+        config = {"callbacks": [self.metrics_callback]}
+        return dynamic_chain.with_config(config), static_chain.with_config(config)
+
+    def get_chains(self, repo_id):
+        """
+        Get the prebuilt chains of a repository, building them on first use.
+
+        :param str repo_id: Repository identifier
+        :return tuple: (dynamic chain, static chain)
+        """
+        with self._lock:
+            if repo_id in self._chains:
+                self._chains.move_to_end(repo_id)
+                return self._chains[repo_id]
+
+            chains = self._build_chains(repo_id)
+            self._chains[repo_id] = chains
+            while len(self._chains) > self.config["max_cached_repos"]:
+                evicted, _ = self._chains.popitem(last=False)
+                self.retriever_factory.evict(evicted)
+            return chains
+
+    def refresh(self, repo_id=None):
+        """
+        Rebuild retrievers and chains, e.g. after a re-index.
+        Loaded embeddings, the reranker and the LLM client are kept warm.
+
+        :param str repo_id: Only refresh this repository (None for all)
+        :return QueryService: Self for method chaining
+        """
+        with self._lock:
+            if repo_id is not None:
+                logger.info(f"Refreshing query service chains of {repo_id}")
+                self._chains.pop(repo_id, None)
+                self.retriever_factory.evict(repo_id)
+            else:
+                logger.info("Refreshing query service retrievers and chains")
+                self.retriever_factory.clear_cache(keep_embeddings=True)
+                self._chains = OrderedDict()
+            self.answer_cache.invalidate(repo_id)
+        return self
+
+    def get_index_version(self, repo_id):
+        """
+        Get the version of a repository's index, which scopes cached answers.
+        It is read on every lookup, so re-indexing by shard workers or other
+        processes invalidates this process's cached answers too.
+
+        :param str repo_id: Repository identifier
+        :return str | None: Last indexed commit, or None if unknown
+        """
+        return self.state_store.get_last_commit(repo_id, "main")
+
+    def _lookup_answer(self, query, repo_id):
+        """
+        Get a repository's index version and the cached answer of a query. Both
+        read SQLite or the embedding model, so async callers run this in a thread.
+
+        :return tuple: (index version, cached answer or None, query embedding)
+        """
+        index_version = self.get_index_version(repo_id)
+        cached, embedding = self.answer_cache.get(query, repo_id, index_version)
+        return index_version, cached, embedding
+
+    def _embed_batch(self, queries, repo_id):
+        """
+        Get a repository's index version and the embeddings of a batch of queries
+        for answer cache lookups.
+
+        :return tuple: (index version, embedding or None per query)
+        """
+        index_version = self.get_index_version(repo_id)
+        embeddings = [None] * len(queries)
+        if self.answer_cache.enabled and queries:
+            embeddings = self.answer_cache.embed_many(queries)
+        return index_version, embeddings
+
+    def answer(self, query, repo_id):
+        """
+        Answer a question about a repository with its prebuilt chains, reusing
+        the cached answer of the same or a near-duplicate question.
+
+        :param str query: User query
+        :param str repo_id: Repository identifier
+        :return str: Answer to the question
+        """
+        index_version = self.get_index_version(repo_id)
+        cached, embedding = self.answer_cache.get(query, repo_id, index_version)
+        if cached is not None:
+            logger.info(f"Answer cache hit for {repo_id}")
+            return cached
+
+        dynamic_chain, static_chain = self.get_chains(repo_id)
+        answer = answer_question(
+            query, dynamic_chain=dynamic_chain, static_chain=static_chain
+        )
+        self.answer_cache.put(query, repo_id, index_version, answer, embedding)
+        return answer
+
+    async def aanswer(self, query, repo_id):
+        """
+        Answer a question without blocking the event loop. Classification and
+        both collection searches run concurrently.
+
+        :param str query: User query
+        :param str repo_id: Repository identifier
+        :return str: Answer to the question
+        """
+        index_version, cached, embedding = await asyncio.to_thread(
+            self._lookup_answer, query, repo_id
+        )
+        if cached is not None:
+            logger.info(f"Answer cache hit for {repo_id}")
+            return cached
+
+        # Building a cold repository's retrievers makes blocking Qdrant calls
+        dynamic_chain, static_chain = await asyncio.to_thread(self.get_chains, repo_id)
+        chain = dynamic_chain if dynamic_chain else static_chain
+        answer = await chain.ainvoke(query)
+        await asyncio.to_thread(
+            self.answer_cache.put, query, repo_id, index_version, answer, embedding
+        )
+        return answer
+
+    async def astream_answer(self, query, repo_id):
+        """
+        Stream the answer to a question about a repository as it is generated.
+        A cached answer is yielded as a single chunk.
+
+        :param str query: User query
+        :param str repo_id: Repository identifier
+        :return: Async generator of answer text chunks
+        """
+        index_version, cached, embedding = await asyncio.to_thread(
+            self._lookup_answer, query, repo_id
+        )
+        if cached is not None:
+            logger.info(f"Answer cache hit for {repo_id}")
+            yield cached
+            return
+
+        dynamic_chain, static_chain = await asyncio.to_thread(self.get_chains, repo_id)
+        chain = dynamic_chain if dynamic_chain else static_chain
+        chunks = []
+        async for chunk in chain.astream(query):
+            chunks.append(chunk)
+            yield chunk
+
+        # Only complete answers are cached
+        await asyncio.to_thread(
+            self.answer_cache.put,
+            query,
+            repo_id,
+            index_version,
+            "".join(chunks),
+            embedding,
+        )
+
+    async def aanswer_batch(self, queries, repo_id):
+        """
+        Answer many questions about a repository at once. Uncached questions are
+        embedded together, searched with one batch request per collection,
+        reranked with one cross-encoder call and answered by the LLM with
+        bounded concurrency.
+
+        :param list queries: User queries
+        :param str repo_id: Repository identifier
+        :return list: Per query, in order, {"query", "answer"} or {"query", "error"}
+        """
+        index_version, embeddings = await asyncio.to_thread(
+            self._embed_batch, queries, repo_id
+        )
+        results = [None] * len(queries)
+
+        pending = []
+        for i, (query, embedding) in enumerate(zip(queries, embeddings)):
+            if not query.strip():
+                results[i] = {"query": query, "error": "Query is required"}
+                continue
+            cached, _ = self.answer_cache.get(query, repo_id, index_version, embedding)
+            if cached is not None:
+                results[i] = {"query": query, "answer": cached}
+            else:
+                pending.append(i)
+        if pending:
+            logger.info(
+                f"Answering {len(pending)} of {len(queries)} questions for {repo_id}, "
+                f"{len(queries) - len(pending)} answered from cache"
+            )
+
+        # Repeated questions are answered once
+        positions = {}
+        for i in pending:
+            positions.setdefault(queries[i], []).append(i)
+
+        answers = await self._aanswer_uncached(list(positions), repo_id)
+        for (query, indices), answer in zip(positions.items(), answers):
+            if isinstance(answer, Exception):
+                logger.error(f"Error answering batch question '{query}': {answer}")
+                for i in indices:
+                    results[i] = {"query": query, "error": str(answer)}
+                continue
+            for i in indices:
+                results[i] = {"query": query, "answer": answer}
+            self.answer_cache.put(
+                query, repo_id, index_version, answer, embeddings[indices[0]]
+            )
+        return results
+
+    def _batch_retrievers(self, repo_id):
+        """Get a repository's retrievers, keeping it in the chain LRU that bounds them."""
+        self.get_chains(repo_id)
+        return self.get_retrievers(repo_id)
+
+    async def _aanswer_uncached(self, queries, repo_id):
+        """
+        Retrieve, rerank and generate answers for a batch of queries.
+
+        :return list: Answer or exception per query
+        """
+        if not queries:
+            return []
+        retrievers = await asyncio.to_thread(self._batch_retrievers, repo_id)
+        semaphore = asyncio.Semaphore(self.config["batch"]["llm_concurrency"])
+
+        async def classify(query):
+            async with semaphore:
+                return await self.classifier.aget_retriever_weights(query)
+
+        weights, *doc_lists = await asyncio.gather(
+            asyncio.gather(*(classify(q) for q in queries), return_exceptions=True),
+            *(_aretrieve_batch(retriever, queries) for retriever in retrievers),
+            return_exceptions=True,
+        )
+
+        answers = [None] * len(queries)
+        contexts = {}  # query index -> fused documents
+        # A failed collection search fails every query, a failed classification one
+        search_error = next((r for r in doc_lists if isinstance(r, Exception)), None)
+        for i in range(len(queries)):
+            error = search_error
+            if error is None and isinstance(weights[i], Exception):
+                error = weights[i]
+            if error is not None:
+                answers[i] = error
+                continue
+            ensemble = EnsembleRetriever(retrievers=retrievers, weights=weights[i])
+            contexts[i] = ensemble.weighted_reciprocal_rank(
+                [doc_list[i] for doc_list in doc_lists]
+            )
+
+        indices = list(contexts)
+        document_lists = [contexts[i] for i in indices]
+        if self.reranker is not None:
+            try:
+                document_lists = await asyncio.to_thread(
+                    self.reranker.rerank_batch,
+                    [queries[i] for i in indices],
+                    document_lists,
+                )
+            except Exception as e:
+                for i in indices:
+                    answers[i] = e
+                return answers
+
+        inputs = [
+            {
+                "context": "\n\n".join(doc.page_content for doc in documents),
+                "question": queries[i],
+            }
+            for i, documents in zip(indices, document_lists)
+        ]
+        generated = await self.generation_chain.abatch(
+            inputs,
+            config={"max_concurrency": self.config["batch"]["llm_concurrency"]},
+            return_exceptions=True,
+        )
+        for i, answer in zip(indices, generated):
+            answers[i] = answer
+        return answers
+
+    async def aclose(self):
+        """Release pooled HTTP connections."""
+        with self._lock:
+            http_client, self._http_client = self._http_client, None
+            http_async_client, self._http_async_client = self._http_async_client, None
+        if http_client is not None:
+            http_client.close()
+        if http_async_client is not None:
+            await http_async_client.aclose()
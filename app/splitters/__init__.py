@@ -1,7 +1,13 @@
+from .python_splitter import PythonASTSplitter
 from .text_splitter import (
     TextSplitterFactory,
     get_python_splitter,
     get_markdown_splitter,
 )
 
-__all__ = ["TextSplitterFactory", "get_python_splitter", "get_markdown_splitter"]
+__all__ = [
+    "PythonASTSplitter",
+    "TextSplitterFactory",
+    "get_python_splitter",
+    "get_markdown_splitter",
+]
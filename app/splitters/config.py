@@ -1,7 +1,10 @@
 DEFAULT_CONFIG = {
     "python": {
         "chunk_size": 2000,
+        # Only used when a file does not parse or a statement exceeds chunk_size
         "chunk_overlap": 200,
+        # Chunk along functions and classes instead of characters
+        "syntax_aware": True,
     },
     "markdown": {
         "chunk_size": 2000,
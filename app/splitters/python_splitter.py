@@ -0,0 +1,232 @@
+import ast
+import copy
+import re
+
+from langchain.text_splitter import (
+    Language,
+    RecursiveCharacterTextSplitter,
+    TextSplitter,
+)
+from langchain_core.documents import Document
+
+DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+MODULE_SYMBOL = "<module>"
+
+# Lines as counted by the ast module: '\n' ends a line, '\r' stays in it
+_LINE = re.compile(r"[^\n]*\n|[^\n]+\Z")
+
+
+def module_imports(tree):
+    """
+    Get the modules imported at the top level of a module.
+
+    :param ast.Module tree: Parsed module
+    :return list: Sorted module names, relative ones with their leading dots
+    """
+    imports = set()
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.add("." * node.level + (node.module or ""))
+    return sorted(imports)
+
+
+class _Source:
+    """Source lines with their character offsets."""
+
+    def __init__(self, text):
+        self.lines = _LINE.findall(text)
+        self.offsets = [0]
+        for line in self.lines:
+            self.offsets.append(self.offsets[-1] + len(line))
+
+    def length(self, start, end):
+        return self.offsets[end] - self.offsets[start - 1]
+
+    def text(self, start, end):
+        return "".join(self.lines[start - 1 : end])
+
+
+def _start_line(node):
+    """First line of a statement, including the decorators of a definition."""
+    decorators = getattr(node, "decorator_list", [])
+    return min([node.lineno] + [decorator.lineno for decorator in decorators])
+
+
+class PythonASTSplitter(TextSplitter):
+    """
+    Splits Python source along its syntax tree: every function, class and run
+    of module-level statements becomes one chunk, together with the comments
+    preceding it. Classes larger than the chunk size are split into their
+    methods, functions into groups of statements repeating the signature.
+    Chunks carry the qualified name, kind and line range of their symbol and
+    the modules imported by the file. Files that do not parse are split by the
+    fallback splitter without symbol metadata.
+    """
+
+    def __init__(self, chunk_size=2000, fallback_splitter=None, **kwargs):
+        """
+        :param int chunk_size: Maximum chunk size in characters
+        :param TextSplitter fallback_splitter: Splitter for unparsable files and
+            single statements larger than the chunk size
+        """
+        super().__init__(chunk_size=chunk_size, chunk_overlap=0, **kwargs)
+        self._fallback = fallback_splitter or (
+            RecursiveCharacterTextSplitter.from_language(
+                Language.PYTHON, chunk_size=chunk_size, chunk_overlap=0
+            )
+        )
+
+    def split_text(self, text):
+        return [content for content, _ in self.split_source(text)]
+
+    def create_documents(self, texts, metadatas=None):
+        documents = []
+        for i, text in enumerate(texts):
+            metadata = metadatas[i] if metadatas else {}
+            for content, chunk_metadata in self.split_source(text):
+                documents.append(
+                    Document(
+                        page_content=content,
+                        metadata={**copy.deepcopy(metadata), **chunk_metadata},
+                    )
+                )
+        return documents
+
+    def split_source(self, text):
+        """
+        Split Python source into chunks.
+
+        :param str text: Source code
+        :return list: (content, metadata) per chunk
+        """
+        try:
+            tree = ast.parse(text)
+        except (SyntaxError, ValueError):
+            return [(chunk, {}) for chunk in self._fallback.split_text(text)]
+
+        source = _Source(text)
+        end = len(source.lines)
+        chunks = []
+        if tree.body:
+            self._split_body(tree.body, source, 1, end, "", False, chunks)
+        else:
+            # Only comments
+            self._emit([(1, end)], source, MODULE_SYMBOL, "module", chunks)
+
+        imports = module_imports(tree)
+        for _, metadata in chunks:
+            metadata["imports"] = imports
+        return chunks
+
+    @staticmethod
+    def _ranges(statements, start, end):
+        """
+        Line ranges of consecutive statements covering start to end. Comments
+        and blank lines belong to the following statement, trailing ones to the
+        last.
+        """
+        ranges = []
+        for i, node in enumerate(statements):
+            node_end = end if i == len(statements) - 1 else node.end_lineno
+            ranges.append((start, node_end))
+            start = node_end + 1
+        return ranges
+
+    def _split_body(self, statements, source, start, end, scope, in_class, chunks):
+        """Emit the definitions of a module or class body and the runs between them."""
+        symbol = scope or MODULE_SYMBOL
+        kind = "class" if in_class else "module"
+        pending = []
+        for node, (node_start, node_end) in zip(
+            statements, self._ranges(statements, start, end)
+        ):
+            if isinstance(node, DEFINITIONS):
+                self._emit(pending, source, symbol, kind, chunks)
+                pending = []
+                self._split_definition(
+                    node, source, node_start, node_end, scope, in_class, chunks
+                )
+            else:
+                pending.append((node_start, node_end))
+        self._emit(pending, source, symbol, kind, chunks)
+
+    def _split_definition(self, node, source, start, end, scope, in_class, chunks):
+        name = f"{scope}.{node.name}" if scope else node.name
+        if isinstance(node, ast.ClassDef):
+            kind = "class"
+        else:
+            kind = "method" if in_class else "function"
+
+        if source.length(start, end) <= self._chunk_size:
+            self._emit([(start, end)], source, name, kind, chunks)
+        elif isinstance(node, ast.ClassDef):
+            # The class statement, docstring and attributes become their own chunks
+            self._split_body(node.body, source, start, end, name, True, chunks)
+        else:
+            # Every part of the body repeats the decorators and signature
+            body_start = node.body[0].lineno
+            signature = (
+                source.text(_start_line(node), body_start - 1)
+                if body_start > node.lineno
+                else ""
+            )
+            ranges = self._ranges(node.body, body_start, end)
+            ranges[0] = (start, ranges[0][1])
+            self._emit(ranges, source, name, kind, chunks, signature)
+
+    def _emit(self, ranges, source, symbol, kind, chunks, prefix=""):
+        """
+        Group consecutive line ranges into chunks within the chunk size. Ranges
+        too large on their own are split by the fallback splitter.
+        """
+        if not ranges:
+            return
+        first = ranges[0][0]
+        groups = []
+        for start, end in ranges:
+            context = len(prefix) if groups and groups[-1][0] > first else 0
+            if (
+                groups
+                and context + source.length(groups[-1][0], end) <= self._chunk_size
+            ):
+                groups[-1] = (groups[-1][0], end)
+            else:
+                groups.append((start, end))
+
+        for start, end in groups:
+            text = source.text(start, end)
+            if not text.strip():
+                continue
+            context = prefix if start > first else ""
+            if len(context) + len(text) <= self._chunk_size:
+                chunks.append(
+                    (context + text, self._metadata(symbol, kind, start, end))
+                )
+                continue
+            for piece, piece_start, piece_end in self._pieces(text, start):
+                chunks.append(
+                    (piece, self._metadata(symbol, kind, piece_start, piece_end))
+                )
+
+    def _pieces(self, text, start):
+        """Split text with the fallback splitter, locating each piece's lines."""
+        pieces, cursor = [], 0
+        for piece in self._fallback.split_text(text):
+            index = text.find(piece, cursor)
+            if index < 0:
+                index = cursor
+            piece_start = start + text.count("\n", 0, index)
+            pieces.append((piece, piece_start, piece_start + piece.count("\n")))
+            cursor = index + 1
+        return pieces
+
+    @staticmethod
+    def _metadata(symbol, kind, start, end):
+        return {
+            "symbol": symbol,
+            "symbol_kind": kind,
+            "start_line": start,
+            "end_line": end,
+        }
@@ -1,6 +1,7 @@
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.text_splitter import Language
 from .config import get_config
+from .python_splitter import PythonASTSplitter
 
 
 class TextSplitterFactory:
@@ -39,12 +40,20 @@ class TextSplitterFactory:
 
 def get_python_splitter(custom_config=None):
     """
-    Get a Python text splitter with default or custom configuration.
+    Get a Python text splitter with default or custom configuration. Unless
+    'syntax_aware' is disabled, the splitter chunks along functions and classes
+    and falls back to the recursive splitter for files that do not parse.
 
     :param dict custom_config: Custom configuration to override defaults.
-    :return: RecursiveCharacterTextSplitter: A configured text splitter for the language.
+    :return: TextSplitter: A configured text splitter for the language.
     """
-    return TextSplitterFactory.create_splitter("python", custom_config)
+    fallback = TextSplitterFactory.create_splitter("python", custom_config)
+    config = {**get_config("python"), **(custom_config or {})}
+    if not config.get("syntax_aware"):
+        return fallback
+    return PythonASTSplitter(
+        chunk_size=config["chunk_size"], fallback_splitter=fallback
+    )
 
 
 def get_markdown_splitter(custom_config=None):
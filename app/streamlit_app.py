@@ -1,5 +1,8 @@
+import json
+
 import streamlit as st
 import requests
+import time
 
 st.title("Chat With Repository")
 
@@ -13,8 +16,8 @@ if st.button("Create Knowledge Base"):
         response = requests.post(
             "http://localhost:8000/create_knowledge_base/", json={"url": url}
         )
-        if response.status_code == 200:
-            st.write("Knowledge base created successfully!")
+        if response.status_code == 202:
+            st.session_state["job_id"] = response.json().get("job_id")
         else:
             st.write(f"Status Code: {response.status_code}")
             st.write(f"Response Content: {response.content}")
@@ -26,21 +29,76 @@ if st.button("Create Knowledge Base"):
     else:
         st.write("Please enter a repository URL.")
 
+# Track the running ingestion job
+job_id = st.session_state.get("job_id")
+if job_id:
+    status_placeholder = st.empty()
+    if st.button("Cancel Ingestion"):
+        requests.post(f"http://localhost:8000/jobs/{job_id}/cancel")
+
+    while True:
+        job = requests.get(f"http://localhost:8000/jobs/{job_id}").json()
+        progress = job.get("progress", {})
+        status_placeholder.write(
+            f"Status: {job.get('status')} | stage: {progress.get('stage')} | "
+            f"files: {progress.get('files_loaded')} | "
+            f"chunks encoded: {progress.get('chunks_encoded')}/{progress.get('chunks_total')} | "
+            f"points uploaded: {progress.get('points_uploaded')}"
+        )
+        if job.get("status") in ("succeeded", "failed", "cancelled", None):
+            break
+        time.sleep(1)
+
+    if job.get("status") == "succeeded":
+        st.write("Knowledge base created successfully!")
+    elif job.get("status") == "failed":
+        st.write(f"Error: {job.get('error')}")
+    elif job.get("status") == "cancelled":
+        st.write("Knowledge base creation was cancelled.")
+    else:
+        st.write(f"Error: {job.get('detail')}")
+    del st.session_state["job_id"]
+
 # Query input field
 query = st.text_input("Enter your query:")
 
+
+def stream_answer_tokens(response):
+    """
+    Yield answer tokens from a Server-Sent Events response.
+    :param requests.Response response: Streaming response of /get_answer/stream
+    :return: Generator of answer text chunks
+    """
+    event = None
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            event = None
+            continue
+        if line.startswith("event:"):
+            event = line[len("event:") :].strip()
+        elif line.startswith("data:"):
+            data = json.loads(line[len("data:") :])
+            if event == "error":
+                yield f"\n\nError: {data.get('detail')}"
+                return
+            if event == "done":
+                return
+            yield data.get("token", "")
+
+
 # Get answer button
 if st.button("Get Answer"):
-    if query:
+    if not url:
+        st.write("Please enter a repository URL.")
+    elif query:
         response = requests.post(
-            "http://localhost:8000/get_answer/", json={"query": query}
+            "http://localhost:8000/get_answer/stream",
+            json={"query": query, "repo": url},
+            stream=True,
         )
         if response.status_code == 200:
-            try:
-                answer = response.json().get("answer")
-            except requests.exceptions.JSONDecodeError:
-                answer = response.text  # Fallback to raw response text
-            st.write(answer)
+            # Render tokens as they arrive
+            st.write_stream(stream_answer_tokens(response))
         else:
             st.write(f"Status Code: {response.status_code}")
             st.write(f"Response Content: {response.content}")
@@ -0,0 +1,11 @@
+from app.telemetry.callbacks import MetricsCallbackHandler
+from app.telemetry.metrics import record_cache_lookups, set_ingestion_jobs
+from app.telemetry.tracing import get_tracer, span
+
+__all__ = [
+    "MetricsCallbackHandler",
+    "get_tracer",
+    "record_cache_lookups",
+    "set_ingestion_jobs",
+    "span",
+]
@@ -0,0 +1,95 @@
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from app.telemetry.metrics import LLM_TOKENS, STAGE_ERRORS, STAGE_SECONDS
+from app.telemetry.tracing import get_tracer
+
+
+def _token_usage(response):
+    """Get (prompt, completion) tokens of an LLM result, or None if not reported."""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(
+                getattr(generation, "message", None), "usage_metadata", None
+            )
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+    usage = (response.llm_output or {}).get("token_usage")
+    if usage:
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    return None
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Records LangChain LLM calls and per-collection retrievals as 'llm' and
+    'retrieve' stages, and counts LLM tokens. Retrievers are labelled by the
+    'collection' entry of their metadata; retrievers without it (e.g. the
+    ensemble wrapping them) are not recorded.
+    """
+
+    # Timing only needs the callback to run where the event happens
+    run_inline = True
+
+    def __init__(self):
+        self._runs = {}  # run_id -> (stage, target, start time, span)
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, stage, target):
+        tracer = get_tracer()
+        otel_span = None
+        if tracer is not None:
+            otel_span = tracer.start_span(
+                stage, attributes={"stage": stage, "target": target}
+            )
+        with self._lock:
+            self._runs[run_id] = (stage, target, time.perf_counter(), otel_span)
+
+    def _end(self, run_id, error=None):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return None
+        stage, target, start, otel_span = run
+        STAGE_SECONDS.labels(stage, target).observe(time.perf_counter() - start)
+        if error is not None:
+            STAGE_ERRORS.labels(stage, target).inc()
+        if otel_span is not None:
+            if error is not None:
+                otel_span.record_exception(error)
+            otel_span.end()
+        return target
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id, metadata=None, **kwargs
+    ):
+        self._start(run_id, "llm", (metadata or {}).get("ls_model_name", ""))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, "llm", (metadata or {}).get("ls_model_name", ""))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        model = self._end(run_id)
+        usage = _token_usage(response)
+        if model is None or usage is None:
+            return
+        prompt_tokens, completion_tokens = usage
+        LLM_TOKENS.labels(model, "prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(model, "completion").inc(completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_retriever_start(self, serialized, query, *, run_id, metadata=None, **kwargs):
+        collection = (metadata or {}).get("collection")
+        if collection:
+            self._start(run_id, "retrieve", collection)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
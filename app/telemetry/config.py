@@ -0,0 +1,35 @@
+import copy
+import os
+
+TELEMETRY_CONFIG = {
+    # Export stage spans through OpenTelemetry (requires opentelemetry-sdk)
+    "otel_enabled": os.getenv("OTEL_ENABLED", "false").lower() == "true",
+    "service_name": os.getenv("OTEL_SERVICE_NAME", "chat-with-repo"),
+    # OTLP gRPC collector endpoint; spans are printed to the console when unset
+    "otlp_endpoint": os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"),
+    # Histogram buckets in seconds, from a cache hit up to a full-repository clone
+    "buckets": (
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1.0,
+        2.5,
+        5.0,
+        10.0,
+        30.0,
+        60.0,
+        300.0,
+    ),
+}
+
+
+def get_telemetry_config():
+    """
+    Get a copy of the telemetry configuration.
+    :return: dict: Configuration settings for metrics and tracing
+    """
+    return copy.deepcopy(TELEMETRY_CONFIG)
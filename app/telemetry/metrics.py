@@ -0,0 +1,77 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.telemetry.config import TELEMETRY_CONFIG
+
+# Stage labels: clone, split, encode, upload, classify, retrieve, rerank, llm.
+# The target is the collection (base name) or model a stage ran against, if any.
+STAGE_SECONDS = Histogram(
+    "chat_repo_stage_seconds",
+    "Duration of ingestion and query stages",
+    ["stage", "target"],
+    buckets=TELEMETRY_CONFIG["buckets"],
+)
+STAGE_ERRORS = Counter(
+    "chat_repo_stage_errors_total",
+    "Stage calls that raised an exception",
+    ["stage", "target"],
+)
+STAGE_ITEMS = Counter(
+    "chat_repo_stage_items_total",
+    "Items (chunks, points, documents) processed per stage",
+    ["stage"],
+)
+
+REQUESTS = Counter(
+    "chat_repo_requests_total",
+    "HTTP requests",
+    ["endpoint", "method", "status"],
+)
+REQUEST_SECONDS = Histogram(
+    "chat_repo_request_seconds",
+    "HTTP request duration until the response starts",
+    ["endpoint", "method"],
+    buckets=TELEMETRY_CONFIG["buckets"],
+)
+
+# Caches: answer, embedding, classifier, reranker
+CACHE_LOOKUPS = Counter(
+    "chat_repo_cache_lookups_total",
+    "Cache lookups by result",
+    ["cache", "result"],
+)
+
+LLM_TOKENS = Counter(
+    "chat_repo_llm_tokens_total",
+    "LLM tokens by kind (prompt or completion)",
+    ["model", "kind"],
+)
+
+INGESTION_JOBS = Gauge(
+    "chat_repo_ingestion_jobs",
+    "Ingestion jobs known to the API process by status",
+    ["status"],
+)
+
+
+def record_cache_lookups(cache, hits, misses):
+    """
+    Count cache hits and misses.
+
+    :param str cache: Cache name
+    :param int hits: Number of hits
+    :param int misses: Number of misses
+    """
+    if hits:
+        CACHE_LOOKUPS.labels(cache, "hit").inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels(cache, "miss").inc(misses)
+
+
+def set_ingestion_jobs(counts):
+    """
+    Update the ingestion job gauge.
+
+    :param dict counts: Number of jobs per status
+    """
+    for status, count in counts.items():
+        INGESTION_JOBS.labels(status).set(count)
@@ -0,0 +1,90 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from loguru import logger
+
+from app.telemetry.config import TELEMETRY_CONFIG
+from app.telemetry.metrics import STAGE_ERRORS, STAGE_ITEMS, STAGE_SECONDS
+
+_tracer = None
+_tracer_lock = threading.Lock()
+_tracer_failed = False
+
+
+def _create_tracer(config):
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    if config["otlp_endpoint"]:
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        exporter = OTLPSpanExporter(endpoint=config["otlp_endpoint"])
+    else:
+        exporter = ConsoleSpanExporter()
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": config["service_name"]})
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    return trace.get_tracer("chat-with-repo")
+
+
+def get_tracer():
+    """
+    Get the OpenTelemetry tracer, configured on first use.
+
+    :return: Tracer, or None if span export is disabled or the SDK is not installed
+    """
+    global _tracer, _tracer_failed
+    if not TELEMETRY_CONFIG["otel_enabled"] or _tracer_failed:
+        return None
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None and not _tracer_failed:
+                try:
+                    _tracer = _create_tracer(TELEMETRY_CONFIG)
+                    logger.info("OpenTelemetry span export enabled")
+                except ImportError as e:
+                    _tracer_failed = True
+                    logger.warning(f"OpenTelemetry span export disabled: {e}")
+    return _tracer
+
+
+@contextmanager
+def span(stage, target="", items=None, **attributes):
+    """
+    Time a pipeline stage: the duration is observed in the stage histogram and,
+    when enabled, exported as an OpenTelemetry span.
+
+    :param str stage: Stage name (e.g. 'encode', 'retrieve')
+    :param str target: Collection base name or model the stage runs against
+    :param int items: Number of items the call processes
+    :param attributes: Extra span attributes
+    """
+    if items is not None:
+        STAGE_ITEMS.labels(stage).inc(items)
+
+    tracer = get_tracer()
+    start = time.perf_counter()
+    try:
+        if tracer is None:
+            yield
+        else:
+            span_attributes = {"stage": stage, **attributes}
+            if target:
+                span_attributes["target"] = target
+            if items is not None:
+                span_attributes["items"] = items
+            with tracer.start_as_current_span(stage, attributes=span_attributes):
+                yield
+    except BaseException:
+        STAGE_ERRORS.labels(stage, target).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage, target).observe(time.perf_counter() - start)
@@ -0,0 +1,108 @@
+"""
+Compare the local embedding query classifier with the labelled eval set and,
+when OPENAI_KEY is set, with the LLM classifier.
+
+Usage: python -m benchmarks.classifier_agreement [--eval-set PATH] [--skip-llm]
+"""
+
+import argparse
+import json
+import os
+import time
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from app.retrievers.classifier import EmbeddingQueryClassifier, QueryClassifier
+
+DEFAULT_EVAL_SET = os.path.join(
+    os.path.dirname(__file__), "data", "classifier_eval.jsonl"
+)
+
+
+def load_eval_set(path):
+    """
+    Load labelled queries.
+
+    :param str path: JSONL file with 'query' and 'label' fields
+    :return list: (query, label) pairs
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(row["query"], row["label"]) for row in rows]
+
+
+def run_classifier(classifier, queries):
+    """
+    Classify queries, timing each call.
+
+    :param QueryClassifier classifier: Classifier to run
+    :param list queries: Queries to classify
+    :return tuple: (labels, per-query latencies in milliseconds)
+    """
+    labels, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        labels.append(classifier.predict(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return labels, latencies
+
+
+def agreement(labels, reference):
+    """Share of labels equal to the reference labels."""
+    return sum(a == b for a, b in zip(labels, reference)) / len(reference)
+
+
+def summarize(name, labels, latencies, gold):
+    latencies = sorted(latencies)
+    return {
+        "classifier": name,
+        "accuracy": round(agreement(labels, gold), 3),
+        "p50_ms": round(latencies[len(latencies) // 2], 2),
+        "max_ms": round(latencies[-1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--eval-set", default=DEFAULT_EVAL_SET)
+    parser.add_argument("--skip-llm", action="store_true")
+    args = parser.parse_args()
+
+    load_dotenv()
+    eval_set = load_eval_set(args.eval_set)
+    queries = [query for query, _ in eval_set]
+    gold = [label for _, label in eval_set]
+
+    # Caching is disabled so every query is actually classified
+    embedding_classifier = EmbeddingQueryClassifier(cache_size=0).warm_up()
+    embedding_labels, embedding_latencies = run_classifier(
+        embedding_classifier, queries
+    )
+    report = {
+        "queries": len(queries),
+        "results": [
+            summarize("embedding", embedding_labels, embedding_latencies, gold)
+        ],
+    }
+
+    openai_api_key = os.getenv("OPENAI_KEY")
+    if openai_api_key and not args.skip_llm:
+        from langchain_openai import ChatOpenAI
+
+        llm = ChatOpenAI(openai_api_key=openai_api_key, model="gpt-4o", temperature=0)
+        llm_labels, llm_latencies = run_classifier(
+            QueryClassifier(llm, cache_size=0), queries
+        )
+        report["results"].append(summarize("llm", llm_labels, llm_latencies, gold))
+        report["embedding_llm_agreement"] = round(
+            agreement(embedding_labels, llm_labels), 3
+        )
+    else:
+        logger.warning("OPENAI_KEY not set, skipping the LLM classifier")
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Compare length-bucketed, token-budgeted embedding batches with fixed-size
+batches in file order.
+
+A repository (this one by default) is split into chunks, which are encoded both
+ways with the embedding cache disabled. The report gives throughput, the padded
+tokens each strategy encodes (every batch is padded to its longest text) and
+the largest difference between the two strategies' embeddings, which must stay
+at float rounding level since only the grouping changes.
+
+Usage: python -m benchmarks.embedding_batching [--repo PATH] [--encoder code|text]
+       [--model NAME] [--batch-size B] [--max-tokens T] [--repeats N]
+"""
+
+import argparse
+import copy
+import json
+import time
+
+import numpy as np
+from qdrant_client import models as qdrant_models
+
+from app.embeddings.batching import (
+    fixed_batches,
+    length_bucketed_batches,
+    padded_tokens,
+    token_lengths,
+)
+from app.embeddings.config import get_embedding_batch_config
+from app.embeddings.points import PointsCreator
+from app.encoders.config import get_encoder_config
+from app.encoders.encoder import EncoderFactory
+from benchmarks.reranker_backends import REPO_ROOT, load_chunks
+
+
+def run(creator, encoder, chunks, batch_size, repeats):
+    """
+    Encode the chunks, keeping the fastest of several runs.
+
+    :return tuple: (texts per second, dense vectors in input order)
+    """
+    best, points = None, None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        points = creator._create_points(
+            chunks, encoder, "benchmark", 0, batch_size, show_progress=False
+        )
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    vectors = np.array([np.asarray(point.vector) for point in points])
+    return len(chunks) / best, vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repo", default=REPO_ROOT, help="Checked out repository")
+    parser.add_argument("--encoder", choices=["code", "text"], default="code")
+    parser.add_argument("--model", default=None, help="Override the model name")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-tokens", type=int, default=None)
+    parser.add_argument("--repeats", type=int, default=2)
+    args = parser.parse_args()
+
+    config = copy.deepcopy(get_encoder_config(args.encoder))
+    if args.model:
+        config["model_name"] = args.model
+    encoder = EncoderFactory.get_encoder(args.encoder, config)
+
+    chunks = load_chunks(args.repo)
+    # Warm up the model outside the measurements
+    encoder.encode([chunk.page_content for chunk in chunks[:32]])
+
+    bucketed_config = get_embedding_batch_config()
+    bucketed_config["length_bucketing"] = True
+    if args.max_tokens:
+        bucketed_config["max_tokens"] = args.max_tokens
+    strategies = {
+        "fixed": {**bucketed_config, "length_bucketing": False},
+        "bucketed": bucketed_config,
+    }
+
+    lengths = token_lengths(encoder, [chunk.page_content for chunk in chunks])
+    batches = {
+        "fixed": fixed_batches(len(chunks), args.batch_size),
+        "bucketed": [
+            [begin + i for i in batch]
+            for begin in range(0, len(chunks), bucketed_config["window"])
+            for batch in length_bucketed_batches(
+                lengths[begin : begin + bucketed_config["window"]],
+                bucketed_config["max_tokens"],
+                bucketed_config["max_batch_size"],
+            )
+        ],
+    }
+
+    results, vectors = [], {}
+    for name, batch_config in strategies.items():
+        creator = PointsCreator(
+            qdrant_models,
+            code_encoder=encoder,
+            text_encoder=encoder,
+            use_embedding_cache=False,
+            batch_config=batch_config,
+        )
+        throughput, vectors[name] = run(
+            creator, encoder, chunks, args.batch_size, args.repeats
+        )
+        padded = padded_tokens(lengths, batches[name])
+        results.append(
+            {
+                "strategy": name,
+                "batches": len(batches[name]),
+                "padded_tokens": padded,
+                "padding_overhead": round(padded / sum(lengths) - 1, 3),
+                "texts_per_s": round(throughput, 1),
+            }
+        )
+
+    report = {
+        "repo": args.repo,
+        "model": config["model_name"],
+        "chunks": len(chunks),
+        "tokens": sum(lengths),
+        "batch_size": args.batch_size,
+        "max_tokens": bucketed_config["max_tokens"],
+        "speedup": round(results[1]["texts_per_s"] / results[0]["texts_per_s"], 2),
+        "max_abs_diff": float(np.abs(vectors["fixed"] - vectors["bucketed"]).max()),
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Measure how encoding throughput scales with the encoding pool's process count.
+
+Chunks of this repository's own files are encoded in the calling process with
+all cores as torch threads, then by pools of increasing size. Unless given,
+each pool process gets an equal share of the cores as threads. Model loading in
+the workers is excluded by a warm-up pass.
+
+Usage: python -m benchmarks.encoding_pool [--encoder code|text] [--model NAME]
+       [--texts N] [--processes 1 2 4 ...] [--threads T] [--batch-size B]
+"""
+
+import argparse
+import copy
+import json
+import os
+import time
+
+import torch
+
+from app.encoders.config import get_encoder_config
+from app.encoders.encoder import load_from_config
+from app.encoders.pool import EncodingPool
+from benchmarks.reranker_backends import load_chunks
+
+
+def default_process_counts(cores):
+    """Powers of two up to the core count, plus the core count itself."""
+    counts, count = [], 1
+    while count < cores:
+        counts.append(count)
+        count *= 2
+    return counts + [cores]
+
+
+def load_texts(count):
+    """Repository chunks, repeated until there are ``count`` texts."""
+    texts = [chunk.page_content for chunk in load_chunks()]
+    return (texts * (count // len(texts) + 1))[:count]
+
+
+def measure(encode, texts):
+    """
+    Time one encoding pass after a warm-up pass.
+
+    :return float: Texts per second
+    """
+    encode(texts[: min(len(texts), 256)])
+    start = time.perf_counter()
+    encode(texts)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--encoder", choices=["code", "text"], default="code")
+    parser.add_argument("--model", default=None, help="Override the model name")
+    parser.add_argument("--texts", type=int, default=2048)
+    parser.add_argument("--processes", type=int, nargs="+", default=None)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    config = copy.deepcopy(get_encoder_config(args.encoder))
+    if args.model:
+        config["model_name"] = args.model
+    cores = os.cpu_count() or 1
+    texts = load_texts(args.texts)
+
+    torch.set_num_threads(cores)
+    encoder = load_from_config(config)
+    baseline = measure(
+        lambda batch: encoder.encode(batch, batch_size=args.batch_size), texts
+    )
+    results = [
+        {
+            "processes": 0,
+            "threads_per_process": cores,
+            "texts_per_s": round(baseline, 1),
+            "speedup": 1.0,
+        }
+    ]
+
+    for processes in args.processes or default_process_counts(cores):
+        threads = args.threads or max(1, cores // processes)
+        pool = EncodingPool(processes, threads)
+        try:
+            throughput = measure(
+                lambda batch: pool.encode(config, batch, args.batch_size), texts
+            )
+        finally:
+            pool.shutdown()
+        results.append(
+            {
+                "processes": processes,
+                "threads_per_process": threads,
+                "texts_per_s": round(throughput, 1),
+                "speedup": round(throughput / baseline, 2),
+            }
+        )
+
+    report = {
+        "model": config["model_name"],
+        "backend": config.get("backend", "torch"),
+        "cores": cores,
+        "texts": len(texts),
+        "batch_size": args.batch_size,
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
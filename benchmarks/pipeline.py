@@ -0,0 +1,337 @@
+"""
+Component benchmarks of the ingestion and query stages.
+
+Builds a synthetic git repository, then drives the git loader, the splitters,
+PointsCreator, QdrantStore.upload_points, the retrievers, the reranker and the
+QA chain against an in-process Qdrant and a fake LLM. Throughput, per-stage
+latency percentiles and peak RSS are written to a JSON file so runs can be
+compared across commits.
+
+Usage: python -m benchmarks.pipeline [--files N] [--queries N] [--output PATH]
+       [--code-model NAME] [--text-model NAME] [--reranker-model NAME]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from qdrant_client import QdrantClient
+from qdrant_client import models as qdrant_models
+
+from app.chains import QAChainBuilder
+from app.embeddings.points import PointsCreator
+from app.encoders.config import DEFAULT_ENCODER_CONFIG
+from app.loaders.config import GIT_LOADER_CONFIG
+from app.loaders.git_loader import checkout_repository
+from app.qdrant.qdrant_store import QdrantStore
+from app.retrievers import EmbeddingQueryClassifier, Reranker, RetrieverFactory
+from app.splitters.text_splitter import get_markdown_splitter, get_python_splitter
+
+REPO_ID = "benchmark/synthetic"
+
+WORDS = (
+    "cache index query vector chunk repository config loader encoder retriever "
+    "batch upload point collection token model stream worker shard commit"
+).split()
+
+QUERIES = [
+    "How do I configure the loader?",
+    "What does the cache index function return?",
+    "Which class uploads vectors in batches?",
+    "How is the repository sharded across workers?",
+    "Where is the encoder model selected?",
+    "How are stream tokens handled?",
+]
+
+
+class StageTimer:
+    """Collects per-call latencies of named stages."""
+
+    def __init__(self):
+        self.latencies = {}
+        self.items = {}
+
+    @contextmanager
+    def measure(self, stage, items=0):
+        """
+        Time one call of a stage.
+
+        :param str stage: Stage name
+        :param int items: Number of items (files, chunks, points) the call processed
+        """
+        start = time.perf_counter()
+        yield
+        self.record(stage, time.perf_counter() - start, items)
+
+    def record(self, stage, seconds, items=0):
+        """
+        Record one call of a stage.
+
+        :param str stage: Stage name
+        :param float seconds: Duration of the call
+        :param int items: Number of items the call processed
+        """
+        self.latencies.setdefault(stage, []).append(seconds)
+        self.items[stage] = self.items.get(stage, 0) + items
+
+    def summary(self):
+        """Latency percentiles in milliseconds and throughput per stage."""
+        summary = {}
+        for stage, latencies in self.latencies.items():
+            latencies_ms = np.asarray(latencies) * 1000
+            total = float(np.sum(latencies))
+            summary[stage] = {
+                "calls": len(latencies),
+                "total_s": round(total, 3),
+                "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+                "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+                "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+            }
+            if self.items.get(stage):
+                summary[stage]["items"] = self.items[stage]
+                summary[stage]["items_per_s"] = round(self.items[stage] / total, 1)
+        return summary
+
+
+def _sentence(rng, words=8):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _python_file(rng, functions):
+    parts = []
+    for i in range(functions):
+        name = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{i}"
+        parts.append(
+            f"def {name}(items, limit={rng.randint(1, 100)}):\n"
+            f'    """{_sentence(rng).capitalize()}."""\n'
+            f"    result = []\n"
+            f"    for item in items[:limit]:\n"
+            f"        if item.{rng.choice(WORDS)} is not None:\n"
+            f"            result.append(item.{rng.choice(WORDS)})\n"
+            f"    return result\n"
+        )
+    return "\n\n".join(parts)
+
+
+def _markdown_file(rng, sections):
+    parts = [f"# {_sentence(rng, 3).title()}"]
+    for _ in range(sections):
+        parts.append(f"## {_sentence(rng, 2).title()}")
+        parts.append(" ".join(f"{_sentence(rng).capitalize()}." for _ in range(5)))
+    return "\n\n".join(parts)
+
+
+def build_synthetic_repo(directory, files, md_ratio=0.2, functions=8, seed=0):
+    """
+    Create and commit a synthetic repository of Python and Markdown files.
+
+    :param str directory: Directory to create the repository in
+    :param int files: Number of files
+    :param float md_ratio: Share of Markdown files
+    :param int functions: Functions per Python file (sections per Markdown file)
+    :param int seed: Random seed
+    :return str: Repository path
+    """
+    rng = random.Random(seed)
+    repo_dir = os.path.join(directory, "repo")
+    for i in range(files):
+        package = os.path.join(repo_dir, f"pkg_{i % 10}")
+        os.makedirs(package, exist_ok=True)
+        if rng.random() < md_ratio:
+            path, content = f"doc_{i}.md", _markdown_file(rng, functions)
+        else:
+            path, content = f"module_{i}.py", _python_file(rng, functions)
+        with open(os.path.join(package, path), "w", encoding="utf-8") as f:
+            f.write(content)
+
+    git = [
+        "git",
+        "-C",
+        repo_dir,
+        "-c",
+        "user.name=bench",
+        "-c",
+        "user.email=bench@localhost",
+    ]
+    subprocess.run(["git", "init", "-q", "-b", "main", repo_dir], check=True)
+    subprocess.run([*git, "add", "."], check=True)
+    subprocess.run([*git, "commit", "-q", "-m", "Synthetic repository"], check=True)
+    return repo_dir
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    divisor = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def _git_commit():
+    result = subprocess.run(
+        ["git", "rev-parse", "HEAD"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.strip() or None
+
+
+def run_ingestion(timer, client, repo_dir, batch_size):
+    """Load, split, encode and upload the synthetic repository stage by stage."""
+    splitters = {".py": get_python_splitter(), ".md": get_markdown_splitter()}
+    chunks = {".py": [], ".md": []}
+
+    with checkout_repository(repo_dir, "main", repo_id=REPO_ID) as snapshot:
+        documents = snapshot.iter_documents()
+        while True:
+            start = time.perf_counter()
+            document = next(documents, None)
+            if document is None:
+                break
+            timer.record("load", time.perf_counter() - start, items=1)
+            extension = os.path.splitext(document.metadata["path"])[1]
+            with timer.measure("split", items=1):
+                chunks[extension].extend(
+                    splitters[extension].split_documents([document])
+                )
+
+    vectorstore = QdrantStore(client, qdrant_models)
+    points_creator = PointsCreator(qdrant_models, use_embedding_cache=False)
+    targets = {
+        ".py": ("code_collection", points_creator.create_code_points, "code"),
+        ".md": ("md_collection", points_creator.create_text_points, "text"),
+    }
+    for extension, (collection_name, create_points, encoder_type) in targets.items():
+        encoder = getattr(points_creator, f"{encoder_type}_encoder")
+        vectorstore.create_collection_from_encoder(
+            collection_name=collection_name, encoder=encoder, distance="COSINE"
+        )
+        documents = chunks[extension]
+        for start in range(0, len(documents), batch_size):
+            batch = documents[start : start + batch_size]
+            with timer.measure(f"encode_{encoder_type}", items=len(batch)):
+                points = create_points(batch, show_progress=False)
+            with timer.measure("upload", items=len(points)):
+                vectorstore.upload_points(collection_name, points)
+
+    return {extension: len(documents) for extension, documents in chunks.items()}
+
+
+def run_queries(timer, client, queries, reranker_model, code_model, text_model):
+    """Run retrieval, reranking and the full chain with a fake LLM."""
+    factory = RetrieverFactory(client)
+    retrievers = [
+        factory.get_retriever("md_collection", text_model, repo_id=REPO_ID),
+        factory.get_retriever("code_collection", code_model, repo_id=REPO_ID),
+    ]
+    reranker = (
+        Reranker(model_name=reranker_model, cache_size=0) if reranker_model else None
+    )
+    classifier = EmbeddingQueryClassifier(cache_size=0).warm_up()
+
+    for query in queries:
+        documents = []
+        for name, retriever in zip(("md", "code"), retrievers):
+            with timer.measure(f"retrieve_{name}"):
+                documents.extend(retriever.invoke(query))
+        if reranker is not None:
+            with timer.measure("rerank", items=len(documents)):
+                reranker.rerank(query, documents)
+        with timer.measure("classify"):
+            classifier.get_retriever_weights(query)
+
+    llm = FakeListChatModel(responses=["This is a benchmark answer."])
+    chain = QAChainBuilder(llm).build_with_dynamic_weights(
+        retrievers=retrievers, classifier=classifier, reranker=reranker
+    )
+    for query in queries:
+        with timer.measure("answer"):
+            chain.invoke(query)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--md-ratio", type=float, default=0.2)
+    parser.add_argument("--functions", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--qdrant-path", default=None, help="Local Qdrant path")
+    parser.add_argument(
+        "--code-model", default=DEFAULT_ENCODER_CONFIG["code"]["model_name"]
+    )
+    parser.add_argument(
+        "--text-model", default=DEFAULT_ENCODER_CONFIG["text"]["model_name"]
+    )
+    parser.add_argument("--reranker-model", default="BAAI/bge-reranker-base")
+    parser.add_argument("--skip-reranker", action="store_true")
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    DEFAULT_ENCODER_CONFIG["code"]["model_name"] = args.code_model
+    DEFAULT_ENCODER_CONFIG["text"]["model_name"] = args.text_model
+
+    timer = StageTimer()
+    with tempfile.TemporaryDirectory() as directory:
+        GIT_LOADER_CONFIG["mirror_path"] = os.path.join(directory, "mirrors")
+        repo_dir = build_synthetic_repo(
+            directory, args.files, args.md_ratio, args.functions
+        )
+        client = (
+            QdrantClient(path=args.qdrant_path)
+            if args.qdrant_path
+            else QdrantClient(":memory:")
+        )
+
+        start = time.perf_counter()
+        chunk_counts = run_ingestion(timer, client, repo_dir, args.batch_size)
+        ingestion_seconds = time.perf_counter() - start
+
+        queries = [QUERIES[i % len(QUERIES)] for i in range(args.queries)]
+        run_queries(
+            timer,
+            client,
+            queries,
+            None if args.skip_reranker else args.reranker_model,
+            args.code_model,
+            args.text_model,
+        )
+
+    stages = timer.summary()
+    total_chunks = sum(chunk_counts.values())
+    encode_seconds = sum(
+        stages[stage]["total_s"]
+        for stage in ("encode_code", "encode_text")
+        if stage in stages
+    )
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "parameters": vars(args),
+        "files": args.files,
+        "chunks": chunk_counts,
+        "ingestion_s": round(ingestion_seconds, 3),
+        "chunks_per_s": round(total_chunks / encode_seconds, 1)
+        if encode_seconds
+        else None,
+        "points_per_s": stages.get("upload", {}).get("items_per_s"),
+        "peak_rss_mb": _peak_rss_mb(),
+        "stages": stages,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Compare Qdrant storage settings on memory, recall and search latency.
+
+Each configuration (quantization, on-disk originals, HNSW parameters) gets its
+own collection on a Qdrant server holding the same vectors. Recall@k is measured
+against exact search over the float32 vectors; RAM is estimated from the vector
+count, dimension and settings, since Qdrant does not report it per collection.
+Local (in-process) Qdrant ignores quantization and HNSW, so a server is required.
+
+Usage: python -m benchmarks.qdrant_storage [--url URL] [--vectors N] [--dim D]
+       [--model NAME] [--configs float32 scalar binary ...] [--hnsw-ef EF]
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client import models as qdrant_models
+
+from app.qdrant.config import Config
+from app.qdrant.qdrant_store import QdrantStore, search_params
+
+# Storage settings compared, as overrides of Config.STORAGE_PARAMS
+CONFIGS = {
+    "float32": {"quantization": "none", "on_disk": False},
+    "float32_on_disk": {"quantization": "none", "on_disk": True},
+    "scalar": {"quantization": "scalar", "on_disk": False},
+    "scalar_on_disk": {"quantization": "scalar", "on_disk": True},
+    "binary": {"quantization": "binary", "on_disk": False},
+    "binary_on_disk": {"quantization": "binary", "on_disk": True},
+}
+
+
+class _StorageConfig:
+    """Configuration with storage parameters overridden."""
+
+    def __init__(self, overrides):
+        self.overrides = overrides
+
+    def get(self, key, default=None):
+        section, _, name = key.partition(".")
+        if section == "storage_params" and name in self.overrides:
+            return self.overrides[name]
+        return Config.get(key, default)
+
+
+def synthetic_vectors(count, dim, clusters=64, seed=0):
+    """
+    Generate normalized vectors around random centroids, which resemble
+    embedding distributions better than uniform noise.
+
+    :return np.ndarray: (count, dim) float32 array
+    """
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dim))
+    vectors = centroids[rng.integers(0, clusters, count)]
+    vectors = vectors + 0.6 * rng.standard_normal((count, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def model_vectors(model_name):
+    """Embed chunks of this repository with a SentenceTransformer model."""
+    from sentence_transformers import SentenceTransformer
+
+    from benchmarks.reranker_backends import load_chunks
+
+    texts = [chunk.page_content for chunk in load_chunks()]
+    model = SentenceTransformer(model_name)
+    return model.encode(texts, normalize_embeddings=True).astype(np.float32)
+
+
+def estimate_memory_mb(count, dim, params):
+    """
+    Estimate the RAM and disk used by a collection's vectors and HNSW graph.
+
+    :return dict: ram_mb and disk_mb
+    """
+    original = count * dim * 4
+    quantized = {
+        "none": 0,
+        "scalar": count * dim,
+        "binary": count * math.ceil(dim / 8),
+    }[params["quantization"]]
+    # Level-0 links dominate: 2 * m neighbours of 4 bytes per point
+    graph = count * params["hnsw_m"] * 2 * 4
+
+    ram = quantized if params["quantization_always_ram"] else 0
+    disk = quantized - ram
+    for size, on_disk in (
+        (original, params["on_disk"]),
+        (graph, params["hnsw_on_disk"]),
+    ):
+        if on_disk:
+            disk += size
+        else:
+            ram += size
+    return {"ram_mb": round(ram / 2**20, 1), "disk_mb": round(disk / 2**20, 1)}
+
+
+def create_collection(client, name, dim, storage_config):
+    """Create a collection with the given storage settings, replacing an old one."""
+    store = QdrantStore(client, qdrant_models, config=storage_config)
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(
+        collection_name=name,
+        vectors_config=qdrant_models.VectorParams(
+            size=dim,
+            distance=qdrant_models.Distance.COSINE,
+            on_disk=storage_config.get("storage_params.on_disk"),
+        ),
+        hnsw_config=store.hnsw_config(),
+        quantization_config=store.quantization_config(),
+        # Build the index even for small benchmark collections
+        optimizers_config=qdrant_models.OptimizersConfigDiff(indexing_threshold=1000),
+    )
+    return store
+
+
+def wait_until_indexed(client, name, timeout=600):
+    """Wait for the optimizer to finish indexing a collection."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        info = client.get_collection(name)
+        if info.status == qdrant_models.CollectionStatus.GREEN:
+            return
+        time.sleep(1)
+    raise TimeoutError(f"Collection {name} was not indexed within {timeout}s")
+
+
+def search(client, name, queries, k, params):
+    """
+    Run the queries one by one.
+
+    :return tuple: (result ids per query, latencies in milliseconds)
+    """
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        response = client.query_points(
+            name, query=query.tolist(), limit=k, search_params=params
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([point.id for point in response.points])
+    return results, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default=os.getenv("QDRANT_URL", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("QDRANT_PORT", 6333)))
+    parser.add_argument("--api-key", default=os.getenv("QDRANT_KEY"))
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--model", default=None, help="Embed this repository instead")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGS))
+    parser.add_argument(
+        "--hnsw-m", type=int, default=Config.get("storage_params.hnsw_m")
+    )
+    parser.add_argument(
+        "--hnsw-ef-construct",
+        type=int,
+        default=Config.get("storage_params.hnsw_ef_construct"),
+    )
+    parser.add_argument("--hnsw-ef", type=int, default=None)
+    parser.add_argument("--oversampling", type=float, default=None)
+    parser.add_argument("--no-rescore", action="store_true")
+    args = parser.parse_args()
+
+    client = QdrantClient(url=args.url, port=args.port, api_key=args.api_key)
+
+    if args.model:
+        vectors = model_vectors(args.model)
+    else:
+        vectors = synthetic_vectors(args.vectors + args.queries, args.dim)
+    rng = np.random.default_rng(1)
+    query_rows = rng.choice(
+        len(vectors), size=min(args.queries, len(vectors) // 10), replace=False
+    )
+    queries = vectors[query_rows]
+    if not args.model:
+        # Synthetic queries are held out of the collection
+        vectors = np.delete(vectors, query_rows, axis=0)
+    count, dim = vectors.shape
+
+    points = [
+        qdrant_models.PointStruct(id=i, vector=vector.tolist())
+        for i, vector in enumerate(vectors)
+    ]
+
+    truth, results = None, []
+    for name in ["float32", *[c for c in args.configs if c != "float32"]]:
+        overrides = {
+            **CONFIGS[name],
+            "hnsw_m": args.hnsw_m,
+            "hnsw_ef_construct": args.hnsw_ef_construct,
+        }
+        storage_config = _StorageConfig(overrides)
+        collection_name = f"benchmark_storage_{name}"
+
+        start = time.perf_counter()
+        store = create_collection(client, collection_name, dim, storage_config)
+        store.upload_points(collection_name, points, batch_size=256, wait=True)
+        wait_until_indexed(client, collection_name)
+        build_seconds = time.perf_counter() - start
+
+        if truth is None:
+            exact = qdrant_models.SearchParams(exact=True)
+            truth, _ = search(client, collection_name, queries, args.k, exact)
+
+        params = search_params(
+            args.hnsw_ef,
+            args.oversampling,
+            False if args.no_rescore else None,
+            config=storage_config,
+        )
+        ids, latencies = search(client, collection_name, queries, args.k, params)
+        recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(ids, truth)])
+
+        summary = {
+            "config": name,
+            **estimate_memory_mb(
+                count, dim, {**Config.get("storage_params"), **overrides}
+            ),
+            "build_s": round(build_seconds, 1),
+            f"recall@{args.k}": round(float(recall), 4),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        }
+        results.append(summary)
+        client.delete_collection(collection_name)
+
+    report = {
+        "vectors": count,
+        "dim": dim,
+        "queries": len(queries),
+        "hnsw_m": args.hnsw_m,
+        "hnsw_ef_construct": args.hnsw_ef_construct,
+        "hnsw_ef": args.hnsw_ef,
+        "results": [r for r in results if r["config"] in args.configs],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
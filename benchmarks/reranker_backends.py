@@ -0,0 +1,130 @@
+"""
+Compare reranker backends on latency and ranking agreement with the torch model.
+
+Queries come from the classifier eval set and candidate documents are chunks of
+this repository's own Python and Markdown files.
+
+Usage: python -m benchmarks.reranker_backends [--model NAME] [--candidates N]
+       [--backends torch onnx int8] [--top-k K]
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+import numpy as np
+from langchain.schema import Document
+
+from app.retrievers.reranker import RERANKER_BACKENDS, Reranker
+from app.splitters.text_splitter import get_markdown_splitter, get_python_splitter
+from benchmarks.classifier_agreement import DEFAULT_EVAL_SET, load_eval_set
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_chunks(root=REPO_ROOT):
+    """
+    Split the repository's own files into chunks.
+
+    :param str root: Repository root
+    :return list: Chunk documents
+    """
+    splitters = {".py": get_python_splitter(), ".md": get_markdown_splitter()}
+    chunks = []
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for file in sorted(files):
+            extension = os.path.splitext(file)[1]
+            if extension not in splitters:
+                continue
+            with open(os.path.join(directory, file), "r", encoding="utf-8") as f:
+                document = Document(page_content=f.read(), metadata={"path": file})
+            chunks.extend(splitters[extension].split_documents([document]))
+    return chunks
+
+
+def spearman(a, b):
+    """Spearman rank correlation of two score lists."""
+    rank_a = np.argsort(np.argsort(a))
+    rank_b = np.argsort(np.argsort(b))
+    if rank_a.std() == 0 or rank_b.std() == 0:
+        return 1.0
+    return float(np.corrcoef(rank_a, rank_b)[0, 1])
+
+
+def run_backend(backend, model_name, workload, top_k):
+    """
+    Score every query's candidates with one backend.
+
+    :return tuple: (summary dict, per-query score arrays)
+    """
+    start = time.perf_counter()
+    # Caching is disabled so every pair is scored
+    reranker = Reranker(
+        model_name=model_name, top_k=top_k, backend=backend, cache_size=0
+    )
+    load_seconds = time.perf_counter() - start
+
+    all_scores, latencies = [], []
+    for query, candidates in workload:
+        start = time.perf_counter()
+        all_scores.append(np.asarray(reranker.score(query, candidates)))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies = sorted(latencies)
+    summary = {
+        "backend": backend,
+        "load_s": round(load_seconds, 2),
+        "p50_ms": round(latencies[len(latencies) // 2], 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+    }
+    return summary, all_scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="BAAI/bge-reranker-base")
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--backends", nargs="+", default=list(RERANKER_BACKENDS))
+    parser.add_argument("--eval-set", default=DEFAULT_EVAL_SET)
+    args = parser.parse_args()
+
+    chunks = load_chunks()
+    rng = random.Random(0)
+    workload = [
+        (query, rng.sample(chunks, min(args.candidates, len(chunks))))
+        for query, _ in load_eval_set(args.eval_set)
+    ]
+
+    baseline_backend = "torch"
+    backends = [baseline_backend] + [b for b in args.backends if b != "torch"]
+    results, baseline = [], None
+    for backend in backends:
+        summary, scores = run_backend(backend, args.model, workload, args.top_k)
+        if baseline is None:
+            baseline = scores
+        else:
+            overlaps, correlations = [], []
+            for reference, candidate in zip(baseline, scores):
+                top_reference = set(np.argsort(-reference)[: args.top_k])
+                top_candidate = set(np.argsort(-candidate)[: args.top_k])
+                overlaps.append(len(top_reference & top_candidate) / args.top_k)
+                correlations.append(spearman(reference, candidate))
+            summary[f"top{args.top_k}_overlap"] = round(float(np.mean(overlaps)), 3)
+            summary["spearman"] = round(float(np.mean(correlations)), 3)
+        results.append(summary)
+
+    report = {
+        "model": args.model,
+        "queries": len(workload),
+        "candidates": args.candidates,
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from app.embeddings.cache import EmbeddingCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache("model", "0123abcd", path=str(tmp_path), max_entries=3)
+
+
+def vector(value):
+    return np.full(4, value, dtype=np.float32)
+
+
+def test_round_trip(cache):
+    assert cache.get_many(["a"]) == {}
+
+    cache.put_many({"a": vector(1), "b": vector(2)})
+    found = cache.get_many(["a", "a", "b", "missing"])
+
+    assert set(found) == {"a", "b"}
+    np.testing.assert_array_equal(found["a"], vector(1))
+    np.testing.assert_array_equal(found["b"], vector(2))
+    assert len(cache) == 2
+
+
+def test_vectors_persist_across_instances(cache, tmp_path):
+    cache.put_many({"a": vector(1)})
+
+    reopened = EmbeddingCache("model", "0123abcd", path=str(tmp_path))
+
+    np.testing.assert_array_equal(reopened.get_many(["a"])["a"], vector(1))
+
+
+def test_revisions_do_not_share_vectors(cache, tmp_path):
+    cache.put_many({"a": vector(1)})
+
+    other = EmbeddingCache("model", "4567ef01", path=str(tmp_path))
+
+    assert other.get_many(["a"]) == {}
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    cache.put_many({"a": vector(1)})
+    cache.put_many({"b": vector(2)})
+    cache.put_many({"c": vector(3)})
+    # Reading refreshes an entry
+    cache.get_many(["a"])
+
+    cache.put_many({"d": vector(4)})
+    found = cache.get_many(["a", "b", "c", "d"])
+
+    assert set(found) == {"a", "c", "d"}
+    # The evicted slot is reused without overwriting live vectors
+    np.testing.assert_array_equal(found["a"], vector(1))
+    np.testing.assert_array_equal(found["c"], vector(3))
+    np.testing.assert_array_equal(found["d"], vector(4))
+    assert len(cache) == 3
+
+
+def test_known_entries_are_not_rewritten(cache):
+    cache.put_many({"a": vector(1)})
+    cache.put_many({"a": vector(9)})
+
+    np.testing.assert_array_equal(cache.get_many(["a"])["a"], vector(1))
+
+
+def test_dimension_mismatch_is_rejected(cache):
+    cache.put_many({"a": vector(1)})
+
+    with pytest.raises(ValueError):
+        cache.put_many({"b": np.ones(8, dtype=np.float32)})
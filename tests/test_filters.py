@@ -0,0 +1,43 @@
+import pytest
+
+from app.loaders.config import get_loader_config
+from app.loaders.filters import FileFilter
+
+
+@pytest.fixture
+def file_filter(tmp_path):
+    return FileFilter(str(tmp_path), get_loader_config())
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "# Auto-generated client\n\nUsage notes.\n",
+        "Intro\n\n## Generated by the build\n\nDetails.\n",
+        "# Do not edit the config by hand\n\nUse the CLI instead.\n",
+    ],
+)
+def test_markdown_headings_are_not_generated_markers(file_filter, content):
+    assert not file_filter.is_generated(content, "docs/README.md")
+
+
+def test_markdown_comment_marks_generated_file(file_filter):
+    content = "<!--\n  DO NOT EDIT: generated from schema.json\n-->\n# API\n"
+
+    assert file_filter.is_generated(content, "docs/api.md")
+
+
+def test_python_comment_marks_generated_file(file_filter):
+    content = "# Generated by the protocol buffer compiler.  DO NOT EDIT!\nx = 1\n"
+
+    assert file_filter.is_generated(content, "api_pb2.py")
+
+
+def test_python_html_comment_is_not_a_marker(file_filter):
+    content = 'TEMPLATE = "<!-- generated by hand -->"\n'
+
+    assert not file_filter.is_generated(content, "templates.py")
+
+
+def test_minified_files_are_generated(file_filter):
+    assert file_filter.is_generated("x" * 5000, "bundle.md")
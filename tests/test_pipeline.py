@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+
+import pytest
+from qdrant_client import QdrantClient, models
+
+from app.embeddings.points import make_point_id
+from app.ingestion import pipeline
+from app.ingestion.pipeline import resolve_since_commit, stale_path_deletions
+from app.ingestion.state import IndexStateStore
+
+REPO = "github.com/org/repo"
+
+
+class RecordingStore:
+    """Vector store recording delete_stale_points calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def delete_stale_points(self, collection_name, repo, **kwargs):
+        self.calls.append((collection_name, repo, kwargs))
+
+
+def run_deletions(snapshot, seen_paths):
+    store = RecordingStore()
+    for operation in stale_path_deletions(store, snapshot, REPO, seen_paths):
+        operation()
+    return {collection: kwargs for collection, _, kwargs in store.calls}
+
+
+def test_point_id_is_stable():
+    point_id = make_point_id(REPO, "app/main.py", "print(1)\n")
+    assert point_id == "257cbdcb-7edc-5d5c-a806-b09a356e259a"
+    assert point_id == make_point_id(REPO, "app/main.py", "print(1)\n")
+
+
+@pytest.mark.parametrize(
+    "repo, path, content",
+    [
+        ("github.com/org/other", "app/main.py", "print(1)\n"),
+        (REPO, "app/other.py", "print(1)\n"),
+        (REPO, "app/main.py", "print(2)\n"),
+    ],
+)
+def test_point_id_depends_on_repo_path_and_content(repo, path, content):
+    assert make_point_id(repo, path, content) != make_point_id(
+        REPO, "app/main.py", "print(1)\n"
+    )
+
+
+def test_incremental_deletions_cover_removed_and_emptied_files():
+    snapshot = SimpleNamespace(
+        incremental=True,
+        deleted_paths=["old.py", "docs/old.md"],
+        changed_paths=["emptied.py", "kept.py", "README.md"],
+    )
+    seen_paths = {"code_collection": ["kept.py"], "md_collection": ["README.md"]}
+
+    deletions = run_deletions(snapshot, seen_paths)
+
+    assert deletions["code_collection"] == {"paths": ["emptied.py", "old.py"]}
+    assert deletions["md_collection"] == {"paths": ["docs/old.md"]}
+
+
+def test_full_deletions_keep_only_seen_paths():
+    snapshot = SimpleNamespace(incremental=False, deleted_paths=[], changed_paths=[])
+    seen_paths = {"code_collection": ["a.py", "b.py"]}
+
+    deletions = run_deletions(snapshot, seen_paths)
+
+    assert deletions["code_collection"] == {"keep_paths": ["a.py", "b.py"]}
+    assert deletions["md_collection"] == {"keep_paths": []}
+
+
+class TinyEncoder:
+    def get_sentence_embedding_dimension(self):
+        return 4
+
+
+@pytest.fixture
+def qdrant(monkeypatch):
+    monkeypatch.setattr(pipeline, "get_text_encoder", TinyEncoder)
+    monkeypatch.setattr(pipeline, "get_code_encoder", TinyEncoder)
+    return QdrantClient(":memory:")
+
+
+@pytest.fixture
+def state_store(tmp_path):
+    store = IndexStateStore(str(tmp_path / "state.db"))
+    store.record_commit(REPO, "main", "abc123")
+    return store
+
+
+@pytest.mark.filterwarnings("ignore:Payload indexes")
+def test_since_commit_ignored_when_collections_are_created(qdrant, state_store):
+    _, since_commit = resolve_since_commit(qdrant, state_store, REPO, "main", False)
+
+    assert since_commit is None
+    assert state_store.get_last_commit(REPO, "main") is None
+
+
+@pytest.mark.filterwarnings("ignore:Payload indexes")
+def test_since_commit_requires_the_repos_points(qdrant, state_store):
+    vectorstore, _ = resolve_since_commit(qdrant, state_store, "other", "main", False)
+    state_store.record_commit(REPO, "main", "abc123")
+
+    _, since_commit = resolve_since_commit(qdrant, state_store, REPO, "main", False)
+    assert since_commit is None
+
+    state_store.record_commit(REPO, "main", "abc123")
+    qdrant.upsert(
+        "code_collection",
+        [
+            models.PointStruct(
+                id=make_point_id(REPO, "a.py", "x"),
+                vector=[1.0, 0.0, 0.0, 0.0],
+                payload={"metadata": {"repo": REPO, "path": "a.py"}},
+            )
+        ],
+    )
+    assert vectorstore.count_repo_points("code_collection", REPO) == 1
+
+    _, since_commit = resolve_since_commit(qdrant, state_store, REPO, "main", False)
+    assert since_commit == "abc123"
+    _, since_commit = resolve_since_commit(qdrant, state_store, REPO, "main", True)
+    assert since_commit is None
@@ -0,0 +1,54 @@
+import numpy as np
+from qdrant_client import models
+
+from app.embeddings import points
+from app.embeddings.cache import EmbeddingCache
+from app.embeddings.points import PointsCreator
+
+
+class CountingEncoder:
+    """Encoder returning one-hot-ish vectors and recording what it encodes."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def tokenize(self, texts):
+        return {"input_ids": [[0] * len(text) for text in texts]}
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        self.encoded.extend(texts)
+        return np.array([[len(text), 1.0, 0.0, 0.0] for text in texts], np.float32)
+
+
+def creator(encoder, use_embedding_cache):
+    return PointsCreator(
+        models,
+        code_encoder=encoder,
+        text_encoder=encoder,
+        use_embedding_cache=use_embedding_cache,
+        batch_config={"length_bucketing": False},
+    )
+
+
+def test_identical_texts_are_encoded_once_without_cache():
+    encoder = CountingEncoder()
+
+    vectors = creator(encoder, False)._encode(encoder, ["a", "bb", "a", "a"])
+
+    assert sorted(encoder.encoded) == ["a", "bb"]
+    assert len(vectors) == 4
+    np.testing.assert_array_equal(vectors[0], vectors[2])
+
+
+def test_cache_stats_ignore_duplicates_within_a_batch(tmp_path, monkeypatch):
+    cache = EmbeddingCache("counting", "test", path=str(tmp_path))
+    monkeypatch.setattr(points, "get_embedding_cache", lambda encoder: cache)
+    encoder = CountingEncoder()
+    points_creator = creator(encoder, True)
+
+    points_creator._encode(encoder, ["a", "a", "b"])
+    assert points_creator.cache_stats == {"hits": 0, "misses": 2}
+
+    points_creator._encode(encoder, ["a", "a", "c"])
+    assert points_creator.cache_stats == {"hits": 1, "misses": 3}
+    assert sorted(encoder.encoded) == ["a", "b", "c"]
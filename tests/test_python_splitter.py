@@ -0,0 +1,111 @@
+import textwrap
+
+import pytest
+
+from app.splitters.python_splitter import MODULE_SYMBOL, PythonASTSplitter
+
+SOURCE = textwrap.dedent(
+    '''\
+    """Module docstring."""
+    import os
+    from . import sibling
+
+    CONSTANT = 1
+
+
+    # Comment preceding the function
+    @decorator
+    def function(a, b):
+        return a + b
+
+
+    class Widget:
+        """A widget."""
+
+        size = 3
+
+        def render(self):
+            return os.path.join("a", "b")
+
+        async def refresh(self):
+            await sibling.fetch()
+    '''
+)
+
+
+def coverage(chunks, prefix=""):
+    """Source rebuilt from the chunks, without repeated signatures."""
+    return "".join(
+        content[len(prefix) :] if prefix and content.startswith(prefix) else content
+        for content, _ in chunks
+    )
+
+
+def test_small_definitions_are_one_chunk_each():
+    chunks = PythonASTSplitter(chunk_size=2000).split_source(SOURCE)
+
+    symbols = [(metadata["symbol"], metadata["symbol_kind"]) for _, metadata in chunks]
+    assert symbols == [
+        (MODULE_SYMBOL, "module"),
+        ("function", "function"),
+        ("Widget", "class"),
+    ]
+    assert "".join(content for content, _ in chunks) == SOURCE
+
+    _, function = chunks[1]
+    assert chunks[1][0].startswith("\n\n# Comment preceding the function\n@decorator")
+    assert (function["start_line"], function["end_line"]) == (6, 11)
+    assert all(metadata["imports"] == [".", "os"] for _, metadata in chunks)
+
+
+def test_large_classes_are_split_into_methods():
+    chunks = PythonASTSplitter(chunk_size=120).split_source(SOURCE)
+
+    symbols = [metadata["symbol"] for _, metadata in chunks]
+    assert "Widget.render" in symbols
+    assert "Widget.refresh" in symbols
+    kinds = {metadata["symbol"]: metadata["symbol_kind"] for _, metadata in chunks}
+    assert kinds["Widget.refresh"] == "method"
+    assert "".join(content for content, _ in chunks) == SOURCE
+
+
+@pytest.mark.parametrize("chunk_size", [60, 120, 200])
+def test_chunks_stay_within_the_chunk_size(chunk_size):
+    body = "".join(f"    value_{i} = compute({i})\n" for i in range(40))
+    source = f"def long_function(argument):\n{body}    return value_0\n"
+
+    chunks = PythonASTSplitter(chunk_size=chunk_size).split_source(source)
+
+    assert len(chunks) > 1
+    assert all(len(content) <= chunk_size for content, _ in chunks)
+    assert all(metadata["symbol"] == "long_function" for _, metadata in chunks)
+    # Every part after the first repeats the signature
+    signature = "def long_function(argument):\n"
+    assert all(content.startswith(signature) for content, _ in chunks)
+    assert coverage(chunks[1:], signature) == source[len(chunks[0][0]) :]
+
+
+def test_line_ranges_match_the_source():
+    lines = SOURCE.splitlines(keepends=True)
+
+    for content, metadata in PythonASTSplitter(chunk_size=120).split_source(SOURCE):
+        start, end = metadata["start_line"], metadata["end_line"]
+        assert "".join(lines[start - 1 : end]) == content
+
+
+def test_unparsable_source_uses_the_fallback_splitter():
+    source = "def broken(:\n    pass\n"
+
+    chunks = PythonASTSplitter(chunk_size=2000).split_source(source)
+
+    assert chunks == [(source.strip(), {})]
+
+
+def test_documents_keep_their_metadata():
+    splitter = PythonASTSplitter(chunk_size=2000)
+
+    documents = splitter.create_documents([SOURCE], [{"path": "widget.py"}])
+
+    assert len(documents) == 3
+    assert all(document.metadata["path"] == "widget.py" for document in documents)
+    assert documents[2].metadata["symbol"] == "Widget"
@@ -0,0 +1,15 @@
+from app.ingestion.state import IndexStateStore
+from app.services.query_service import QueryService
+
+
+def test_index_version_follows_reindexing_by_other_processes(tmp_path):
+    path = str(tmp_path / "state.db")
+    service = QueryService(None, state_store=IndexStateStore(path))
+    assert service.get_index_version("repo") is None
+
+    # A shard worker or another API process records a new commit
+    IndexStateStore(path).record_commit("repo", "main", "abc123")
+    assert service.get_index_version("repo") == "abc123"
+
+    IndexStateStore(path).record_commit("repo", "main", "def456")
+    assert service.get_index_version("repo") == "def456"
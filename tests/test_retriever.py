@@ -0,0 +1,47 @@
+from langchain_core.embeddings import FakeEmbeddings
+from qdrant_client import QdrantClient
+
+from app.retrievers.retriever import RetrieverFactory
+
+
+def factory():
+    retriever_factory = RetrieverFactory(QdrantClient(":memory:"))
+    # Search parameters are all that matter here, not the model
+    retriever_factory.embeddings_cache["model"] = FakeEmbeddings(size=4)
+    return retriever_factory
+
+
+def test_hybrid_retrievers_are_cached_per_prefetch_limit():
+    retriever_factory = factory()
+
+    small = retriever_factory.get_retriever(
+        "code", "model", search_type="hybrid", prefetch_limit=10
+    )
+    large = retriever_factory.get_retriever(
+        "code", "model", search_type="hybrid", prefetch_limit=100
+    )
+
+    assert (small.prefetch_limit, large.prefetch_limit) == (10, 100)
+    assert small is retriever_factory.get_retriever(
+        "code", "model", search_type="hybrid", prefetch_limit=10
+    )
+
+
+def test_retrievers_are_cached_per_search_kwargs():
+    retriever_factory = factory()
+
+    narrow = retriever_factory.get_retriever("code", "model", fetch_k=10)
+    wide = retriever_factory.get_retriever("code", "model", fetch_k=50)
+
+    assert narrow.search_kwargs["fetch_k"] == 10
+    assert wide.search_kwargs["fetch_k"] == 50
+
+
+def test_evict_drops_retrievers_with_search_kwargs():
+    retriever_factory = factory()
+    retriever_factory.get_retriever("code", "model", repo_id="repo", fetch_k=10)
+    retriever_factory.get_retriever("code", "model", repo_id="other")
+
+    retriever_factory.evict("repo")
+
+    assert [key[4] for key in retriever_factory.retriever_cache] == ["other"]
@@ -0,0 +1,103 @@
+import pytest
+
+from app.ingestion.shards import ShardQueue, plan_shards
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return ShardQueue(str(tmp_path / "shards.db"))
+
+
+def enqueue(queue, shards, max_attempts=2):
+    queue.enqueue("job", "repo", "/checkout", "abc123", shards, max_attempts)
+
+
+def statuses(queue):
+    return [shard["status"] for shard in queue.poll("job")]
+
+
+def test_shards_are_claimed_in_order_once(queue):
+    enqueue(queue, [["a.py"], ["b.py"]])
+
+    first = queue.claim("worker-1", lease_seconds=60)
+    second = queue.claim("worker-2", lease_seconds=60)
+
+    assert first["paths"] == ["a.py"]
+    assert first["attempt"] == 1
+    assert first["commit"] == "abc123"
+    assert second["paths"] == ["b.py"]
+    assert queue.claim("worker-3", lease_seconds=60) is None
+    assert statuses(queue) == [ShardQueue.RUNNING, ShardQueue.RUNNING]
+
+
+def test_completion_records_indexed_paths(queue):
+    enqueue(queue, [["a.py", "generated.py"]])
+    shard = queue.claim("worker-1", lease_seconds=60)
+
+    assert queue.complete(shard["id"], "worker-1", {"chunks": 3}, ["a.py"])
+
+    (state,) = queue.poll("job")
+    assert state["status"] == ShardQueue.DONE
+    assert state["stats"] == {"chunks": 3}
+    assert state["indexed_paths"] == ["a.py"]
+
+
+def test_expired_lease_is_retried(queue):
+    enqueue(queue, [["a.py"]])
+    shard = queue.claim("worker-1", lease_seconds=-1)
+
+    retried = queue.claim("worker-2", lease_seconds=60)
+
+    assert retried["id"] == shard["id"]
+    assert retried["attempt"] == 2
+    # The first worker lost its claim
+    assert not queue.heartbeat(shard["id"], "worker-1", 60)
+    assert not queue.complete(shard["id"], "worker-1", {}, [])
+    assert queue.heartbeat(shard["id"], "worker-2", 60)
+
+
+def test_failed_shard_is_retried_until_attempts_run_out(queue):
+    enqueue(queue, [["a.py"]], max_attempts=2)
+
+    shard = queue.claim("worker-1", lease_seconds=60)
+    assert queue.fail(shard["id"], "worker-1", "boom")
+    assert statuses(queue) == [ShardQueue.PENDING]
+
+    shard = queue.claim("worker-1", lease_seconds=60)
+    assert shard["attempt"] == 2
+    assert queue.fail(shard["id"], "worker-1", "boom again")
+
+    (state,) = queue.poll("job")
+    assert state["status"] == ShardQueue.FAILED
+    assert state["error"] == "boom again"
+    assert queue.claim("worker-1", lease_seconds=60) is None
+
+
+def test_expired_last_attempt_fails(queue):
+    enqueue(queue, [["a.py"]], max_attempts=1)
+    queue.claim("worker-1", lease_seconds=-1)
+
+    (state,) = queue.poll("job")
+
+    assert state["status"] == ShardQueue.FAILED
+    assert state["error"] == "Worker lease expired"
+
+
+def test_cancelled_shards_are_not_claimed(queue):
+    enqueue(queue, [["a.py"], ["b.py"]])
+    shard = queue.claim("worker-1", lease_seconds=60)
+
+    queue.cancel("job")
+
+    assert queue.claim("worker-2", lease_seconds=60) is None
+    assert not queue.heartbeat(shard["id"], "worker-1", 60)
+    assert statuses(queue) == [ShardQueue.CANCELLED, ShardQueue.CANCELLED]
+
+
+def test_plan_shards_respects_the_size_limit():
+    paths = [f"big/{i}.py" for i in range(25)] + ["small/a.py", "setup.py"]
+
+    shards = plan_shards(paths, max_files=10)
+
+    assert all(len(shard) <= 10 for shard in shards)
+    assert sorted(path for shard in shards for path in shard) == sorted(paths)